@@ -0,0 +1,113 @@
+"""
+Benchmark of the logging cost of a request: the access log line, two INFO and three
+DEBUG provider calls (DEBUG disabled, as in production), formatted to JSON. The
+baseline is the previous pipeline: extra data converted for disabled levels, the
+whole request body on every record, time.strftime per record and the json module.
+
+Usage: python -m benchmarks.log_records [--payload-size 20000] [--number 2000]
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from benchmarks.utils import measure, print_comparison, setup_django
+
+
+class _FormatHandler(logging.Handler):
+    """Formats records and drops them, so only the logging cost is measured."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+class _RequestFilter(logging.Filter):
+    payload = None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = "0123456789abcdef0123456789abcdef"
+        record.request_path = "/api/payments/create"
+        record.request_payload = self.payload
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payload-size", type=int, default=20000)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    import json_log_formatter
+
+    from paytungan.app.common.middlewares import JSONFormatter, RequestPayload
+    from paytungan.app.common.utils import DictionaryUtil
+    from paytungan.app.logging.adapters import LoggingProvider
+
+    class LegacyJSONFormatter(JSONFormatter):
+        def to_json(self, record: dict) -> str:
+            return json_log_formatter.JSONFormatter.to_json(self, record)
+
+        def _format_time(self, created: float) -> str:
+            return time.strftime("%Y-%m-%d %H:%M:%S%z", time.localtime(created))
+
+    class LegacyLoggingProvider(LoggingProvider):
+        def _log(self, level: int, message: str, extra_data=None) -> None:
+            self.logger.log(
+                level,
+                message,
+                extra={
+                    "extra": DictionaryUtil.transform_into_jsonable_dictionary(
+                        extra_data or {}
+                    ),
+                },
+                stacklevel=2,
+            )
+
+    body = b'{"bill_id": 1, "details": "' + b"x" * args.payload_size + b'"}'
+
+    def build(formatter, provider_class, make_payload):
+        logger = logging.getLogger(f"benchmarks.log_records.{provider_class.__name__}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        request_filter = _RequestFilter()
+        handler = _FormatHandler()
+        handler.setFormatter(formatter)
+        handler.addFilter(request_filter)
+        logger.addHandler(handler)
+        provider = provider_class()
+        provider.logger = logger
+
+        def log_request():
+            request_filter.payload = make_payload()
+            extra_data = {
+                "bill_id": 1,
+                "amount": Decimal("25000"),
+                "created_at": datetime.now(),
+            }
+            for index in range(3):
+                provider.debug(f"Step {index} of payment creation", dict(extra_data))
+            provider.info("Creating invoice", dict(extra_data))
+            provider.info("Invoice created", dict(extra_data))
+            logger.info(
+                "POST /api/payments/create 201",
+                extra={"metrics": {"duration_ms": 12.3, "db_query_count": 4}},
+            )
+
+        return log_request
+
+    baseline = measure(
+        build(LegacyJSONFormatter(), LegacyLoggingProvider, lambda: body),
+        args.number,
+    )
+    candidate = measure(
+        build(JSONFormatter(), LoggingProvider, lambda: RequestPayload(body)),
+        args.number,
+    )
+    print_comparison(f"Request logs, {len(body)} byte body", baseline, candidate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Micro-benchmark of ObjectMapperUtil.map against the previous reflective mapper.
+
+Usage: python -m benchmarks.object_mapper [--number 20000]
+"""
+import argparse
+import dataclasses
+from dataclasses import fields
+from datetime import timedelta
+from typing import List, _GenericAlias
+
+from benchmarks.utils import measure, print_comparison, setup_django
+
+
+def legacy_map(source_model_object, destination_domain_class):
+    """Reflective mapper that ObjectMapperUtil.map used before plans were compiled."""
+    if isinstance(destination_domain_class, _GenericAlias):
+        destination_domain_class = destination_domain_class.__args__[0]
+
+    if isinstance(source_model_object, List):
+        return [
+            legacy_map(obj, destination_domain_class) for obj in source_model_object
+        ]
+
+    is_dataclass = dataclasses.is_dataclass(destination_domain_class)
+    source_same_type = type(source_model_object) is destination_domain_class
+
+    if not is_dataclass or source_model_object is None or source_same_type:
+        return source_model_object
+
+    domain_fields = [field for field in fields(destination_domain_class)]
+
+    if issubclass(type(source_model_object), dict):
+        attributes = {}
+        for field in domain_fields:
+            key_exist = field.name in source_model_object.keys()
+            if key_exist or field.default is dataclasses.MISSING:
+                value = source_model_object.get(field.name)
+                if value:
+                    value = legacy_map(value, field.type)
+
+                attributes[field.name] = value
+    elif dataclasses.is_dataclass(source_model_object):
+        return legacy_map(
+            dataclasses.asdict(source_model_object), destination_domain_class
+        )
+    else:
+        attributes = {
+            field.name: (
+                legacy_map(getattr(source_model_object, field.name, None), field.type)
+            )
+            for field in domain_fields
+        }
+
+    return destination_domain_class(**attributes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.utils import timezone
+
+    from paytungan.app.auth.models import User
+    from paytungan.app.common.utils import ObjectMapperUtil
+    from paytungan.app.payment.models import Payment
+    from paytungan.app.payment.specs import InvoiceDomain, PaymentDomain
+    from paytungan.app.split_bill.models import Bill
+    from paytungan.app.split_bill.specs import BillDomain
+
+    time_now = timezone.now()
+    user = User(id=1, firebase_uid="uid", phone_number="+62", username="user")
+    bill = Bill(
+        id=1,
+        user=user,
+        split_bill_id=1,
+        amount=25000,
+        status="PENDING",
+        details="Nasi goreng",
+        created_at=time_now,
+        updated_at=time_now,
+    )
+    payment = Payment(
+        id=1,
+        bill=bill,
+        status="PENDING",
+        reference_no="invoice-id",
+        expiry_date=time_now + timedelta(days=1),
+        created_at=time_now,
+        updated_at=time_now,
+    )
+    invoice = {
+        "id": "invoice-id",
+        "external_id": "1",
+        "description": "PAY/00001/220501/00001",
+        "invoice_url": "https://checkout.xendit.co/web/invoice-id",
+        "expiry_date": "2022-05-02T08:00:00.000Z",
+        "status": "PENDING",
+        "amount": 25000,
+        "payer_email": "user@paytungan.com",
+        "success_redirect_url": "https://paytungan.com/success",
+        "failure_redirect_url": "https://paytungan.com/failure",
+    }
+
+    cases = [
+        ("Payment -> PaymentDomain", payment, PaymentDomain),
+        ("Bill -> BillDomain", bill, BillDomain),
+        ("Invoice -> InvoiceDomain", invoice, InvoiceDomain),
+        ("[Bill] * 100", [bill] * 100, List[BillDomain]),
+    ]
+
+    for name, source, destination in cases:
+        assert legacy_map(source, destination) == ObjectMapperUtil.map(
+            source, destination
+        ), f"{name} output differs"
+
+        number = args.number // 100 if isinstance(source, list) else args.number
+        baseline = measure(lambda: legacy_map(source, destination), number)
+        candidate = measure(lambda: ObjectMapperUtil.map(source, destination), number)
+        print_comparison(name, baseline, candidate)
+
+
+if __name__ == "__main__":
+    main()
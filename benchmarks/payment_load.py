@@ -0,0 +1,237 @@
+"""
+End-to-end load benchmark of the PaymentService hot path against the local Xendit stub.
+
+It creates a throwaway test database, seeds users, split bills and bills, then drives
+create_payment, get_payment, update_status and get_or_create_payout at the given
+concurrency and reports throughput and latency percentiles per operation.
+
+Usage: python -m benchmarks.payment_load [--concurrency 8] [--bills 200]
+           [--latency-ms 80] [--error-rate 0.01] [--stub-url http://127.0.0.1:8089/]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Sequence
+
+from benchmarks.utils import mean, percentile, setup_django
+from benchmarks.xendit_stub import XenditStubServer
+
+
+@dataclass
+class OperationResult:
+    name: str
+    wall_time: float
+    latencies: List[float] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def report(self) -> str:
+        calls = len(self.latencies) + len(self.errors)
+        throughput = calls / self.wall_time if self.wall_time else 0.0
+        return (
+            f"{self.name:<22} {calls:>6} calls {throughput:>9.1f} ops/s"
+            f"  mean {mean(self.latencies) * 1000:>8.1f} ms"
+            f"  p50 {percentile(self.latencies, 50) * 1000:>8.1f} ms"
+            f"  p90 {percentile(self.latencies, 90) * 1000:>8.1f} ms"
+            f"  p99 {percentile(self.latencies, 99) * 1000:>8.1f} ms"
+            f"  errors {len(self.errors)}"
+        )
+
+
+def run_operation(
+    name: str,
+    func: Callable[[object], object],
+    items: Sequence[object],
+    concurrency: int,
+) -> OperationResult:
+    from django.db import connection
+
+    def timed_call(item):
+        start = time.perf_counter()
+        try:
+            func(item)
+            return time.perf_counter() - start, None
+        except Exception:
+            return time.perf_counter() - start, traceback.format_exc(limit=1)
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed_call, items))
+    result = OperationResult(name=name, wall_time=time.perf_counter() - start)
+
+    for latency, error in outcomes:
+        if error:
+            result.errors.append(error)
+        else:
+            result.latencies.append(latency)
+
+    return result
+
+
+def seed(bills_count: int, bills_per_split_bill: int):
+    from paytungan.app.auth.models import User
+    from paytungan.app.split_bill.models import Bill, SplitBill
+
+    split_bills_count = max(1, bills_count // bills_per_split_bill)
+    user_fund = User.objects.create(
+        firebase_uid="fund", phone_number="+62", email="fund@paytungan.com"
+    )
+    users = User.objects.bulk_create(
+        User(
+            firebase_uid=f"user-{index}",
+            phone_number="+62",
+            username=f"user{index}",
+            email=f"user{index}@paytungan.com",
+        )
+        for index in range(bills_per_split_bill)
+    )
+    users = list(User.objects.exclude(pk=user_fund.pk).order_by("id"))
+    SplitBill.objects.bulk_create(
+        SplitBill(
+            name=f"split-bill-{index}",
+            user_fund=user_fund,
+            withdrawal_method="GOPAY",
+            withdrawal_number="0812",
+            amount=10000 * bills_per_split_bill,
+        )
+        for index in range(split_bills_count)
+    )
+    split_bills = list(SplitBill.objects.order_by("id"))
+    Bill.objects.bulk_create(
+        Bill(user=user, split_bill=split_bill, amount=10000)
+        for split_bill in split_bills
+        for user in users
+    )
+
+    return list(Bill.objects.select_related("user").order_by("id")), split_bills
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--bills", type=int, default=200)
+    parser.add_argument("--bills-per-split-bill", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument(
+        "--stub-url", help="Use an already running Xendit stub instead of starting one"
+    )
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub_url:
+        os.environ["XENDIT_BASE_URL"] = args.stub_url
+    else:
+        stub = XenditStubServer(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+        ).start()
+        os.environ["XENDIT_BASE_URL"] = stub.base_url
+    os.environ.setdefault("XENDIT_API_KEY", "xnd_development_stub")
+
+    setup_django()
+
+    from django.db import connection, transaction
+
+    from paytungan.app.auth.specs import UserDomain
+    from paytungan.app.di import injector
+    from paytungan.app.payment.interfaces import IXenditProvider
+    from paytungan.app.payment.services import PaymentService
+    from paytungan.app.payment.specs import (
+        CreatePaymentSpec,
+        CreatePayoutSpec,
+        UpdateStatusSpec,
+    )
+
+    # SQLite in-memory databases are per connection, use a file so threads share it
+    if connection.vendor == "sqlite":
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        test_settings["NAME"] = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+        connection.settings_dict.setdefault("OPTIONS", {})["timeout"] = 30
+
+    # SQLite fails lock upgrades of concurrent write transactions instead of waiting,
+    # so writes are serialized there. Use PostgreSQL for representative numbers.
+    write_lock = threading.Lock() if connection.vendor == "sqlite" else nullcontext()
+
+    database_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+    try:
+        bills, split_bills = seed(args.bills, args.bills_per_split_bill)
+        payment_service: PaymentService = injector.get(PaymentService)
+        payment_ids = []
+
+        def create_payment(bill):
+            user = UserDomain(
+                id=bill.user.id,
+                firebase_id=bill.user.firebase_uid,
+                phone_number=bill.user.phone_number,
+                email=bill.user.email,
+            )
+            with write_lock, transaction.atomic():
+                payment = payment_service.create_payment(
+                    CreatePaymentSpec(bill_id=bill.id), user
+                )
+            payment_ids.append(payment.id)
+
+        def update_status(bill):
+            with write_lock, transaction.atomic():
+                payment_service.update_status(UpdateStatusSpec(bill_id=bill.id))
+
+        def get_or_create_payout(split_bill):
+            with write_lock:
+                payment_service.get_or_create_payout(
+                    CreatePayoutSpec(split_bill_id=split_bill.id)
+                )
+
+        results = [
+            run_operation("create_payment", create_payment, bills, args.concurrency),
+            run_operation(
+                "get_payment",
+                payment_service.get_payment,
+                payment_ids,
+                args.concurrency,
+            ),
+            run_operation("update_status", update_status, bills, args.concurrency),
+            run_operation(
+                "get_or_create_payout",
+                get_or_create_payout,
+                split_bills * 2,
+                args.concurrency,
+            ),
+        ]
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+        if stub:
+            stub.stop()
+
+    print(
+        f"concurrency={args.concurrency} bills={len(bills)}"
+        f" split_bills={len(split_bills)} xendit={os.environ['XENDIT_BASE_URL']}"
+    )
+    for result in results:
+        print(result.report())
+        if result.errors:
+            print(f"  first error: {result.errors[0].strip()}")
+
+    xendit_provider = injector.get(IXenditProvider)
+    if hasattr(xendit_provider, "get_http_stats"):
+        print(f"xendit http: {xendit_provider.get_http_stats()}")
+    if hasattr(xendit_provider, "get_invoice_cache_stats"):
+        print(f"invoice cache: {xendit_provider.get_invoice_cache_stats()}")
+    if stub:
+        print(
+            f"stub: {stub.state.requests} requests,"
+            f" {stub.state.injected_errors} injected errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of the compiled ReadOnlySerializer against DRF's Serializer.to_representation
+on a bill list response.
+
+Usage: python -m benchmarks.serializers [--bills 10000] [--number 5]
+"""
+import argparse
+from unittest.mock import patch
+
+from benchmarks.utils import measure, print_comparison, setup_django
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bills", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.utils import timezone
+    from rest_framework import serializers
+    from rest_framework.renderers import JSONRenderer
+
+    from paytungan.app.auth.models import User
+    from paytungan.app.common.serializers import ReadOnlySerializer
+    from paytungan.app.split_bill.models import Bill
+    from paytungan.app.split_bill.serializers import GetBillListResponse
+
+    time_now = timezone.now()
+    users = [
+        User(
+            id=index,
+            firebase_uid=f"uid-{index}",
+            phone_number="+6281234567890",
+            username=f"user{index}",
+            email=f"user{index}@paytungan.com",
+        )
+        for index in range(1, 51)
+    ]
+    bills = [
+        Bill(
+            id=index,
+            user=users[index % len(users)],
+            split_bill_id=index // 5 + 1,
+            amount=25000,
+            status="PENDING",
+            details="Nasi goreng",
+            created_at=time_now,
+            updated_at=time_now,
+        )
+        for index in range(1, args.bills + 1)
+    ]
+    payload = {"data": bills, "next_cursor": None}
+
+    def render():
+        return JSONRenderer().render(GetBillListResponse(payload).data)
+
+    candidate_output = render()
+    with patch.object(
+        ReadOnlySerializer,
+        "to_representation",
+        serializers.Serializer.to_representation,
+    ):
+        assert render() == candidate_output, "Rendered output differs"
+        baseline = measure(render, args.number)
+
+    candidate = measure(render, args.number)
+    print_comparison(f"GetBillListResponse, {args.bills} bills", baseline, candidate)
+
+
+if __name__ == "__main__":
+    main()
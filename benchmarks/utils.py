@@ -0,0 +1,48 @@
+import os
+import statistics
+import time
+from typing import Callable, List
+
+
+def setup_django() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "paytungan.settings")
+
+    import django
+
+    django.setup()
+
+
+def measure(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """
+    Return the best average seconds per call of `func` over `repeat` rounds
+    of `number` calls each.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    return min(timings)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def mean(values: List[float]) -> float:
+    return statistics.mean(values) if values else 0.0
+
+
+def print_comparison(name: str, baseline: float, candidate: float) -> None:
+    speedup = baseline / candidate if candidate else float("inf")
+    print(
+        f"{name:<24} baseline {baseline * 1e6:10.2f} us"
+        f"   compiled {candidate * 1e6:10.2f} us   x{speedup:.2f}"
+    )
@@ -0,0 +1,218 @@
+"""
+Local stand-in for the Xendit invoice and payout endpoints used by XenditProvider,
+with configurable latency and error rate.
+
+Usage: python -m benchmarks.xendit_stub [--port 8089] [--latency-ms 80] [--error-rate 0.01]
+Then point the app at it with XENDIT_BASE_URL=http://127.0.0.1:8089/
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def _format_datetime(value: datetime) -> str:
+    return value.strftime(DATETIME_FORMAT)[:-4] + "Z"
+
+
+class XenditStubState:
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.invoices: Dict[str, dict] = {}
+        self.payouts: Dict[str, dict] = {}
+        self.requests = 0
+        self.injected_errors = 0
+        self.lock = threading.Lock()
+
+    def create_invoice(self, body: dict) -> dict:
+        time_now = datetime.now(timezone.utc)
+        invoice_id = uuid.uuid4().hex[:24]
+        invoice = {
+            "id": invoice_id,
+            "external_id": body.get("external_id"),
+            "user_id": "stub-user",
+            "status": "PENDING",
+            "merchant_name": "Paytungan",
+            "amount": body.get("amount"),
+            "payer_email": body.get("payer_email"),
+            "description": body.get("description"),
+            "invoice_url": f"https://checkout-staging.xendit.co/web/{invoice_id}",
+            "expiry_date": _format_datetime(time_now + timedelta(days=1)),
+            "should_send_email": body.get("should_send_email", False),
+            "success_redirect_url": body.get("success_redirect_url"),
+            "failure_redirect_url": body.get("failure_redirect_url"),
+            "created": _format_datetime(time_now),
+            "updated": _format_datetime(time_now),
+            "currency": "IDR",
+        }
+        with self.lock:
+            self.invoices[invoice_id] = invoice
+
+        return invoice
+
+    def create_payout(self, body: dict) -> dict:
+        time_now = datetime.now(timezone.utc)
+        payout_id = uuid.uuid4().hex[:24]
+        payout = {
+            "id": payout_id,
+            "external_id": body.get("external_id"),
+            "amount": body.get("amount"),
+            "merchant_name": "Paytungan",
+            "status": "PENDING",
+            "expiration_timestamp": _format_datetime(time_now + timedelta(days=3)),
+            "created": _format_datetime(time_now),
+            "email": body.get("email"),
+            "payout_url": f"https://payout-staging.xendit.co/web/{payout_id}",
+        }
+        with self.lock:
+            self.payouts[payout_id] = payout
+
+        return payout
+
+
+class XenditStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "XenditStubServer"
+
+    routes = [
+        ("POST", re.compile(r"^/v2/invoices$"), "_create_invoice"),
+        ("GET", re.compile(r"^/v2/invoices/(?P<id>[^/]+)$"), "_get_invoice"),
+        ("POST", re.compile(r"^/payouts$"), "_create_payout"),
+        ("GET", re.compile(r"^/payouts/(?P<id>[^/]+)$"), "_get_payout"),
+    ]
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def log_message(self, format: str, *args) -> None:
+        # Keep benchmark output readable
+        pass
+
+    def _dispatch(self, method: str) -> None:
+        state = self.server.state
+        with state.lock:
+            state.requests += 1
+
+        body = self._read_body()
+        delay = state.latency_ms + random.uniform(0, state.jitter_ms)
+        time.sleep(delay / 1000)
+
+        if random.random() < state.error_rate:
+            with state.lock:
+                state.injected_errors += 1
+            self._send(503, {"error_code": "SERVER_ERROR", "message": "Injected"})
+            return
+
+        # xendit-python joins base_url and path with a double slash
+        path = re.sub(r"/+", "/", self.path.split("?")[0])
+        for route_method, pattern, handler_name in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                status, payload = getattr(self, handler_name)(body, **match.groupdict())
+                self._send(status, payload)
+                return
+
+        self._send(404, {"error_code": "NOT_FOUND", "message": "Route not found"})
+
+    def _create_invoice(self, body: dict) -> Tuple[int, dict]:
+        return 200, self.server.state.create_invoice(body)
+
+    def _get_invoice(self, body: dict, id: str) -> Tuple[int, dict]:
+        return self._get_or_not_found(self.server.state.invoices.get(id), "INVOICE")
+
+    def _create_payout(self, body: dict) -> Tuple[int, dict]:
+        return 200, self.server.state.create_payout(body)
+
+    def _get_payout(self, body: dict, id: str) -> Tuple[int, dict]:
+        return self._get_or_not_found(self.server.state.payouts.get(id), "PAYOUT")
+
+    @staticmethod
+    def _get_or_not_found(obj: Optional[dict], name: str) -> Tuple[int, dict]:
+        if obj is None:
+            return 404, {
+                "error_code": f"{name}_NOT_FOUND_ERROR",
+                "message": f"{name.title()} not found",
+            }
+
+        return 200, obj
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status: int, payload: dict) -> None:
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class XenditStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0,
+    ) -> None:
+        super().__init__((host, port), XenditStubHandler)
+        self.state = XenditStubState(latency_ms, jitter_ms, error_rate)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "XenditStubServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    server = XenditStubServer(
+        args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate
+    )
+    print(f"Xendit stub listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from django.contrib import admin
+from paytungan.app.job.admin import JobAdmin
+from paytungan.app.job.models import Job
 from paytungan.app.payment.admin import PaymentAdmin
 
 from paytungan.app.payment.models import Payment
@@ -10,3 +12,4 @@ admin.site.register(User)
 admin.site.register(Bill, BillAdmin)
 admin.site.register(SplitBill, SplitBillAdmin)
 admin.site.register(Payment, PaymentAdmin)
+admin.site.register(Job, JobAdmin)
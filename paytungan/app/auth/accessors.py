@@ -1,9 +1,15 @@
-from typing import Dict, List, Optional
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set
+from asgiref.sync import sync_to_async
 from firebase_admin import initialize_app, auth, credentials
 from injector import inject
+from django.core.cache import caches
 from django.db import IntegrityError
 
+from paytungan.app.common.cache import CacheStats, LRUCache
 from paytungan.app.common.config import get_firebase_config
+from paytungan.app.common.instrumentation import external_call
+from paytungan.app.common.metrics import CACHE_REQUESTS
 from paytungan.app.common.exceptions import (
     BaseException,
     NotFoundException,
@@ -12,20 +18,44 @@ from paytungan.app.common.exceptions import (
 )
 from paytungan.app.logging.interface import ILoggingProvider
 from .models import User
-from .interfaces import IUserAccessor, IFirebaseProvider
+from .interfaces import (
+    IAsyncFirebaseProvider,
+    IFirebaseProvider,
+    IUserAccessor,
+    IUserCache,
+)
 from .specs import (
     GetUserListSpec,
     CreateUserSpec,
     FirebaseDecodedToken,
     UpdateUserSpec,
+    UserDomain,
+)
+from paytungan.app.base.constants import (
+    FIREBASE_PROJECT_ID,
+    FIREBASE_TOKEN_CACHE_MAX_SIZE,
+    USER_CACHE_ALIAS,
+    USER_CACHE_MAX_SIZE,
+    USER_CACHE_TTL,
 )
-from paytungan.app.base.constants import FIREBASE_PROJECT_ID
+
+# Name of token verifications in request metrics, it fetches Google's public keys
+# when they are not cached
+FIREBASE_CALL_NAME = "firebase"
 
 
 class UserAccessor(IUserAccessor):
     @inject
-    def __init__(self, logger: ILoggingProvider) -> None:
+    def __init__(self, logger: ILoggingProvider, user_cache: IUserCache) -> None:
         self.logger = logger
+        self.user_cache = user_cache
+        # Only ids known to exist are cached, users are never hard deleted and a soft
+        # deleted one drops out once its entry expires
+        self._existing_id_cache: LRUCache[bool] = LRUCache(
+            max_size=USER_CACHE_MAX_SIZE,
+            default_ttl=USER_CACHE_TTL,
+            name="user_existing_id",
+        )
 
     def get(self, user_id: int) -> Optional[User]:
         try:
@@ -51,6 +81,19 @@ class UserAccessor(IUserAccessor):
 
         return user
 
+    def get_domain_by_firebase_uid(self, firebase_uid: str) -> Optional[UserDomain]:
+        user_domain = self.user_cache.get(firebase_uid)
+        if user_domain:
+            return user_domain
+
+        user = self.get_by_firebase_uid(firebase_uid)
+        if not user:
+            return None
+
+        user_domain = self._convert_to_domain(user)
+        self.user_cache.set(firebase_uid, user_domain)
+        return user_domain
+
     def get_list(self, spec: GetUserListSpec) -> List[User]:
         queryset = User.objects.all()
 
@@ -65,6 +108,23 @@ class UserAccessor(IUserAccessor):
 
         return queryset
 
+    def get_existing_ids(self, user_ids: Iterable[int]) -> Set[int]:
+        user_ids = set(user_ids)
+        existing_ids = {
+            user_id for user_id in user_ids if self._existing_id_cache.get(user_id)
+        }
+        unknown_ids = user_ids - existing_ids
+        if not unknown_ids:
+            return existing_ids
+
+        for user_id in User.objects.filter(id__in=unknown_ids).values_list(
+            "id", flat=True
+        ):
+            self._existing_id_cache.set(user_id, True)
+            existing_ids.add(user_id)
+
+        return existing_ids
+
     def create(self, spec: CreateUserSpec) -> Optional[User]:
         try:
             new_user = User(
@@ -76,6 +136,7 @@ class UserAccessor(IUserAccessor):
                 profil_image=spec.profil_image,
             )
             new_user.save()
+            self.user_cache.delete(spec.firebase_uid)
 
             return new_user
         except Exception as e:
@@ -109,14 +170,77 @@ class UserAccessor(IUserAccessor):
             self.logger.error(f"Error when try to update user with spec {spec}: {e}")
             raise BaseException(message="Error when try to update user", code=400)
 
+        self.user_cache.delete(spec.firebase_uid)
+        return user
+
+    @staticmethod
+    def _convert_to_domain(obj: User) -> UserDomain:
+        return UserDomain(
+            id=obj.id,
+            firebase_id=obj.firebase_uid,
+            phone_number=obj.phone_number,
+            email=obj.email,
+            username=obj.username,
+            name=obj.name,
+        )
+
+
+class LocalUserCache(IUserCache):
+    """
+    Per-process user cache. Invalidation only reaches the current process,
+    so entries rely on a short TTL to converge across workers.
+    """
+
+    def __init__(self) -> None:
+        self._cache: LRUCache[UserDomain] = LRUCache(
+            max_size=USER_CACHE_MAX_SIZE, default_ttl=USER_CACHE_TTL, name="user"
+        )
+
+    def get(self, firebase_uid: str) -> Optional[UserDomain]:
+        return self._cache.get(firebase_uid)
+
+    def set(self, firebase_uid: str, user: UserDomain) -> None:
+        self._cache.set(firebase_uid, user)
+
+    def delete(self, firebase_uid: str) -> None:
+        self._cache.delete(firebase_uid)
+
+
+class DjangoUserCache(IUserCache):
+    """
+    User cache backed by a Django cache alias, shared by every worker
+    that points at the same backend.
+    """
+
+    key_prefix = "user:firebase_uid:"
+
+    def get(self, firebase_uid: str) -> Optional[UserDomain]:
+        user = self._get_cache().get(self._get_key(firebase_uid))
+        CACHE_REQUESTS.inc(cache="user", result="miss" if user is None else "hit")
         return user
 
+    def set(self, firebase_uid: str, user: UserDomain) -> None:
+        self._get_cache().set(self._get_key(firebase_uid), user, USER_CACHE_TTL)
+
+    def delete(self, firebase_uid: str) -> None:
+        self._get_cache().delete(self._get_key(firebase_uid))
+
+    @staticmethod
+    def _get_cache():
+        return caches[USER_CACHE_ALIAS]
+
+    def _get_key(self, firebase_uid: str) -> str:
+        return f"{self.key_prefix}{firebase_uid}"
+
 
 class FirebaseProvider(IFirebaseProvider):
     @inject
     def __init__(self, logger: ILoggingProvider) -> None:
         self._cred = None
         self._app = None
+        self._token_cache: LRUCache[FirebaseDecodedToken] = LRUCache(
+            max_size=FIREBASE_TOKEN_CACHE_MAX_SIZE, name="firebase_token"
+        )
         self.logger = logger
 
     def _get_app(self):
@@ -129,9 +253,15 @@ class FirebaseProvider(IFirebaseProvider):
         return self._app
 
     def decode_token(self, token: str) -> Optional[FirebaseDecodedToken]:
+        cache_key = self._get_token_cache_key(token)
+        cached_token = self._token_cache.get(cache_key)
+        if cached_token:
+            return cached_token
+
         decoded_token: Dict[str, str]
         try:
-            decoded_token = auth.verify_id_token(token, app=self._get_app())
+            with external_call(FIREBASE_CALL_NAME):
+                decoded_token = auth.verify_id_token(token, app=self._get_app())
         except Exception as e:
             self.logger.error(f"Error when verify token: {e}")
             raise UnauthorizedError(
@@ -146,11 +276,42 @@ class FirebaseProvider(IFirebaseProvider):
                 401,
             )
 
-        return FirebaseDecodedToken(
+        result = FirebaseDecodedToken(
             user_id=decoded_token["user_id"],
             phone_number=decoded_token["phone_number"],
         )
 
+        # Signature verification is the expensive part, so keep the result
+        # until the token itself expires
+        if decoded_token.get("exp"):
+            self._token_cache.set(cache_key, result, expires_at=decoded_token["exp"])
+
+        return result
+
+    def get_token_cache_stats(self) -> CacheStats:
+        return self._token_cache.stats
+
+    @staticmethod
+    def _get_token_cache_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AsyncFirebaseProvider(IAsyncFirebaseProvider):
+    """
+    firebase_admin has no async API, so verification runs on a worker thread. It
+    touches no database connection, so it does not need the thread sensitive executor.
+    """
+
+    @inject
+    def __init__(self, firebase_provider: IFirebaseProvider) -> None:
+        self.firebase_provider = firebase_provider
+        self._decode_token = sync_to_async(
+            firebase_provider.decode_token, thread_sensitive=False
+        )
+
+    async def decode_token(self, token: str) -> Optional[FirebaseDecodedToken]:
+        return await self._decode_token(token)
+
 
 class DummyFirebaseProvider(IFirebaseProvider):
     def decode_token(self, token: str) -> Optional[FirebaseDecodedToken]:
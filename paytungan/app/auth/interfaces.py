@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set
 from .models import User
 
 from .specs import (
@@ -7,6 +7,7 @@ from .specs import (
     CreateUserSpec,
     FirebaseDecodedToken,
     UpdateUserSpec,
+    UserDomain,
 )
 
 
@@ -23,10 +24,18 @@ class IUserAccessor(ABC):
     def get_by_firebase_uid(self, firebase_uid: str) -> Optional[User]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_domain_by_firebase_uid(self, firebase_uid: str) -> Optional[UserDomain]:
+        raise NotImplementedError
+
     @abstractmethod
     def get_list(self, spec: GetUserListSpec) -> List[User]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_existing_ids(self, user_ids: Iterable[int]) -> Set[int]:
+        raise NotImplementedError
+
     @abstractmethod
     def create(self, spec: CreateUserSpec) -> Optional[User]:
         raise NotImplementedError
@@ -40,3 +49,23 @@ class IFirebaseProvider(ABC):
     @abstractmethod
     def decode_token(self, token: str) -> FirebaseDecodedToken:
         raise NotImplementedError
+
+
+class IAsyncFirebaseProvider(ABC):
+    @abstractmethod
+    async def decode_token(self, token: str) -> FirebaseDecodedToken:
+        raise NotImplementedError
+
+
+class IUserCache(ABC):
+    @abstractmethod
+    def get(self, firebase_uid: str) -> Optional[UserDomain]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, firebase_uid: str, user: UserDomain) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, firebase_uid: str) -> None:
+        raise NotImplementedError
@@ -1,10 +1,22 @@
 from injector import Binder, Module, singleton
 from django.conf import settings
 
-from paytungan.app.base.constants import Environment
-from .interfaces import IUserAccessor, IFirebaseProvider
-from .accessors import UserAccessor, FirebaseProvider, DummyFirebaseProvider
-from .services import UserServices, AuthService
+from paytungan.app.base.constants import CacheBackend, Environment, USER_CACHE_BACKEND
+from .interfaces import (
+    IAsyncFirebaseProvider,
+    IFirebaseProvider,
+    IUserAccessor,
+    IUserCache,
+)
+from .accessors import (
+    AsyncFirebaseProvider,
+    DjangoUserCache,
+    DummyFirebaseProvider,
+    FirebaseProvider,
+    LocalUserCache,
+    UserAccessor,
+)
+from .services import AsyncAuthService, UserServices, AuthService
 
 
 class AuthModule(Module):
@@ -12,6 +24,13 @@ class AuthModule(Module):
         binder.bind(IUserAccessor, to=UserAccessor, scope=singleton)
         binder.bind(UserServices, to=UserServices, scope=singleton)
         binder.bind(AuthService, to=AuthService, scope=singleton)
+        binder.bind(AsyncAuthService, to=AsyncAuthService, scope=singleton)
+        binder.bind(IAsyncFirebaseProvider, to=AsyncFirebaseProvider, scope=singleton)
+
+        if USER_CACHE_BACKEND == CacheBackend.DJANGO.value:
+            binder.bind(IUserCache, to=DjangoUserCache, scope=singleton)
+        else:
+            binder.bind(IUserCache, to=LocalUserCache, scope=singleton)
 
         if settings.CURRENT_ENV == Environment.TEST:
             binder.bind(IFirebaseProvider, to=DummyFirebaseProvider, scope=singleton)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from paytungan.app.common.serializers import ReadOnlySerializer
+
 
 class GetUserRequest(serializers.Serializer):
     user_id = serializers.IntegerField(min_value=1)
@@ -9,7 +11,7 @@ class GetByUsernameRequest(serializers.Serializer):
     username = serializers.CharField()
 
 
-class UserSerializer(serializers.Serializer):
+class UserSerializer(ReadOnlySerializer):
     id = serializers.IntegerField(min_value=1)
     firebase_uid = serializers.CharField()
     phone_number = serializers.CharField()
@@ -28,7 +30,7 @@ class UserSerializer(serializers.Serializer):
     is_onboarding = serializers.BooleanField(default=False)
 
 
-class GetUserResponse(serializers.Serializer):
+class GetUserResponse(ReadOnlySerializer):
     data = UserSerializer()
 
 
@@ -50,7 +52,7 @@ class CreateUserRequest(serializers.Serializer):
     is_onboarding = serializers.BooleanField(default=False)
 
 
-class CreateUserResponse(serializers.Serializer):
+class CreateUserResponse(ReadOnlySerializer):
     data = UserSerializer()
 
 
@@ -58,7 +60,7 @@ class LoginRequest(serializers.Serializer):
     token = serializers.CharField()
 
 
-class LoginResponse(serializers.Serializer):
+class LoginResponse(ReadOnlySerializer):
     data = UserSerializer()
 
 
@@ -71,5 +73,5 @@ class UpdateUserRequest(serializers.Serializer):
     )
 
 
-class UpdateUserResponse(serializers.Serializer):
+class UpdateUserResponse(ReadOnlySerializer):
     data = UserSerializer()
@@ -1,13 +1,15 @@
 from typing import List, Optional
 from .models import User
+from asgiref.sync import sync_to_async
 from injector import inject
 
-from .interfaces import IFirebaseProvider, IUserAccessor
+from .interfaces import IAsyncFirebaseProvider, IFirebaseProvider, IUserAccessor
 from .specs import (
     FirebaseDecodedToken,
     GetUserListSpec,
     CreateUserSpec,
     UpdateUserSpec,
+    UserDomain,
 )
 
 
@@ -47,10 +49,10 @@ class AuthService:
         self.user_accessor = user_accessor
         self.firebase_provider = firebase_provider
 
-    def get_user_from_token(self, token: str) -> Optional[User]:
+    def get_user_from_token(self, token: str) -> Optional[UserDomain]:
         decoded_token = self.firebase_provider.decode_token(token)
 
-        return self.user_accessor.get_by_firebase_uid(
+        return self.user_accessor.get_domain_by_firebase_uid(
             firebase_uid=decoded_token.user_id
         )
 
@@ -71,3 +73,24 @@ class AuthService:
 
     def decode_token(self, token: str) -> Optional[FirebaseDecodedToken]:
         return self.firebase_provider.decode_token(token)
+
+
+class AsyncAuthService:
+    @inject
+    def __init__(
+        self,
+        user_accessor: IUserAccessor,
+        firebase_provider: IAsyncFirebaseProvider,
+    ) -> None:
+        self.user_accessor = user_accessor
+        self.firebase_provider = firebase_provider
+
+    async def get_user_from_token(self, token: str) -> Optional[UserDomain]:
+        decoded_token = await self.firebase_provider.decode_token(token)
+
+        return await sync_to_async(self.user_accessor.get_domain_by_firebase_uid)(
+            firebase_uid=decoded_token.user_id
+        )
+
+    async def decode_token(self, token: str) -> Optional[FirebaseDecodedToken]:
+        return await self.firebase_provider.decode_token(token)
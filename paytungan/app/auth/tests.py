@@ -1,7 +1,8 @@
 # from django.test import TestCase
+import time
 from typing import Optional
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from faker import Faker
 
 from paytungan.app.auth.models import User
@@ -13,6 +14,9 @@ from paytungan.app.auth.specs import (
     UserDomain,
 )
 
+from paytungan.app.common.exceptions import UnauthorizedError
+
+from .accessors import DjangoUserCache, FirebaseProvider, LocalUserCache, UserAccessor
 from .services import AuthService, UserServices
 
 
@@ -117,3 +121,112 @@ class TestAuthService(TestCase):
         self.auth_service.decode_token(token)
 
         self.assertEqual(dummy_user.firebase_uid, decode_token_return.user_id)
+
+
+@patch.object(FirebaseProvider, "_get_app", MagicMock())
+@patch("paytungan.app.auth.accessors.auth.verify_id_token")
+class TestFirebaseProvider(TestCase):
+    def setUp(self) -> None:
+        self.firebase_provider = FirebaseProvider(logger=MagicMock())
+
+    @staticmethod
+    def _get_decoded_token_dummy(exp: float):
+        return {
+            "aud": "paytungan",
+            "user_id": "342dwsdsd",
+            "phone_number": "+62",
+            "exp": exp,
+        }
+
+    def test_decode_token_cached(self, verify_id_token: MagicMock):
+        verify_id_token.return_value = self._get_decoded_token_dummy(time.time() + 60)
+
+        first = self.firebase_provider.decode_token("token")
+        second = self.firebase_provider.decode_token("token")
+
+        self.assertEqual(first, second)
+        self.assertEqual(verify_id_token.call_count, 1)
+        self.assertEqual(self.firebase_provider.get_token_cache_stats().hits, 1)
+
+    def test_decode_token_expired_not_cached(self, verify_id_token: MagicMock):
+        verify_id_token.return_value = self._get_decoded_token_dummy(time.time() - 1)
+
+        self.firebase_provider.decode_token("token")
+        self.firebase_provider.decode_token("token")
+
+        self.assertEqual(verify_id_token.call_count, 2)
+
+    def test_decode_token_invalid(self, verify_id_token: MagicMock):
+        verify_id_token.side_effect = ValueError("invalid")
+
+        with self.assertRaises(UnauthorizedError):
+            self.firebase_provider.decode_token("token")
+        self.assertEqual(self.firebase_provider.get_token_cache_stats().size, 0)
+
+
+class TestUserAccessorCache(TestCase):
+    def setUp(self) -> None:
+        self.user_cache = LocalUserCache()
+        self.user_accessor = UserAccessor(
+            logger=MagicMock(), user_cache=self.user_cache
+        )
+        self.dummy_user = User(
+            id=1, firebase_uid="342dwsdsd", phone_number="+62", username="user"
+        )
+
+    def test_get_domain_by_firebase_uid_cached(self):
+        with patch.object(
+            self.user_accessor, "get_by_firebase_uid", return_value=self.dummy_user
+        ) as get_by_firebase_uid:
+            first = self.user_accessor.get_domain_by_firebase_uid("342dwsdsd")
+            second = self.user_accessor.get_domain_by_firebase_uid("342dwsdsd")
+
+        self.assertEqual(first, second)
+        self.assertEqual(first.firebase_id, self.dummy_user.firebase_uid)
+        self.assertEqual(get_by_firebase_uid.call_count, 1)
+
+    def test_get_domain_by_firebase_uid_not_found(self):
+        with patch.object(self.user_accessor, "get_by_firebase_uid", return_value=None):
+            user = self.user_accessor.get_domain_by_firebase_uid("342dwsdsd")
+
+        self.assertIsNone(user)
+        self.assertIsNone(self.user_cache.get("342dwsdsd"))
+
+    @patch("paytungan.app.auth.accessors.User.objects")
+    def test_update_invalidate_cache(self, user_objects: MagicMock):
+        user_objects.get.return_value = MagicMock()
+        self.user_cache.set(
+            "342dwsdsd", UserAccessor._convert_to_domain(self.dummy_user)
+        )
+
+        self.user_accessor.update(
+            UpdateUserSpec(
+                firebase_uid="342dwsdsd",
+                username="aaa",
+                name="aaaa",
+                email="email@gmail.com",
+            )
+        )
+
+        self.assertIsNone(self.user_cache.get("342dwsdsd"))
+
+    @patch("paytungan.app.auth.accessors.User.objects")
+    def test_get_existing_ids_cached(self, user_objects: MagicMock):
+        user_objects.filter.return_value.values_list.return_value = [1, 2]
+
+        first = self.user_accessor.get_existing_ids([1, 2, 3])
+        second = self.user_accessor.get_existing_ids([1, 2])
+
+        self.assertEqual(first, {1, 2})
+        self.assertEqual(second, {1, 2})
+        user_objects.filter.assert_called_once_with(id__in={1, 2, 3})
+
+    def test_django_user_cache(self):
+        user_cache = DjangoUserCache()
+        user_domain = UserAccessor._convert_to_domain(self.dummy_user)
+
+        user_cache.set("342dwsdsd", user_domain)
+        self.assertEqual(user_cache.get("342dwsdsd"), user_domain)
+
+        user_cache.delete("342dwsdsd")
+        self.assertIsNone(user_cache.get("342dwsdsd"))
@@ -3,11 +3,17 @@ from functools import wraps
 from paytungan.app.auth.specs import UserDomain
 from paytungan.app.base.serializers import AuthHeaderRequest
 from paytungan.app.common.exceptions import UnauthorizedError
-from paytungan.app.common.utils import ObjectMapperUtil
-from paytungan.app.auth.services import AuthService
+from paytungan.app.auth.services import AsyncAuthService, AuthService
 from paytungan.app.di import injector
 
 auth_service: AuthService = injector.get(AuthService)
+async_auth_service: AsyncAuthService = injector.get(AsyncAuthService)
+
+
+def _get_auth_token(request) -> str:
+    header_serializer = AuthHeaderRequest(data=request.headers)
+    header_serializer.is_valid(raise_exception=True)
+    return header_serializer.data["Authentication"]
 
 
 def firebase_auth(func):
@@ -36,13 +42,43 @@ def user_auth(func):
         header_serializer = AuthHeaderRequest(data=request.headers)
         header_serializer.is_valid(raise_exception=True)
         token = header_serializer.data["Authentication"]
-        user = auth_service.get_user_from_token(token)
-        cred = ObjectMapperUtil.map(user, UserDomain)
+        user: UserDomain = auth_service.get_user_from_token(token)
+        if not user:
+            raise UnauthorizedError(
+                message="User with current token is not found", code=403
+            )
+
+        return func(*args, user, **kwargs)
+
+    return wrapper
+
+
+def async_firebase_auth(func):
+    @wraps(func)
+    async def wrapper(request, *args, **kwargs):
+        """
+        Decorator for async views to get auth request
+        """
+        token = _get_auth_token(request)
+        user = await async_auth_service.decode_token(token)
+        return await func(request, user, *args, **kwargs)
+
+    return wrapper
+
+
+def async_user_auth(func):
+    @wraps(func)
+    async def wrapper(request, *args, **kwargs):
+        """
+        Decorator for async views to get auth request
+        """
+        token = _get_auth_token(request)
+        user: UserDomain = await async_auth_service.get_user_from_token(token)
         if not user:
             raise UnauthorizedError(
                 message="User with current token is not found", code=403
             )
 
-        return func(*args, cred, **kwargs)
+        return await func(request, user, *args, **kwargs)
 
     return wrapper
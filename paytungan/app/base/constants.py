@@ -1,5 +1,6 @@
 from enum import Enum
 import os
+import tempfile
 
 
 DEFAULT_LOGGER = "paytungan-backend"
@@ -9,9 +10,60 @@ SERVICE_ACCOUNT_FILE = (
 )
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 FIREBASE_PROJECT_ID = "paytungan"
+FIREBASE_TOKEN_CACHE_MAX_SIZE = int(os.getenv("FIREBASE_TOKEN_CACHE_MAX_SIZE", "1024"))
+
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "local")
+USER_CACHE_ALIAS = os.getenv("USER_CACHE_ALIAS", "default")
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "4096"))
 
 XENDIT_API_KEY = os.getenv("XENDIT_API_KEY")
+XENDIT_BASE_URL = os.getenv("XENDIT_BASE_URL", "https://api.xendit.co/")
+XENDIT_MAX_WORKERS = int(os.getenv("XENDIT_MAX_WORKERS", "8"))
+XENDIT_HTTP_POOL_SIZE = int(os.getenv("XENDIT_HTTP_POOL_SIZE", str(XENDIT_MAX_WORKERS)))
+XENDIT_HTTP_CONNECT_TIMEOUT = float(os.getenv("XENDIT_HTTP_CONNECT_TIMEOUT", "3.05"))
+XENDIT_HTTP_READ_TIMEOUT = float(os.getenv("XENDIT_HTTP_READ_TIMEOUT", "15"))
+XENDIT_HTTP_MAX_RETRIES = int(os.getenv("XENDIT_HTTP_MAX_RETRIES", "2"))
+XENDIT_HTTP_BACKOFF_FACTOR = float(os.getenv("XENDIT_HTTP_BACKOFF_FACTOR", "0.2"))
+XENDIT_INVOICE_CACHE_MAX_SIZE = int(os.getenv("XENDIT_INVOICE_CACHE_MAX_SIZE", "2048"))
+# Pending invoices may be paid at any time, final ones never change again
+XENDIT_INVOICE_CACHE_TTL = int(os.getenv("XENDIT_INVOICE_CACHE_TTL", "60"))
+XENDIT_INVOICE_FINAL_CACHE_TTL = int(
+    os.getenv("XENDIT_INVOICE_FINAL_CACHE_TTL", "3600")
+)
+# Verification token of the callbacks, callbacks are rejected while it is unset
+XENDIT_CALLBACK_TOKEN = os.getenv("XENDIT_CALLBACK_TOKEN")
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL")
+PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", "50"))
+PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", "200"))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "500"))
+SPLIT_BILL_BATCH_MAX_SIZE = int(os.getenv("SPLIT_BILL_BATCH_MAX_SIZE", "500"))
+# Defer Xendit invoice and payout creation to the job worker (manage.py run_jobs)
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "false").lower() == "true"
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_FACTOR = float(os.getenv("JOB_BACKOFF_FACTOR", "2"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "300"))
+# Running jobs locked longer than this are taken over, e.g. after a worker crash
+JOB_LOCK_TIMEOUT = int(os.getenv("JOB_LOCK_TIMEOUT", "300"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# Shared by the worker processes for /metrics, values are per process when unset
+METRICS_DIR = os.getenv("METRICS_DIR")
+# Log records waiting for the background log thread, more are dropped
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "10000"))
+# Request payload logged with every record, longer ones are truncated
+LOG_PAYLOAD_MAX_SIZE = int(os.getenv("LOG_PAYLOAD_MAX_SIZE", "2048"))
+# Request profiling (ProfilingMiddleware), requests are profiled when sampled or
+# when they carry a header signed with PROFILING_SECRET (manage.py profiles sign)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_SECRET = os.getenv("PROFILING_SECRET")
+PROFILING_SIGNATURE_MAX_AGE = int(os.getenv("PROFILING_SIGNATURE_MAX_AGE", "3600"))
+PROFILING_DIR = os.getenv(
+    "PROFILING_DIR", os.path.join(tempfile.gettempdir(), "paytungan-profiles")
+)
+# No more profiles are taken once the directory holds this many
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "1000"))
 
 DB_CONFIG = "DB_CONFIG"
 FIREBASE_PRIVATE_KEY_ID = "FIREBASE_PRIVATE_KEY_ID"
@@ -25,6 +77,11 @@ class Environment(Enum):
     TEST = "test"
 
 
+class CacheBackend(Enum):
+    LOCAL = "local"
+    DJANGO = "django"
+
+
 class WithdrawalMethod(Enum):
     GOPAY = "GOPAY"
     OVO = "OVO"
@@ -43,3 +100,33 @@ class PaymentStatus(Enum):
     PAID = "PAID"
     EXPIRED = "EXPIRED"
     FAILED = "FAILED"
+
+
+class InvoiceStatus(Enum):
+    PENDING = "PENDING"
+    PAID = "PAID"
+    SETTLED = "SETTLED"
+    EXPIRED = "EXPIRED"
+
+
+class XenditCallbackType(Enum):
+    INVOICE = "INVOICE"
+    PAYOUT = "PAYOUT"
+
+
+class PaymentInvoiceStatus(Enum):
+    QUEUED = "QUEUED"
+    CREATED = "CREATED"
+    FAILED = "FAILED"
+
+
+class JobType(Enum):
+    CREATE_INVOICE = "CREATE_INVOICE"
+    CREATE_PAYOUT = "CREATE_PAYOUT"
+
+
+class JobStatus(Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
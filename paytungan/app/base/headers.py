@@ -16,5 +16,21 @@ x_request_id = openapi.Parameter(
     type=openapi.TYPE_STRING,
 )
 
+x_callback_token = openapi.Parameter(
+    "x-callback-token",
+    openapi.IN_HEADER,
+    description="Xendit callback verification token",
+    type=openapi.TYPE_STRING,
+    required=True,
+)
+
+webhook_id = openapi.Parameter(
+    "webhook-id",
+    openapi.IN_HEADER,
+    description="Xendit callback event id",
+    type=openapi.TYPE_STRING,
+)
+
 DEFAULT_HEADERS = [x_request_id]
 AUTH_HEADERS = DEFAULT_HEADERS + [token_header]
+XENDIT_CALLBACK_HEADERS = DEFAULT_HEADERS + [x_callback_token, webhook_id]
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from paytungan.app.base.constants import PAGINATION_DEFAULT_LIMIT, PAGINATION_MAX_LIMIT
+
 
 class BaseHeaderRequest(serializers.Serializer):
     x_request_id = serializers.CharField(required=False)
@@ -7,3 +9,10 @@ class BaseHeaderRequest(serializers.Serializer):
 
 class AuthHeaderRequest(BaseHeaderRequest):
     Authentication = serializers.CharField()
+
+
+class CursorPaginationRequest(serializers.Serializer):
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=PAGINATION_MAX_LIMIT, default=PAGINATION_DEFAULT_LIMIT
+    )
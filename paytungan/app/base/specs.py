@@ -1,5 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Tuple
+
+from django.db.models import QuerySet
 
 
 @dataclass
@@ -7,3 +10,20 @@ class BaseDomain:
     id: int
     updated_at: datetime
     created_at: datetime
+
+
+@dataclass(frozen=True)
+class EagerLoadingPlan:
+    """Relations a response serializer reads, loaded together with the queryset."""
+
+    select_related: Tuple[str, ...] = ()
+    prefetch_related: Tuple[str, ...] = ()
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+
+        return queryset
@@ -1,9 +1,13 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.db import connection
 from rest_framework import viewsets
 from rest_framework.decorators import permission_classes
 from rest_framework.permissions import AllowAny
 
+from paytungan.app.common.metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
 
 @permission_classes([AllowAny])
 class HealthCheckViewSet(viewsets.ViewSet):
@@ -14,3 +18,9 @@ class HealthCheckViewSet(viewsets.ViewSet):
             return JsonResponse({"message": "OK"}, status=200)
         except Exception as ex:
             return JsonResponse({"error": str(ex)}, status=500)
+
+
+@permission_classes([AllowAny])
+class MetricsViewSet(viewsets.ViewSet):
+    def list(self, request):
+        return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+from paytungan.app.common.metrics import CACHE_REQUESTS
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache(Generic[T]):
+    """
+    Thread-safe in-process cache with LRU eviction where every entry carries
+    its own expiry time (epoch seconds). Expired entries are dropped lazily on read.
+    Lookups of a named cache are counted in the cache_requests_total metric.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        default_ttl: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.name = name
+        self._entries: "OrderedDict[Hashable, Tuple[T, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[T]:
+        value = self._get(key)
+        if self.name:
+            CACHE_REQUESTS.inc(
+                cache=self.name, result="miss" if value is None else "hit"
+            )
+
+        return value
+
+    def _get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: T,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """
+        Store value until `expires_at` (epoch seconds) or for `ttl` seconds,
+        whichever comes first. Without both, `default_ttl` is used.
+        """
+        now = time.time()
+        if ttl is None and expires_at is None:
+            ttl = self.default_ttl
+        if ttl is not None:
+            ttl_expires_at = now + ttl
+            expires_at = (
+                ttl_expires_at
+                if expires_at is None
+                else min(expires_at, ttl_expires_at)
+            )
+
+        if expires_at is not None and expires_at <= now:
+            self.delete(key)
+            return
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                max_size=self.max_size,
+            )
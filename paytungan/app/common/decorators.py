@@ -1,13 +1,38 @@
 from functools import wraps
+from typing import List
+
+from django.http import HttpRequest, HttpResponse, HttpResponseNotAllowed
 from rest_framework.exceptions import ValidationError
 
+from paytungan.app.common.exception_handlers import paytungan_exception_handler
 from paytungan.app.common.exceptions import (
     BaseException,
-    NotFoundException,
-    UnauthorizedError,
     ValidationErrorException,
     OurValidationError,
 )
+from paytungan.app.common.responses import JSONResponse
+
+
+def convert_exception(error: Exception) -> Exception:
+    """
+    Convert core domain exceptions into the DRF exception the API responds with,
+    other exceptions are returned as is.
+    """
+    if isinstance(error, OurValidationError):
+        return error
+
+    if isinstance(error, ValidationErrorException):
+        return OurValidationError(
+            message=error.message, detail=error.field_errors, code=error.code
+        )
+
+    if isinstance(error, ValidationError):
+        return OurValidationError(detail=error.detail)
+
+    if isinstance(error, BaseException):
+        return OurValidationError(message=error.message, detail={}, code=error.code)
+
+    return error
 
 
 def api_exception(function):
@@ -25,21 +50,44 @@ def api_exception(function):
 
         try:
             return function(*args, **kwargs)
-        except OurValidationError as error:
-            raise error
-        except ValidationErrorException as error:
-            raise OurValidationError(
-                message=error.message, detail=error.field_errors, code=error.code
-            )
-        except NotFoundException as error:
-            raise OurValidationError(message=error.message, detail={}, code=error.code)
-        except ValidationError as error:
-            raise OurValidationError(detail=error.detail)
-        except UnauthorizedError as error:
-            raise OurValidationError(message=error.message, detail={}, code=error.code)
-        except BaseException as error:
-            raise OurValidationError(message=error.message, code=error.code, detail={})
         except Exception as error:
-            raise error
+            converted_error = convert_exception(error)
+            if converted_error is error:
+                raise
+
+            raise converted_error
 
     return wrapper
+
+
+def async_api_view(methods: List[str]):
+    """
+    Decorator for async Django views that respond like the DRF views: only `methods`
+    are allowed, and exceptions are converted like api_exception does then rendered
+    by paytungan_exception_handler.
+    """
+    allowed_methods = [method.upper() for method in methods]
+
+    def decorator(function):
+        @wraps(function)
+        async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if request.method not in allowed_methods:
+                return HttpResponseNotAllowed(allowed_methods)
+
+            try:
+                return await function(request, *args, **kwargs)
+            except Exception as error:
+                converted_error = convert_exception(error)
+                response = paytungan_exception_handler(
+                    converted_error, {"request": request}
+                )
+                if response is None:
+                    raise
+
+                return JSONResponse(response.data, status=response.status_code)
+
+        # Authentication is done with the token header, there is no session to protect
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
@@ -0,0 +1,262 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+@dataclass
+class ConnectionPoolStats:
+    host: str
+    num_connections: int
+    num_requests: int
+    idle_connections: int
+
+
+@dataclass
+class HttpClientStats:
+    requests: int
+    retries: int
+    errors: int
+    pools: List[ConnectionPoolStats] = field(default_factory=list)
+
+
+class PooledHttpClient:
+    """
+    HTTP client on top of a shared requests.Session, so connections are kept alive
+    and reused across calls. Every call gets a default timeout, and idempotent
+    methods are retried with jittered exponential backoff on connection errors,
+    timeouts and retryable status codes.
+
+    It satisfies xendit's HTTPClientInterface and can be passed as `http_client`.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: Tuple[float, float] = (3.05, 15),
+        max_retries: int = 2,
+        backoff_factor: float = 0.2,
+        backoff_max: float = 2.0,
+    ) -> None:
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session = requests.Session()
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._errors = 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        attempts = 1
+        if method.upper() in self.IDEMPOTENT_METHODS:
+            attempts += self.max_retries
+
+        for attempt in range(attempts):
+            is_last_attempt = attempt == attempts - 1
+            self._increment("_requests")
+
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._increment("_errors")
+                if is_last_attempt:
+                    raise
+
+                self._wait_before_retry(attempt)
+                continue
+
+            if response.status_code in self.RETRY_STATUS_CODES and not is_last_attempt:
+                response.close()
+                self._wait_before_retry(attempt)
+                continue
+
+            return response
+
+    def get_stats(self) -> HttpClientStats:
+        pools = []
+        pool_manager = self._adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+
+            pools.append(
+                ConnectionPoolStats(
+                    host=f"{pool.scheme}://{pool.host}:{pool.port}",
+                    num_connections=pool.num_connections,
+                    num_requests=pool.num_requests,
+                    idle_connections=self._count_idle_connections(pool),
+                )
+            )
+
+        with self._lock:
+            return HttpClientStats(
+                requests=self._requests,
+                retries=self._retries,
+                errors=self._errors,
+                pools=pools,
+            )
+
+    @staticmethod
+    def _count_idle_connections(pool) -> int:
+        # urllib3 pre-fills its queue with None placeholders for unopened slots
+        if not pool.pool:
+            return 0
+
+        return sum(1 for connection in list(pool.pool.queue) if connection)
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _wait_before_retry(self, attempt: int) -> None:
+        self._increment("_retries")
+        # Full jitter keeps retrying workers from hitting the API in lockstep
+        backoff = min(self.backoff_max, self.backoff_factor * (2**attempt))
+        time.sleep(random.uniform(0, backoff))
+
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class AsyncPooledHttpClient:
+    """
+    Async counterpart of PooledHttpClient on top of httpx.AsyncClient, with the same
+    timeouts and retry policy. Waiting on the network does not hold a thread, so one
+    event loop can have up to `pool_size` requests in flight.
+
+    httpx clients are bound to the event loop they were first used on, so each loop
+    gets its own client. Clients are only referenced through their loop and are
+    dropped with it, e.g. the per-request loops of async views under WSGI.
+    """
+
+    IDEMPOTENT_METHODS = PooledHttpClient.IDEMPOTENT_METHODS
+    RETRY_STATUS_CODES = PooledHttpClient.RETRY_STATUS_CODES
+
+    def __init__(
+        self,
+        base_url: str = "",
+        auth: Optional[Tuple[str, str]] = None,
+        pool_size: int = 10,
+        timeout: Tuple[float, float] = (3.05, 15),
+        max_retries: int = 2,
+        backoff_factor: float = 0.2,
+        backoff_max: float = 2.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url
+        self.auth = auth
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self._transport = transport
+
+        # Event loop -> httpx.AsyncClient
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._errors = 0
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self._get_client()
+        attempts = 1
+        if method.upper() in self.IDEMPOTENT_METHODS:
+            attempts += self.max_retries
+
+        for attempt in range(attempts):
+            is_last_attempt = attempt == attempts - 1
+            self._increment("_requests")
+
+            try:
+                response = await client.request(method, url, **kwargs)
+            except (httpx.NetworkError, httpx.TimeoutException):
+                self._increment("_errors")
+                if is_last_attempt:
+                    raise
+
+                await self._wait_before_retry(attempt)
+                continue
+
+            if response.status_code in self.RETRY_STATUS_CODES and not is_last_attempt:
+                await response.aclose()
+                await self._wait_before_retry(attempt)
+                continue
+
+            return response
+
+    def get_stats(self) -> HttpClientStats:
+        with self._lock:
+            return HttpClientStats(
+                requests=self._requests,
+                retries=self._retries,
+                errors=self._errors,
+            )
+
+    async def close(self) -> None:
+        """
+        Close the client of the running loop, and schedule closing the clients of
+        the other loops that are still open on their own loop.
+        """
+        running_loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+
+        for loop, client in clients:
+            if loop is running_loop:
+                await client.aclose()
+            elif not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = self._create_client()
+                self._clients[loop] = client
+
+        return client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        connect_timeout, read_timeout = self.timeout
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=self.auth,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+            ),
+            transport=self._transport,
+        )
+
+    async def _wait_before_retry(self, attempt: int) -> None:
+        self._increment("_retries")
+        backoff = min(self.backoff_max, self.backoff_factor * (2**attempt))
+        await asyncio.sleep(random.uniform(0, backoff))
+
+    def _increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
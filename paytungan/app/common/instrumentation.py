@@ -0,0 +1,139 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from paytungan.app.common.metrics import EXTERNAL_CALL_LATENCY
+
+
+@dataclass
+class ExternalCallMetrics:
+    count: int = 0
+    time: float = 0.0
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Performance numbers of a single request, collected by LoggingMiddleware.
+
+    Recording is thread safe, calls made from executor threads or sync_to_async
+    record into the same object as long as the context is propagated.
+    """
+
+    start: float = field(default_factory=time.perf_counter)
+    db_query_count: int = 0
+    db_time: float = 0.0
+    external_calls: Dict[str, ExternalCallMetrics] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_query(self, duration: float) -> None:
+        with self._lock:
+            self.db_query_count += 1
+            self.db_time += duration
+
+    def record_external_call(self, name: str, duration: float) -> None:
+        with self._lock:
+            metrics = self.external_calls.setdefault(name, ExternalCallMetrics())
+            metrics.count += 1
+            metrics.time += duration
+
+    def get_elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def to_log_fields(self, response_size: Optional[int] = None) -> dict:
+        with self._lock:
+            external_calls = {
+                name: {"count": metrics.count, "time_ms": _to_ms(metrics.time)}
+                for name, metrics in self.external_calls.items()
+            }
+            return {
+                "duration_ms": _to_ms(self.get_elapsed()),
+                "db_query_count": self.db_query_count,
+                "db_time_ms": _to_ms(self.db_time),
+                "external_call_count": sum(
+                    metrics.count for metrics in self.external_calls.values()
+                ),
+                "external_time_ms": _to_ms(
+                    sum(metrics.time for metrics in self.external_calls.values())
+                ),
+                "external_calls": external_calls,
+                "response_size": response_size,
+            }
+
+    def to_server_timing(self) -> str:
+        with self._lock:
+            entries = [
+                f"total;dur={_to_ms(self.get_elapsed())}",
+                f'db;dur={_to_ms(self.db_time)};desc="{self.db_query_count} queries"',
+            ]
+            for name, metrics in self.external_calls.items():
+                entries.append(
+                    f'{name};dur={_to_ms(metrics.time)};desc="{metrics.count} calls"'
+                )
+
+        return ", ".join(entries)
+
+
+request_metrics_var: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "request_metrics", default=None
+)
+
+
+@contextmanager
+def external_call(name: str) -> Iterator[None]:
+    """
+    Time a call to an external service, into the latency histogram and, during a
+    request, into its metrics.
+    """
+    metrics = request_metrics_var.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        EXTERNAL_CALL_LATENCY.observe(duration, service=name)
+        if metrics is not None:
+            metrics.record_external_call(name, duration)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing every query run during a request."""
+    metrics = request_metrics_var.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(time.perf_counter() - start)
+
+
+def install_query_recorder(connection) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorders() -> None:
+    """Install the recorder on the connections of the current thread."""
+    for connection in connections.all():
+        install_query_recorder(connection)
+
+
+def _on_connection_created(sender, connection, **kwargs) -> None:
+    install_query_recorder(connection)
+
+
+# Connections are per thread, this covers the ones opened by sync_to_async and
+# executor threads
+connection_created.connect(_on_connection_created)
+
+
+def _to_ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
@@ -0,0 +1,361 @@
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from paytungan.app.base.constants import METRICS_DIR
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Sample key: JSON of [sample name, [[label name, label value], ...]]
+SampleKey = str
+
+
+class _MmapValues:
+    """
+    Values of one process, in a file of the metrics directory that the other
+    processes read when rendering.
+
+    Layout: a header with the used size (u32, padded to 8 bytes), then entries of
+    key length (u32), key, padding to 8 bytes and the value (f64). Values are 8 byte
+    aligned so readers never see a torn value.
+    """
+
+    INITIAL_SIZE = 1 << 16
+    HEADER_SIZE = 8
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = self.HEADER_SIZE
+        self._positions = {}
+        for key, _, position in self._read_entries(self._mmap):
+            self._positions[key] = position
+            self._used = position + 8
+
+    def inc(self, key: SampleKey, amount: float) -> None:
+        position = self._positions.get(key)
+        if position is None:
+            position = self._add_entry(key)
+
+        value = struct.unpack_from("d", self._mmap, position)[0]
+        struct.pack_into("d", self._mmap, position, value + amount)
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    @classmethod
+    def read_file(cls, path: str) -> Iterator[Tuple[SampleKey, float]]:
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < cls.HEADER_SIZE:
+                return
+
+            with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as data:
+                for key, value, _ in cls._read_entries(data):
+                    yield key, value
+
+    @classmethod
+    def _read_entries(cls, data) -> Iterator[Tuple[SampleKey, float, int]]:
+        """
+        Entries up to the used size, stopping at the first one that is empty or
+        doesn't fit, e.g. in a truncated file or one with a corrupt header.
+        """
+        used = min(struct.unpack_from("I", data, 0)[0], len(data))
+        position = cls.HEADER_SIZE
+        while position + 4 <= used:
+            key_length = struct.unpack_from("I", data, position)[0]
+            key_start = position + 4
+            value_position = cls._align(key_start + key_length)
+            if not key_length or value_position + 8 > used:
+                return
+
+            key = data[key_start : key_start + key_length].decode()
+            yield key, struct.unpack_from("d", data, value_position)[0], value_position
+            position = value_position + 8
+
+    def _add_entry(self, key: SampleKey) -> int:
+        encoded_key = key.encode()
+        value_position = self._align(self._used + 4 + len(encoded_key))
+        entry_end = value_position + 8
+        while entry_end > self._capacity:
+            self._grow()
+
+        struct.pack_into("I", self._mmap, self._used, len(encoded_key))
+        self._mmap[self._used + 4 : self._used + 4 + len(encoded_key)] = encoded_key
+        struct.pack_into("d", self._mmap, value_position, 0.0)
+        # Publish the entry only once it is complete
+        struct.pack_into("I", self._mmap, 0, entry_end)
+        self._used = entry_end
+        self._positions[key] = value_position
+        return value_position
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        self._mmap.close()
+        self._file.truncate(self._capacity)
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+
+    @staticmethod
+    def _align(position: int) -> int:
+        return position + (-position % 8)
+
+
+class MetricsRegistry:
+    """
+    Counters and fixed bucket histograms rendered in the Prometheus text format.
+
+    Without a directory values are kept in memory, so only the current process is
+    reported. With one, every process writes its values to its own mmap'd file there
+    and rendering sums the files of all processes, e.g. of every gunicorn worker.
+    The directory should be emptied before the server starts.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+        self._values: Dict[SampleKey, float] = defaultdict(float)
+        self._mmap_values: Optional[_MmapValues] = None
+        self._pid: Optional[int] = None
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> "Counter":
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> "Histogram":
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def inc(self, key: SampleKey, amount: float) -> None:
+        with self._lock:
+            if self.directory is None:
+                self._values[key] += amount
+                return
+
+            self._get_mmap_values().inc(key, amount)
+
+    def collect(self) -> Dict[SampleKey, float]:
+        if self.directory is None:
+            with self._lock:
+                return dict(self._values)
+
+        values: Dict[SampleKey, float] = defaultdict(float)
+        for path in glob.glob(os.path.join(self.directory, "metrics_*.db")):
+            for key, value in _MmapValues.read_file(path):
+                values[key] += value
+
+        return values
+
+    def render(self) -> str:
+        samples: Dict[
+            str, List[Tuple[Tuple[Tuple[str, str], ...], float]]
+        ] = defaultdict(list)
+        for key, value in self.collect().items():
+            sample_name, labels = json.loads(key)
+            samples[sample_name].append((tuple(map(tuple, labels)), value))
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render(samples))
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: "_Metric") -> "_Metric":
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+
+            self._metrics[metric.name] = metric
+
+        return metric
+
+    def _get_mmap_values(self) -> _MmapValues:
+        # Files are per process, a forked worker must not write to its parent's
+        pid = os.getpid()
+        if self._pid != pid:
+            os.makedirs(self.directory, exist_ok=True)
+            self._mmap_values = _MmapValues(
+                os.path.join(self.directory, f"metrics_{pid}.db")
+            )
+            self._pid = pid
+
+        return self._mmap_values
+
+
+class _Metric:
+    type = ""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+    ) -> None:
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self, samples) -> List[str]:
+        raise NotImplementedError
+
+    def _get_key(
+        self, sample_name: str, labels: Dict[str, str], extra_labels=()
+    ) -> SampleKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        label_pairs = [[name, str(labels[name])] for name in self.labelnames]
+        label_pairs.extend([name, value] for name, value in extra_labels)
+        return json.dumps([sample_name, label_pairs], separators=(",", ":"))
+
+    @staticmethod
+    def _format_sample(name: str, labels, value: float) -> str:
+        if not labels:
+            return f"{name} {value}"
+
+        formatted_labels = ",".join(
+            f'{label}="{_escape_label_value(label_value)}"'
+            for label, label_value in labels
+        )
+        return f"{name}{{{formatted_labels}}} {value}"
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        self.registry.inc(self._get_key(self.name, labels), amount)
+
+    def render(self, samples) -> List[str]:
+        return [
+            self._format_sample(self.name, labels, value)
+            for labels, value in sorted(samples.get(self.name, []))
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float],
+    ) -> None:
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._bucket_labels = tuple(_format_bound(bound) for bound in self.buckets) + (
+            "+Inf",
+        )
+
+    def observe(self, value: float, **labels: str) -> None:
+        # Buckets are stored per bucket and made cumulative when rendered
+        bucket_label = self._bucket_labels[bisect.bisect_left(self.buckets, value)]
+        self.registry.inc(
+            self._get_key(f"{self.name}_bucket", labels, [("le", bucket_label)]), 1
+        )
+        self.registry.inc(self._get_key(f"{self.name}_sum", labels), value)
+        self.registry.inc(self._get_key(f"{self.name}_count", labels), 1)
+
+    def render(self, samples) -> List[str]:
+        buckets: Dict[tuple, Dict[str, float]] = defaultdict(dict)
+        for labels, value in samples.get(f"{self.name}_bucket", []):
+            buckets[labels[:-1]][labels[-1][1]] = value
+
+        sums = dict(samples.get(f"{self.name}_sum", []))
+        counts = dict(samples.get(f"{self.name}_count", []))
+        lines = []
+        for labels in sorted(buckets):
+            cumulative = 0.0
+            for bucket_label in self._bucket_labels:
+                cumulative += buckets[labels].get(bucket_label, 0.0)
+                lines.append(
+                    self._format_sample(
+                        f"{self.name}_bucket",
+                        labels + (("le", bucket_label),),
+                        cumulative,
+                    )
+                )
+
+            lines.append(
+                self._format_sample(f"{self.name}_sum", labels, sums.get(labels, 0.0))
+            )
+            lines.append(
+                self._format_sample(
+                    f"{self.name}_count", labels, counts.get(labels, 0.0)
+                )
+            )
+
+        return lines
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+registry = MetricsRegistry(METRICS_DIR)
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by view",
+    ["view", "method", "status"],
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "Database queries per request by view",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+EXTERNAL_CALL_LATENCY = registry.histogram(
+    "external_call_duration_seconds",
+    "Latency of calls to external services",
+    ["service"],
+)
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total",
+    "In-process cache lookups by result",
+    ["cache", "result"],
+)
+LOG_RECORDS_DROPPED = registry.counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+)
@@ -1,22 +1,67 @@
+import asyncio
+import cProfile
+import random
 import uuid
-import threading
 import logging
 import time
+from contextvars import ContextVar
+from typing import Optional, Tuple
+from django.core.exceptions import MiddlewareNotUsed
 from json_log_formatter import JSONFormatter
 
-from ..base.constants import DEFAULT_LOGGER
+from ..base.constants import (
+    DEFAULT_LOGGER,
+    LOG_PAYLOAD_MAX_SIZE,
+    PROFILING_DIR,
+    PROFILING_ENABLED,
+    PROFILING_MAX_PROFILES,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_SECRET,
+)
+from .instrumentation import (
+    RequestMetrics,
+    install_query_recorders,
+    request_metrics_var,
+)
+from .metrics import REQUEST_DB_QUERIES, REQUEST_LATENCY
+from .profiling import ProfileInfo, ProfileStore, is_profile_request_signed
 
-local = threading.local()
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Context variables instead of a thread local, so concurrent requests served by the
+# same thread under ASGI keep their own values. sync_to_async copies them to the
+# thread it runs on.
+request_id_var: ContextVar[str] = ContextVar("request_id", default="default")
+request_path_var: ContextVar[str] = ContextVar("request_path", default="default")
+request_payload_var: ContextVar[object] = ContextVar(
+    "request_payload", default="default"
+)
 REQUEST_HEADER = "x-request-id"
+SERVER_TIMING_HEADER = "Server-Timing"
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
 logger = logging.getLogger(DEFAULT_LOGGER)
 
 
 class LoggingMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         # One-time configuration and initialization.
+        # Mark the instance as a coroutine function so Django calls it without an
+        # adapter when the rest of the chain is async.
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
 
     def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
         # Code to be executed for each request before
         # the view (and later middleware) are called.
         self.process_request(request)
@@ -27,11 +72,18 @@ class LoggingMiddleware:
 
         return response
 
+    async def __acall__(self, request):
+        self.process_request(request)
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
     def process_request(self, request):
+        request_metrics_var.set(RequestMetrics())
+        install_query_recorders()
         request_id = self._get_request_id(request)
-        local.request_id = request_id
-        local.request_path = request.path
-        local.request_payload = self._get_request_payload(request)
+        request_id_var.set(request_id)
+        request_path_var.set(request.path)
+        request_payload_var.set(self._get_request_payload(request))
         request.id = request_id
 
     def get_log_message(self, request, response):
@@ -40,56 +92,186 @@ class LoggingMiddleware:
 
     def process_response(self, request, response):
         response[REQUEST_HEADER] = request.id
+        # Queries run while a streaming response is iterated are not counted
+        metrics = request_metrics_var.get()
+        if metrics:
+            response[SERVER_TIMING_HEADER] = metrics.to_server_timing()
+            self._observe_metrics(request, response, metrics)
 
         # Only log /api
-        if "/api" not in request.path:
-            return response
-
-        logger.info(self.get_log_message(request, response))
+        if "/api" in request.path and logger.isEnabledFor(logging.INFO):
+            logger.info(
+                self.get_log_message(request, response),
+                extra={
+                    "metrics": metrics.to_log_fields(self._get_response_size(response))
+                    if metrics
+                    else None
+                },
+            )
 
-        try:
-            del local.request_id
-            del local.request_path
-        except AttributeError:
-            pass
+        request_id_var.set("default")
+        request_path_var.set("default")
+        request_payload_var.set("default")
+        request_metrics_var.set(None)
 
         return response
 
+    @staticmethod
+    def _observe_metrics(request, response, metrics: RequestMetrics) -> None:
+        # Labelled by route name, not path, to keep the number of series bounded
+        resolver_match = getattr(request, "resolver_match", None)
+        view = resolver_match.view_name if resolver_match else "unmatched"
+        REQUEST_LATENCY.observe(
+            metrics.get_elapsed(),
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        REQUEST_DB_QUERIES.observe(metrics.db_query_count, view=view)
+
     def _get_request_id(self, request) -> str:
         return request.headers.get(REQUEST_HEADER, self._generate_id())
 
     def _generate_id(self) -> str:
         return uuid.uuid4().hex
 
-    def _get_request_payload(self, request):
+    @staticmethod
+    def _get_response_size(response) -> Optional[int]:
+        if response.streaming:
+            return None
+
+        return len(response.content)
+
+    def _get_request_payload(self, request) -> "RequestPayload":
         if request.method == "GET":
-            return request.GET
-        else:
-            return request.body
+            return RequestPayload(request.META.get("QUERY_STRING", ""))
+
+        # Read now, the view consumes the stream and the body can't be read after
+        return RequestPayload(request.body)
 
     @staticmethod
     def get_request_id() -> str:
-        return local.request_id
+        return request_id_var.get()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests with cProfile into PROFILING_DIR, see `manage.py profiles`.
+    A request is profiled when it carries a PROFILE_HEADER signed for its path or
+    is sampled at PROFILING_SAMPLE_RATE.
+
+    Unless PROFILING_ENABLED is set with a sample rate or a secret, the middleware
+    removes itself from the chain at startup and costs nothing.
+    """
+
+    def __init__(self, get_response):
+        if not PROFILING_ENABLED or not (PROFILING_SAMPLE_RATE > 0 or PROFILING_SECRET):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.store = ProfileStore(PROFILING_DIR)
+
+    def __call__(self, request):
+        trigger = self._get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        duration = time.perf_counter() - start
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        resolver_match = getattr(request, "resolver_match", None)
+        self.store.save(
+            profiler,
+            ProfileInfo(
+                id=profile_id,
+                method=request.method,
+                path=request.path,
+                view=resolver_match.view_name if resolver_match else "unmatched",
+                status=response.status_code,
+                duration_ms=round(duration * 1000, 2),
+                created_at=time.time(),
+                trigger=trigger,
+            ),
+        )
+        response[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    def _get_trigger(self, request) -> Optional[str]:
+        signature = request.headers.get(PROFILE_HEADER)
+        if signature and is_profile_request_signed(signature, request.path):
+            trigger = "header"
+        elif PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE:
+            trigger = "sample"
+        else:
+            return None
+
+        # Keep the directory bounded
+        if self.store.count() >= PROFILING_MAX_PROFILES:
+            return None
+
+        return trigger
+
+
+class RequestPayload:
+    """
+    Request payload of log records, decoded and truncated to LOG_PAYLOAD_MAX_SIZE
+    characters the first time a record is formatted.
+    """
+
+    def __init__(self, payload, max_size: int = LOG_PAYLOAD_MAX_SIZE) -> None:
+        self._payload = payload
+        self._max_size = max_size
+        self._rendered: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._rendered is None:
+            self._rendered = self._render()
+
+        return self._rendered
+
+    def _render(self) -> str:
+        payload = self._payload[: self._max_size]
+        if isinstance(payload, bytes):
+            payload = payload.decode(errors="replace")
+
+        if len(self._payload) <= self._max_size:
+            return payload
+
+        return f"{payload}...(truncated, {len(self._payload)} total)"
 
 
 class RequestIDFilter(logging.Filter):
     def filter(self, record: logging.LogRecord):
-        record.request_id = getattr(local, "request_id", "default")
-        record.request_path = getattr(local, "request_path", "default")
-        record.request_payload = getattr(local, "request_payload", "default")
+        record.request_id = request_id_var.get()
+        record.request_path = request_path_var.get()
+        record.request_payload = request_payload_var.get()
         return True
 
 
 class JSONFormatter(JSONFormatter):
+    """
+    JSON formatter of the app logs. Encodes with orjson when it is installed, and
+    formats the time once per second instead of once per record.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._time_cache: Tuple[int, str] = (-1, "")
+
     def json_record(self, message: str, extra: dict, record: logging.LogRecord) -> dict:
         extra["name"] = record.name
         extra["level"] = record.levelname
         extra["request_id"] = record.request_id
         extra["request_path"] = record.request_path
-        extra["request_payload"] = record.request_payload
-        extra["time"] = time.strftime(
-            "%Y-%m-%d %H:%M:%S%z", time.localtime(record.created)
-        )
+        extra["request_payload"] = str(record.request_payload)
+        extra["time"] = self._format_time(record.created)
         extra["epoch_time"] = record.created
         extra["at"] = f"{record.module}.{record.funcName}:{record.lineno}"
         extra["message"] = message
@@ -98,3 +280,32 @@ class JSONFormatter(JSONFormatter):
             extra["exc_info"] = self.formatException(record.exc_info)
 
         return extra
+
+    def to_json(self, record: dict) -> str:
+        if orjson is None:
+            return super().to_json(record)
+
+        try:
+            return orjson.dumps(
+                record, default=_json_default, option=orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            return super().to_json(record)
+
+    def _format_time(self, created: float) -> str:
+        # The format has a resolution of a second
+        second = int(created)
+        cached_second, formatted = self._time_cache
+        if cached_second != second:
+            formatted = time.strftime("%Y-%m-%d %H:%M:%S%z", time.localtime(second))
+            self._time_cache = (second, formatted)
+
+        return formatted
+
+
+def _json_default(obj):
+    # Same fallback as json_log_formatter's
+    try:
+        return obj.__dict__
+    except AttributeError:
+        return str(obj)
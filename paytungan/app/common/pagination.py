@@ -0,0 +1,112 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from django.db.models import Model, Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+from paytungan.app.base.constants import PAGINATION_MAX_LIMIT
+from paytungan.app.common.exceptions import ValidationErrorException
+
+T = TypeVar("T")
+
+
+@dataclass
+class CursorPage(Generic[T]):
+    results: List[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+class KeysetPagination:
+    """
+    Keyset pagination on (created_at, id), newest first. Each page is fetched with a
+    range condition on the index columns instead of an OFFSET, so its cost does not
+    grow with the position in the history. Cursors are opaque to clients.
+
+    `prefix` points the keyset at a related model, e.g. "split_bill__" to page bills
+    by the creation of their split bill.
+    """
+
+    def __init__(self, prefix: str = "") -> None:
+        self.created_at_field = f"{prefix}created_at"
+        self.id_field = f"{prefix}id"
+
+    def apply(self, queryset: QuerySet, cursor: Optional[str], limit: int) -> QuerySet:
+        queryset = queryset.order_by(f"-{self.created_at_field}", f"-{self.id_field}")
+        if cursor:
+            created_at, id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f"{self.created_at_field}__lt": created_at})
+                | Q(
+                    **{
+                        self.created_at_field: created_at,
+                        f"{self.id_field}__lt": id,
+                    }
+                )
+            )
+
+        # One extra row tells whether there is a next page
+        return queryset[: self.get_limit(limit) + 1]
+
+    def build_page(
+        self,
+        rows: Iterable[T],
+        limit: int,
+        get_model: Callable[[T], Model] = lambda row: row,
+    ) -> CursorPage[T]:
+        limit = self.get_limit(limit)
+        page = CursorPage()
+        for row in rows:
+            if len(page.results) == limit:
+                last_model = get_model(page.results[-1])
+                page.next_cursor = self.encode_cursor(
+                    last_model.created_at, last_model.id
+                )
+                break
+
+            page.results.append(row)
+
+        return page
+
+    def iterate(self, queryset: QuerySet, chunk_size: int) -> Iterator[Model]:
+        """
+        Iterate the whole queryset one page (of at most PAGINATION_MAX_LIMIT rows) at
+        a time. Unlike QuerySet.iterator(), prefetch_related lookups are still applied
+        to every page.
+        """
+        cursor = None
+        while True:
+            page = self.build_page(self.apply(queryset, cursor, chunk_size), chunk_size)
+            yield from page.results
+            if not page.next_cursor:
+                return
+
+            cursor = page.next_cursor
+
+    @staticmethod
+    def get_limit(limit: int) -> int:
+        return max(1, min(limit, PAGINATION_MAX_LIMIT))
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, id: int) -> str:
+        value = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            created_at, id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            created_at = parse_datetime(created_at)
+        except (binascii.Error, ValueError, TypeError):
+            created_at, id = None, None
+
+        if created_at is None or not isinstance(id, int):
+            raise ValidationErrorException(
+                "Invalid cursor", field_errors={"cursor": ["Invalid cursor."]}
+            )
+
+        return created_at, id
@@ -0,0 +1,95 @@
+import cProfile
+import json
+import os
+import pstats
+from dataclasses import asdict, dataclass
+from typing import Iterable, List, Optional
+
+from django.core import signing
+
+from paytungan.app.base.constants import PROFILING_SECRET, PROFILING_SIGNATURE_MAX_AGE
+
+PROFILE_SIGNING_SALT = "paytungan.profiling"
+
+
+@dataclass
+class ProfileInfo:
+    id: str
+    method: str
+    path: str
+    view: str
+    status: int
+    duration_ms: float
+    created_at: float
+    trigger: str
+
+
+class ProfileStore:
+    """
+    Profiles in a local directory, as a pstats file (<id>.prof) next to a JSON
+    file with the request it profiled (<id>.json).
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def save(self, profiler: cProfile.Profile, info: ProfileInfo) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self.get_stats_path(info.id))
+        # The JSON file is written last, listing only sees complete profiles
+        with open(self._get_info_path(info.id), "w") as file:
+            json.dump(asdict(info), file)
+
+    def list(self) -> List[ProfileInfo]:
+        profiles = []
+        for name in self._get_info_names():
+            with open(os.path.join(self.directory, name)) as file:
+                profiles.append(ProfileInfo(**json.load(file)))
+
+        return sorted(profiles, key=lambda profile: profile.created_at)
+
+    def count(self) -> int:
+        return len(self._get_info_names())
+
+    def aggregate(self, profiles: Iterable[ProfileInfo]) -> Optional[pstats.Stats]:
+        stats = None
+        for profile in profiles:
+            path = self.get_stats_path(profile.id)
+            if stats is None:
+                stats = pstats.Stats(path)
+            else:
+                stats.add(path)
+
+        return stats
+
+    def get_stats_path(self, id: str) -> str:
+        return os.path.join(self.directory, f"{id}.prof")
+
+    def _get_info_path(self, id: str) -> str:
+        return os.path.join(self.directory, f"{id}.json")
+
+    def _get_info_names(self) -> List[str]:
+        try:
+            return [
+                name for name in os.listdir(self.directory) if name.endswith(".json")
+            ]
+        except FileNotFoundError:
+            return []
+
+
+def sign_profile_request(path: str) -> str:
+    """Value of the profiling header that profiles requests to `path`."""
+    return signing.TimestampSigner(
+        key=PROFILING_SECRET, salt=PROFILE_SIGNING_SALT
+    ).sign(path)
+
+
+def is_profile_request_signed(value: str, path: str) -> bool:
+    if not PROFILING_SECRET:
+        return False
+
+    signer = signing.TimestampSigner(key=PROFILING_SECRET, salt=PROFILE_SIGNING_SALT)
+    try:
+        return signer.unsign(value, max_age=PROFILING_SIGNATURE_MAX_AGE) == path
+    except signing.BadSignature:
+        return False
@@ -1,5 +1,9 @@
 from dataclasses import asdict, dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import BaseSerializer
 
 ValidationErrorType = Dict[str, List[str]]
 ResponseJson = Dict[str, any]
@@ -30,3 +34,54 @@ class ErrorResponse:
     @property
     def error(self) -> ResponseJson:
         return asdict(self)
+
+
+class JSONResponse(HttpResponse):
+    """
+    Response rendered with DRF's JSONRenderer, for plain Django views that return the
+    same payloads as the DRF views, e.g. async views.
+    """
+
+    def __init__(self, data: Any, **kwargs) -> None:
+        super().__init__(
+            JSONRenderer().render(data), content_type="application/json", **kwargs
+        )
+
+
+class StreamingJSONListResponse(StreamingHttpResponse):
+    """
+    Writes {"data": [...], "next_cursor": null} while `items` is being iterated,
+    serializing one row at a time, so memory stays flat however many rows there are.
+    Rows are rendered like DRF's JSONRenderer renders the non-streaming response.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Any],
+        serializer: BaseSerializer,
+        rows_per_chunk: int = 100,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            self._render(items, serializer, rows_per_chunk),
+            content_type="application/json",
+            **kwargs,
+        )
+
+    @staticmethod
+    def _render(
+        items: Iterable[Any], serializer: BaseSerializer, rows_per_chunk: int
+    ) -> Iterator[bytes]:
+        renderer = JSONRenderer()
+        chunk = [b'{"data":[']
+        separator = b""
+        for item in items:
+            chunk.append(separator)
+            chunk.append(renderer.render(serializer.to_representation(item)))
+            separator = b","
+            if len(chunk) >= rows_per_chunk * 2:
+                yield b"".join(chunk)
+                chunk = []
+
+        chunk.append(b'],"next_cursor":null}')
+        yield b"".join(chunk)
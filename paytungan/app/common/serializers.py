@@ -0,0 +1,153 @@
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.db import models
+from rest_framework import fields, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+_MISSING = object()
+
+# How a step converts a value: with a builtin, with the compiled steps of a nested
+# serializer (or of the child of a list of them), or with the field itself
+_BUILTIN = 0
+_NESTED = 1
+_NESTED_LIST = 2
+_FIELD = 3
+
+# (field_name, attribute name or None, converter kind, builtin or nested steps).
+# Fields read through a single attribute or key get it directly, the others always
+# use the field's get_attribute. Steps only hold names and plain callables, the
+# fields themselves are looked up on the serializer of each call.
+_Step = Tuple[str, Optional[str], int, Any]
+
+# Field types whose to_representation is a plain builtin call
+_BUILTIN_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    fields.CharField: str,
+    fields.IntegerField: int,
+}
+
+
+class _ReadOnlySerializerCompiler:
+    """
+    Compiles the to_representation of a ReadOnlySerializer class into a list of
+    steps, built once per class from its fields.
+
+    Plain attribute or key reads and builtin conversions skip DRF's generic
+    machinery. Anything else (callables, missing attributes with defaults, related
+    fields) falls back to the field's own get_attribute/to_representation, so the
+    output is the same as Serializer.to_representation.
+    """
+
+    _steps: Dict[type, List[_Step]] = {}
+
+    @classmethod
+    def get_steps(cls, serializer: serializers.Serializer) -> List[_Step]:
+        serializer_class = type(serializer)
+        try:
+            return cls._steps[serializer_class]
+        except KeyError:
+            pass
+
+        steps = [
+            (field.field_name, cls._get_attr(field), *cls._get_converter(field))
+            for field in serializer._readable_fields
+        ]
+        cls._steps[serializer_class] = steps
+        return steps
+
+    @classmethod
+    def to_representation(
+        cls,
+        steps: List[_Step],
+        instance: Any,
+        serializer: serializers.Serializer,
+    ) -> Dict[str, Any]:
+        ret = {}
+        is_mapping = isinstance(instance, Mapping)
+        bound_fields = serializer.fields
+        for field_name, attr, kind, converter in steps:
+            if attr is None:
+                value = cls._get_attribute(bound_fields[field_name], instance)
+            else:
+                if is_mapping:
+                    try:
+                        value = instance[attr]
+                    except KeyError:
+                        value = _MISSING
+                else:
+                    value = getattr(instance, attr, _MISSING)
+
+                # Callables, missing values and lookup errors get DRF's handling
+                if value is _MISSING or callable(value):
+                    value = cls._get_attribute(bound_fields[field_name], instance)
+
+            if value is _MISSING:
+                continue
+
+            if value is None:
+                ret[field_name] = None
+            elif kind == _BUILTIN:
+                ret[field_name] = converter(value)
+            elif kind == _NESTED:
+                ret[field_name] = cls.to_representation(
+                    converter, value, bound_fields[field_name]
+                )
+            elif kind == _NESTED_LIST:
+                child = bound_fields[field_name].child
+                iterable = value.all() if isinstance(value, models.Manager) else value
+                ret[field_name] = [
+                    cls.to_representation(converter, item, child) for item in iterable
+                ]
+            else:
+                ret[field_name] = bound_fields[field_name].to_representation(value)
+
+        return ret
+
+    @staticmethod
+    def _get_attribute(field: fields.Field, instance: Any) -> Any:
+        try:
+            value = field.get_attribute(instance)
+        except SkipField:
+            return _MISSING
+
+        if isinstance(value, PKOnlyObject) and value.pk is None:
+            return None
+
+        return value
+
+    @staticmethod
+    def _get_attr(field: fields.Field) -> Optional[str]:
+        if isinstance(field, serializers.RelatedField) or len(field.source_attrs) != 1:
+            return None
+
+        return field.source_attrs[0]
+
+    @classmethod
+    def _get_converter(cls, field: fields.Field) -> Tuple[int, Any]:
+        builtin_converter = _BUILTIN_CONVERTERS.get(type(field))
+        if builtin_converter:
+            return _BUILTIN, builtin_converter
+
+        if isinstance(field, ReadOnlySerializer):
+            return _NESTED, cls.get_steps(field)
+
+        if isinstance(field, serializers.ListSerializer) and isinstance(
+            field.child, ReadOnlySerializer
+        ):
+            return _NESTED_LIST, cls.get_steps(field.child)
+
+        return _FIELD, None
+
+
+class ReadOnlySerializer(serializers.Serializer):
+    """
+    Serializer for response payloads with a compiled to_representation.
+
+    Fields are declared like on any DRF serializer, so drf_yasg schemas and input
+    validation are unchanged, and the output is identical to Serializer's.
+    """
+
+    def to_representation(self, instance: Any) -> Dict[str, Any]:
+        steps = _ReadOnlySerializerCompiler.get_steps(self)
+        return _ReadOnlySerializerCompiler.to_representation(steps, instance, self)
@@ -0,0 +1,551 @@
+import asyncio
+import gc
+import io
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import List, Optional
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import httpx
+import requests
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase as DjangoTestCase
+from django.utils import timezone
+from rest_framework import serializers
+
+from paytungan.app.auth.models import User
+from paytungan.app.base.constants import DEFAULT_LOGGER
+from paytungan.app.common.cache import LRUCache
+from paytungan.app.common.exceptions import ValidationErrorException
+from paytungan.app.common.http import AsyncPooledHttpClient, PooledHttpClient
+from paytungan.app.common.instrumentation import external_call, request_metrics_var
+from paytungan.app.common.metrics import MetricsRegistry, _MmapValues
+from paytungan.app.common.middlewares import (
+    JSONFormatter,
+    LoggingMiddleware,
+    ProfilingMiddleware,
+    RequestPayload,
+)
+from paytungan.app.common.profiling import ProfileStore, sign_profile_request
+from paytungan.app.common.pagination import KeysetPagination
+from paytungan.app.common.serializers import ReadOnlySerializer
+from paytungan.app.common.utils import ObjectMapperUtil
+
+
+@dataclass
+class _ChildDomain:
+    id: int
+    name: Optional[str] = None
+
+
+@dataclass
+class _ParentDomain:
+    id: int
+    child: Optional[_ChildDomain] = None
+    children: Optional[List[_ChildDomain]] = None
+    tags: List[str] = field(default_factory=list)
+
+
+class _ChildModel:
+    def __init__(self, id: int, name: str) -> None:
+        self.id = id
+        self.name = name
+
+
+class _ChildSerializer(ReadOnlySerializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField(required=False)
+    label = serializers.CharField(source="name", default="none")
+
+
+class _ParentSerializer(ReadOnlySerializer):
+    id = serializers.IntegerField()
+    created_at = serializers.DateTimeField()
+    child = _ChildSerializer(allow_null=True)
+    children = _ChildSerializer(many=True)
+    tags = serializers.ListField(child=serializers.CharField(), required=False)
+    extra = serializers.CharField(allow_null=True)
+
+
+class TestLRUCache(TestCase):
+    def test_get_and_set(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 1)
+
+    @patch("paytungan.app.common.cache.CACHE_REQUESTS")
+    def test_named_cache_counts_requests(self, mock_cache_requests):
+        cache = LRUCache(max_size=2, name="user")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        mock_cache_requests.inc.assert_any_call(cache="user", result="hit")
+        mock_cache_requests.inc.assert_any_call(cache="user", result="miss")
+
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_expired_entry(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1, expires_at=time.time() - 1)
+        cache.set("b", 2, ttl=60, expires_at=time.time() + 3600)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(len(cache), 1)
+
+    def test_delete(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.delete("a")
+
+        self.assertIsNone(cache.get("a"))
+
+
+class TestMetricsRegistry(TestCase):
+    def test_render(self) -> None:
+        registry = MetricsRegistry()
+        counter = registry.counter("cache_requests_total", "Lookups", ["cache"])
+        histogram = registry.histogram(
+            "duration_seconds", "Duration", ["view"], buckets=(0.1, 1)
+        )
+
+        counter.inc(cache="user")
+        counter.inc(2, cache="user")
+        histogram.observe(0.05, view="user-get")
+        histogram.observe(0.5, view="user-get")
+        histogram.observe(5, view="user-get")
+
+        rendered = registry.render().splitlines()
+        self.assertIn("# TYPE cache_requests_total counter", rendered)
+        self.assertIn('cache_requests_total{cache="user"} 3.0', rendered)
+        self.assertIn("# TYPE duration_seconds histogram", rendered)
+        self.assertIn('duration_seconds_bucket{view="user-get",le="0.1"} 1.0', rendered)
+        self.assertIn('duration_seconds_bucket{view="user-get",le="1.0"} 2.0', rendered)
+        self.assertIn(
+            'duration_seconds_bucket{view="user-get",le="+Inf"} 3.0', rendered
+        )
+        self.assertIn('duration_seconds_sum{view="user-get"} 5.55', rendered)
+        self.assertIn('duration_seconds_count{view="user-get"} 3.0', rendered)
+
+    def test_invalid_labels(self) -> None:
+        counter = MetricsRegistry().counter("requests_total", "Requests", ["view"])
+        with self.assertRaises(ValueError):
+            counter.inc(method="GET")
+
+    def test_directory_sums_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory)
+            counter = registry.counter("requests_total", "Requests", ["view"])
+            counter.inc(view="user-get")
+            # A forked worker writes to its own file
+            with patch("paytungan.app.common.metrics.os.getpid", return_value=-1):
+                counter.inc(view="user-get")
+                counter.inc(view='bill-"get"')
+
+            self.assertIn(
+                'requests_total{view="user-get"} 2.0', registry.render().splitlines()
+            )
+            self.assertIn(
+                'requests_total{view="bill-\\"get\\""} 1.0',
+                registry.render().splitlines(),
+            )
+
+    def test_directory_file_grows(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory)
+            counter = registry.counter("requests_total", "Requests", ["view"])
+            for index in range(2000):
+                counter.inc(view=f"view-{index}")
+
+            rendered = registry.render().splitlines()
+            self.assertIn('requests_total{view="view-0"} 1.0', rendered)
+            self.assertIn('requests_total{view="view-1999"} 1.0', rendered)
+
+    def test_directory_file_corrupt(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "values.db")
+            values = _MmapValues(path)
+            values.inc("first", 1)
+            values.inc("second", 2)
+            values.close()
+            with open(path, "rb") as file:
+                data = file.read()
+
+            # Used size past the end of the file
+            with open(path, "r+b") as file:
+                file.write(struct.pack("I", 0xFFFFFFFF))
+            self.assertEqual(
+                list(_MmapValues.read_file(path)), [("first", 1.0), ("second", 2.0)]
+            )
+
+            # File cut in the middle of the second entry
+            with open(path, "wb") as file:
+                file.write(data[: struct.unpack_from("I", data, 0)[0] - 4])
+            self.assertEqual(list(_MmapValues.read_file(path)), [("first", 1.0)])
+
+            values = _MmapValues(path)
+            values.inc("second", 3)
+            values.close()
+            self.assertEqual(
+                list(_MmapValues.read_file(path)), [("first", 1.0), ("second", 3.0)]
+            )
+
+
+class TestObjectMapperUtil(TestCase):
+    def test_map_object(self):
+        result = ObjectMapperUtil.map(_ChildModel(1, "child"), _ChildDomain)
+
+        self.assertEqual(result, _ChildDomain(id=1, name="child"))
+
+    def test_map_dict_nested(self):
+        source = {
+            "id": 1,
+            "child": {"id": 2},
+            "children": [{"id": 3, "name": "a"}, _ChildModel(4, "b")],
+        }
+
+        result = ObjectMapperUtil.map(source, _ParentDomain)
+
+        self.assertEqual(result.child, _ChildDomain(id=2))
+        self.assertEqual(
+            result.children,
+            [_ChildDomain(id=3, name="a"), _ChildDomain(id=4, name="b")],
+        )
+        # Fields with default_factory are treated as required when missing in a dict
+        self.assertIsNone(result.tags)
+
+    def test_map_dataclass_and_list(self):
+        parent = _ParentDomain(id=1, child=_ChildDomain(id=2), tags=["a"])
+
+        result = ObjectMapperUtil.map([parent, None], List[_ParentDomain])
+
+        self.assertEqual(result, [parent, None])
+
+    def test_map_primitive(self):
+        self.assertEqual(ObjectMapperUtil.map("value", Optional[str]), "value")
+        self.assertEqual(ObjectMapperUtil.map([1, 2], List[int]), [1, 2])
+
+
+class TestPooledHttpClient(TestCase):
+    def setUp(self) -> None:
+        self.http_client = PooledHttpClient(max_retries=2, backoff_factor=0)
+        self.session_request = patch.object(
+            self.http_client._session, "request"
+        ).start()
+        self.addCleanup(patch.stopall)
+
+    def test_get_retried_on_retryable_status(self):
+        self.session_request.side_effect = [
+            MagicMock(status_code=503),
+            MagicMock(status_code=200),
+        ]
+
+        response = self.http_client.request("GET", "https://api.xendit.co/v2/invoices")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.http_client.get_stats().retries, 1)
+        self.assertEqual(
+            self.session_request.call_args.kwargs["timeout"], self.http_client.timeout
+        )
+
+    def test_get_raise_after_max_retries(self):
+        self.session_request.side_effect = requests.ConnectionError()
+
+        with self.assertRaises(requests.ConnectionError):
+            self.http_client.request("GET", "https://api.xendit.co/v2/invoices")
+
+        stats = self.http_client.get_stats()
+        self.assertEqual(stats.requests, 3)
+        self.assertEqual(stats.errors, 3)
+
+    def test_post_not_retried(self):
+        self.session_request.return_value = MagicMock(status_code=503)
+
+        response = self.http_client.request("POST", "https://api.xendit.co/v2/invoices")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.session_request.call_count, 1)
+
+
+class TestAsyncPooledHttpClient(TestCase):
+    def setUp(self) -> None:
+        self.http_client = AsyncPooledHttpClient(
+            base_url="https://api.xendit.co/",
+            transport=httpx.MockTransport(lambda request: httpx.Response(200)),
+        )
+
+    async def _request(self) -> httpx.AsyncClient:
+        await self.http_client.request("GET", "v2/invoices")
+        return self.http_client._get_client()
+
+    def test_client_per_event_loop(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+
+        client = loop.run_until_complete(self._request())
+        other_client = asyncio.run(self._request())
+        client_again = loop.run_until_complete(self._request())
+
+        self.assertIsNot(other_client, client)
+        self.assertIs(client_again, client)
+        self.assertFalse(client.is_closed)
+
+        loop.run_until_complete(self.http_client.close())
+        self.assertTrue(client.is_closed)
+
+    def test_client_dropped_with_event_loop(self):
+        client = weakref.ref(asyncio.run(self._request()))
+        gc.collect()
+
+        self.assertIsNone(client())
+        self.assertEqual(len(self.http_client._clients), 0)
+
+
+class TestKeysetPagination(TestCase):
+    def test_cursor_round_trip(self):
+        created_at = timezone.now()
+
+        cursor = KeysetPagination.encode_cursor(created_at, 42)
+
+        self.assertEqual(KeysetPagination.decode_cursor(cursor), (created_at, 42))
+
+    def test_decode_invalid_cursor(self):
+        for cursor in ["not-a-cursor", "W10", "WyJ4IiwxXQ"]:
+            with self.assertRaises(ValidationErrorException):
+                KeysetPagination.decode_cursor(cursor)
+
+    def test_build_page(self):
+        rows = [_ChildModel(id, str(id)) for id in range(3, 0, -1)]
+        for row in rows:
+            row.created_at = timezone.now()
+
+        page = KeysetPagination().build_page(iter(rows), limit=2)
+
+        self.assertEqual([row.id for row in page.results], [3, 2])
+        self.assertEqual(
+            KeysetPagination.decode_cursor(page.next_cursor),
+            (rows[1].created_at, 2),
+        )
+
+
+class TestReadOnlySerializer(TestCase):
+    def test_same_output_as_serializer(self):
+        instances = [
+            {
+                "id": 1,
+                "created_at": timezone.now(),
+                "child": _ChildModel(2, "child"),
+                "children": [{"id": 3}, _ChildModel(4, 5)],
+                "tags": ["a"],
+            },
+            _ParentDomain(id=6, child=None, children=[_ChildDomain(id=7)]),
+        ]
+        instances[1].created_at = timezone.now()
+
+        data = _ParentSerializer(instances, many=True).data
+        with patch.object(
+            ReadOnlySerializer,
+            "to_representation",
+            serializers.Serializer.to_representation,
+        ):
+            expected = _ParentSerializer(instances, many=True).data
+
+        self.assertEqual(data, expected)
+        self.assertEqual(
+            [list(item.keys()) for item in data],
+            [list(item.keys()) for item in expected],
+        )
+
+    def test_compiled_steps_keep_no_payload(self):
+        class _LeakSerializer(_ParentSerializer):
+            pass
+
+        instance = _ParentDomain(id=1, child=_ChildDomain(id=2), children=[])
+        instance.created_at = timezone.now()
+        instance_ref = weakref.ref(instance)
+        serializer = _LeakSerializer(instance, context={"request": object()})
+        self.assertEqual(serializer.data["child"]["id"], 2)
+
+        del instance, serializer
+        gc.collect()
+
+        self.assertIsNone(instance_ref())
+
+
+class TestLoggingMiddleware(DjangoTestCase):
+    def test_request_metrics(self) -> None:
+        def get_response(request):
+            User.objects.count()
+            with external_call("xendit"):
+                pass
+
+            return HttpResponse(b"ok")
+
+        request = RequestFactory().get("/api/users/get")
+        with self.assertLogs(DEFAULT_LOGGER, "INFO") as logs:
+            response = LoggingMiddleware(get_response)(request)
+
+        metrics = logs.records[0].metrics
+        self.assertEqual(metrics["db_query_count"], 1)
+        self.assertEqual(metrics["external_call_count"], 1)
+        self.assertEqual(metrics["external_calls"]["xendit"]["count"], 1)
+        self.assertEqual(metrics["response_size"], 2)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("xendit;dur=", response["Server-Timing"])
+        self.assertIsNone(request_metrics_var.get())
+
+    @patch("paytungan.app.common.middlewares.REQUEST_LATENCY")
+    def test_request_latency_metric(self, mock_request_latency) -> None:
+        request = RequestFactory().get("/health-check")
+        LoggingMiddleware(lambda request: HttpResponse(b"ok"))(request)
+
+        mock_request_latency.observe.assert_called_once()
+        self.assertEqual(
+            mock_request_latency.observe.call_args.kwargs,
+            {"view": "unmatched", "method": "GET", "status": 200},
+        )
+
+    def test_external_call_outside_request(self) -> None:
+        with external_call("xendit"):
+            pass
+
+        self.assertIsNone(request_metrics_var.get())
+
+
+class TestRequestPayload(TestCase):
+    def test_short_payload(self) -> None:
+        self.assertEqual(
+            str(RequestPayload(b'{"a": "\xc3\xa9"}', 20)), '{"a": "\u00e9"}'
+        )
+        self.assertEqual(str(RequestPayload("a=1&b=2", 20)), "a=1&b=2")
+
+    def test_truncate(self) -> None:
+        self.assertEqual(
+            str(RequestPayload(b"0123456789", 4)), "0123...(truncated, 10 total)"
+        )
+
+
+class TestJSONFormatter(TestCase):
+    def _make_record(self, created: float) -> logging.LogRecord:
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "hi", (), None)
+        record.created = created
+        record.request_id = "request-id"
+        record.request_path = "/api/users/get"
+        record.request_payload = RequestPayload(b"x" * 10, 4)
+        return record
+
+    def test_format(self) -> None:
+        formatter = JSONFormatter()
+        created = time.time()
+
+        data = json.loads(formatter.format(self._make_record(created)))
+
+        self.assertEqual(data["message"], "hi")
+        self.assertEqual(data["request_id"], "request-id")
+        self.assertEqual(data["request_payload"], "xxxx...(truncated, 10 total)")
+        self.assertEqual(
+            data["time"],
+            time.strftime("%Y-%m-%d %H:%M:%S%z", time.localtime(created)),
+        )
+
+    def test_time_cached_per_second(self) -> None:
+        formatter = JSONFormatter()
+        first = json.loads(formatter.format(self._make_record(1000.1)))
+        second = json.loads(formatter.format(self._make_record(1000.9)))
+        third = json.loads(formatter.format(self._make_record(1001.0)))
+
+        self.assertEqual(first["time"], second["time"])
+        self.assertNotEqual(second["time"], third["time"])
+
+
+@patch("paytungan.app.common.middlewares.PROFILING_ENABLED", True)
+class TestProfilingMiddleware(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        patcher = patch(
+            "paytungan.app.common.middlewares.PROFILING_DIR", self.directory.name
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = lambda: ProfilingMiddleware(
+            lambda request: HttpResponse(b"ok")
+        )
+
+    @patch("paytungan.app.common.middlewares.PROFILING_ENABLED", False)
+    def test_not_used_when_disabled(self) -> None:
+        with self.assertRaises(MiddlewareNotUsed):
+            self.middleware()
+
+    def test_not_used_without_trigger(self) -> None:
+        with self.assertRaises(MiddlewareNotUsed):
+            self.middleware()
+
+    @patch("paytungan.app.common.middlewares.PROFILING_SAMPLE_RATE", 1)
+    def test_sampled_request(self) -> None:
+        response = self.middleware()(RequestFactory().get("/api/users/get"))
+
+        profiles = ProfileStore(self.directory.name).list()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(response["x-profile-id"], profiles[0].id)
+        self.assertEqual(profiles[0].path, "/api/users/get")
+        self.assertEqual(profiles[0].trigger, "sample")
+
+        stdout = io.StringIO()
+        call_command(
+            "profiles", "aggregate", directory=self.directory.name, stdout=stdout
+        )
+        self.assertIn("Aggregated 1 profiles", stdout.getvalue())
+
+    @patch("paytungan.app.common.middlewares.PROFILING_SAMPLE_RATE", 1)
+    @patch("paytungan.app.common.middlewares.PROFILING_MAX_PROFILES", 1)
+    def test_max_profiles(self) -> None:
+        middleware = self.middleware()
+        middleware(RequestFactory().get("/api/users/get"))
+        response = middleware(RequestFactory().get("/api/users/get"))
+
+        self.assertNotIn("x-profile-id", response)
+        self.assertEqual(ProfileStore(self.directory.name).count(), 1)
+
+    @patch("paytungan.app.common.middlewares.PROFILING_SECRET", "secret")
+    @patch("paytungan.app.common.profiling.PROFILING_SECRET", "secret")
+    def test_signed_header(self) -> None:
+        middleware = self.middleware()
+        signature = sign_profile_request("/api/users/get")
+
+        unsigned = middleware(RequestFactory().get("/api/users/get"))
+        other_path = middleware(
+            RequestFactory().get("/api/bills/get", HTTP_X_PROFILE=signature)
+        )
+        signed = middleware(
+            RequestFactory().get("/api/users/get", HTTP_X_PROFILE=signature)
+        )
+
+        self.assertNotIn("x-profile-id", unsigned)
+        self.assertNotIn("x-profile-id", other_path)
+        self.assertIn("x-profile-id", signed)
+        self.assertEqual(ProfileStore(self.directory.name).list()[0].trigger, "header")
@@ -6,13 +6,139 @@ from dataclasses import fields
 from datetime import datetime, time, date
 from decimal import Decimal
 from enum import Enum
-from typing import Optional, Tuple, TypeVar, Type, List, Dict, Any, _GenericAlias
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    _GenericAlias,
+)
 
 import pytz
 
 T = TypeVar("T")
 
 
+class _ObjectMapperCompiler:
+    """
+    Compiles and caches the conversion functions used by ObjectMapperUtil.map.
+
+    A converter is built once per destination type (generics resolved ahead of time),
+    and a mapping plan is built once per (source type, destination class) pair as a
+    list of field names, requirement flags and field converters.
+    """
+
+    _converters: Dict[Any, Callable[[Any], Any]] = {}
+    _plans: Dict[Tuple[type, type], Callable[[Any], Any]] = {}
+
+    @classmethod
+    def get_converter(cls, destination_type: Any) -> Callable[[Any], Any]:
+        try:
+            converter = cls._converters.get(destination_type)
+        except TypeError:
+            # Unhashable annotation, build it every time
+            return cls._build_converter(destination_type)
+
+        if converter is None:
+            converter = cls._build_converter(destination_type)
+            cls._converters[destination_type] = converter
+
+        return converter
+
+    @classmethod
+    def get_plan(
+        cls, source_type: type, destination_class: type
+    ) -> Callable[[Any], Any]:
+        key = (source_type, destination_class)
+        plan = cls._plans.get(key)
+        if plan is None:
+            plan = cls._build_plan(source_type, destination_class)
+            cls._plans[key] = plan
+
+        return plan
+
+    @classmethod
+    def _build_converter(cls, destination_type: Any) -> Callable[[Any], Any]:
+        if isinstance(destination_type, _GenericAlias):
+            destination_type = destination_type.__args__[0]
+
+        def convert_list(values: list) -> list:
+            element_converter = cls.get_converter(destination_type)
+            return [element_converter(value) for value in values]
+
+        if not dataclasses.is_dataclass(destination_type):
+
+            def convert_value(value):
+                if isinstance(value, list):
+                    return convert_list(value)
+
+                return value
+
+            return convert_value
+
+        def convert_dataclass(value):
+            if isinstance(value, list):
+                return convert_list(value)
+
+            if value is None or type(value) is destination_type:
+                return value
+
+            return cls.get_plan(type(value), destination_type)(value)
+
+        return convert_dataclass
+
+    @classmethod
+    def _build_plan(
+        cls, source_type: type, destination_class: type
+    ) -> Callable[[Any], Any]:
+        field_plans = [
+            (
+                field.name,
+                field.default is dataclasses.MISSING,
+                cls.get_converter(field.type),
+            )
+            for field in fields(destination_class)
+        ]
+
+        if issubclass(source_type, dict):
+
+            def map_dict(source: dict):
+                attributes = {}
+                for name, is_required, converter in field_plans:
+                    if name in source or is_required:
+                        value = source.get(name)
+                        if value:
+                            value = converter(value)
+
+                        attributes[name] = value
+
+                return destination_class(**attributes)
+
+            return map_dict
+
+        if dataclasses.is_dataclass(source_type):
+            dict_plan = cls.get_plan(dict, destination_class)
+
+            def map_dataclass(source):
+                return dict_plan(dataclasses.asdict(source))
+
+            return map_dataclass
+
+        def map_object(source):
+            return destination_class(
+                **{
+                    name: converter(getattr(source, name, None))
+                    for name, _, converter in field_plans
+                }
+            )
+
+        return map_object
+
+
 class ObjectMapperUtil:
     @staticmethod
     def map(source_model_object, destination_domain_class: Type[T]) -> T:
@@ -21,50 +147,8 @@ class ObjectMapperUtil:
         required by the destination domain class.
         This method still can't handle Dict, Any, and Tuple for destination class
         """
-
-        if isinstance(destination_domain_class, _GenericAlias):
-            destination_domain_class = destination_domain_class.__args__[0]
-
-        if isinstance(source_model_object, List):
-            return [
-                ObjectMapperUtil.map(obj, destination_domain_class)
-                for obj in source_model_object
-            ]
-
-        is_dataclass = dataclasses.is_dataclass(destination_domain_class)
-        source_same_type = type(source_model_object) is destination_domain_class
-
-        # handle if primitive and same type
-        if not is_dataclass or source_model_object is None or source_same_type:
-            return source_model_object
-
-        domain_fields = [field for field in fields(destination_domain_class)]
-
-        if issubclass(type(source_model_object), dict):
-            attributes = {}
-            for field in domain_fields:
-                key_exist = field.name in source_model_object.keys()
-                if key_exist or field.default is dataclasses.MISSING:
-                    value = source_model_object.get(field.name)
-                    if value:
-                        value = ObjectMapperUtil.map(value, field.type)
-
-                    attributes[field.name] = value
-        elif dataclasses.is_dataclass(source_model_object):
-            return ObjectMapperUtil.map(
-                dataclasses.asdict(source_model_object), destination_domain_class
-            )
-        else:
-            attributes = {
-                field.name: (
-                    ObjectMapperUtil.map(
-                        getattr(source_model_object, field.name, None), field.type
-                    )
-                )
-                for field in domain_fields
-            }
-
-        return destination_domain_class(**attributes)
+        converter = _ObjectMapperCompiler.get_converter(destination_domain_class)
+        return converter(source_model_object)
 
     @staticmethod
     def map_domain(source_model_object, destination_domain_class: Type[T]) -> T:
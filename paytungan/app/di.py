@@ -4,6 +4,7 @@ from paytungan.app.payment.modules import PaymentModule
 from paytungan.app.logging.modules import LoggingModule
 from paytungan.app.auth.modules import AuthModule
 from paytungan.app.split_bill.modules import SplitBillModule
+from paytungan.app.job.modules import JobModule
 
 
 injector = Injector(
@@ -12,5 +13,6 @@ injector = Injector(
         SplitBillModule,
         LoggingModule,
         PaymentModule,
+        JobModule,
     ]
 )
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from typing import List
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from paytungan.app.base.constants import JobStatus
+from paytungan.app.common.utils import ObjectMapperUtil
+from .interfaces import IJobAccessor
+from .models import Job
+from .specs import EnqueueJobSpec, FailJobSpec
+
+# Errors are kept for debugging, tracebacks are in the worker logs
+LAST_ERROR_MAX_LENGTH = 2000
+STALE_JOB_ERROR = "Lock expired on the last attempt"
+
+
+class JobAccessor(IJobAccessor):
+    def enqueue(self, spec: EnqueueJobSpec) -> Job:
+        return Job.objects.create(
+            job_type=spec.job_type,
+            payload=spec.payload,
+            max_attempts=spec.max_attempts,
+            run_at=spec.run_at or timezone.now(),
+            **ObjectMapperUtil.default_model_creation_params(),
+        )
+
+    def claim(self, limit: int, lock_timeout: int) -> List[Job]:
+        """
+        Lock up to `limit` due jobs for the caller and count the attempt. Must run in a
+        transaction, rows locked by other workers are skipped instead of waited for.
+        """
+        time_now = timezone.now()
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=JobStatus.PENDING.value, run_at__lte=time_now)
+                | Q(
+                    status=JobStatus.RUNNING.value,
+                    locked_at__lt=time_now - timedelta(seconds=lock_timeout),
+                    attempts__lt=F("max_attempts"),
+                )
+            )
+            .order_by("run_at", "id")[:limit]
+        )
+        if not jobs:
+            return []
+
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=JobStatus.RUNNING.value,
+            attempts=F("attempts") + 1,
+            locked_at=time_now,
+            updated_at=time_now,
+        )
+        for job in jobs:
+            job.status = JobStatus.RUNNING.value
+            job.attempts += 1
+            job.locked_at = time_now
+
+        return jobs
+
+    def fail_stale(self, lock_timeout: int) -> List[Job]:
+        """
+        Fail the jobs whose worker died on their last attempt (lock expired with no
+        attempt left), and return them. Must run in a transaction, like claim.
+        """
+        time_now = timezone.now()
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=JobStatus.RUNNING.value,
+                locked_at__lt=time_now - timedelta(seconds=lock_timeout),
+                attempts__gte=F("max_attempts"),
+            )
+        )
+        if not jobs:
+            return []
+
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=JobStatus.FAILED.value,
+            locked_at=None,
+            last_error=STALE_JOB_ERROR,
+            updated_at=time_now,
+        )
+        for job in jobs:
+            job.status = JobStatus.FAILED.value
+            job.locked_at = None
+            job.last_error = STALE_JOB_ERROR
+
+        return jobs
+
+    def complete(self, job_id: int) -> None:
+        Job.objects.filter(id=job_id).update(
+            status=JobStatus.DONE.value,
+            locked_at=None,
+            updated_at=timezone.now(),
+        )
+
+    def fail(self, spec: FailJobSpec) -> None:
+        time_now = timezone.now()
+        Job.objects.filter(id=spec.job_id).update(
+            status=(
+                JobStatus.PENDING.value if spec.retry_at else JobStatus.FAILED.value
+            ),
+            run_at=spec.retry_at or F("run_at"),
+            locked_at=None,
+            last_error=spec.error[:LAST_ERROR_MAX_LENGTH],
+            updated_at=time_now,
+        )
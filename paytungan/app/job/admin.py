@@ -0,0 +1,17 @@
+from safedelete.admin import SafeDeleteAdmin, SafeDeleteAdminFilter, highlight_deleted
+
+
+class JobAdmin(SafeDeleteAdmin):
+    list_display = (
+        highlight_deleted,
+        "highlight_deleted_field",
+        "job_type",
+        "status",
+        "attempts",
+        "run_at",
+    ) + SafeDeleteAdmin.list_display
+    list_filter = (SafeDeleteAdminFilter, "job_type", "status") + (
+        SafeDeleteAdmin.list_filter
+    )
+
+    field_to_highlight = "id"
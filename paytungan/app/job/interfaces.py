@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from .models import Job
+from .specs import EnqueueJobSpec, FailJobSpec
+
+
+class IJobAccessor(ABC):
+    @abstractmethod
+    def enqueue(self, spec: EnqueueJobSpec) -> Job:
+        raise NotImplementedError
+
+    @abstractmethod
+    def claim(self, limit: int, lock_timeout: int) -> List[Job]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail_stale(self, lock_timeout: int) -> List[Job]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, job_id: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, spec: FailJobSpec) -> None:
+        raise NotImplementedError
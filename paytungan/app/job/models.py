@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils import timezone
+
+from paytungan.app.base.constants import JobStatus
+from paytungan.app.base.models import BaseModel
+
+
+class Job(BaseModel):
+    """Background job run by the worker command, see JobService."""
+
+    job_type = models.CharField(max_length=32)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, default=JobStatus.PENDING.value)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = "job"
+        indexes = [
+            models.Index(
+                fields=["status", "run_at"],
+                name="index_job_status_run_at",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{str(self.id)} - {str(self.job_type)}"
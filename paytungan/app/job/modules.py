@@ -0,0 +1,11 @@
+from injector import Binder, Module, singleton
+
+from .interfaces import IJobAccessor
+from .accessors import JobAccessor
+from .services import JobService
+
+
+class JobModule(Module):
+    def configure(self, binder: Binder) -> None:
+        binder.bind(IJobAccessor, to=JobAccessor, scope=singleton)
+        binder.bind(JobService, to=JobService, scope=singleton)
@@ -0,0 +1,125 @@
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+from injector import inject
+
+from paytungan.app.base.constants import (
+    JOB_BACKOFF_FACTOR,
+    JOB_BACKOFF_MAX,
+    JOB_BATCH_SIZE,
+    JOB_LOCK_TIMEOUT,
+    JobStatus,
+    JobType,
+)
+from paytungan.app.common.exceptions import BaseException
+from paytungan.app.logging.interface import ILoggingProvider
+from paytungan.app.payment.services import PaymentService
+from .interfaces import IJobAccessor
+from .models import Job
+from .specs import FailJobSpec, RunJobsResult
+
+JobHandler = Callable[[dict], None]
+
+
+class JobService:
+    @inject
+    def __init__(
+        self,
+        job_accessor: IJobAccessor,
+        payment_service: PaymentService,
+        logger: ILoggingProvider,
+    ) -> None:
+        self.job_accessor = job_accessor
+        self.logger = logger
+        # Job type to its handler and the handler of its final failure
+        self.handlers: Dict[str, Tuple[JobHandler, Optional[JobHandler]]] = {
+            JobType.CREATE_INVOICE.value: (
+                payment_service.run_create_invoice_job,
+                payment_service.fail_create_invoice_job,
+            ),
+            JobType.CREATE_PAYOUT.value: (
+                payment_service.run_create_payout_job,
+                None,
+            ),
+        }
+
+    def run_pending(self, limit: int = JOB_BATCH_SIZE) -> RunJobsResult:
+        with transaction.atomic():
+            stale_jobs: List[Job] = self.job_accessor.fail_stale(JOB_LOCK_TIMEOUT)
+            jobs: List[Job] = self.job_accessor.claim(limit, JOB_LOCK_TIMEOUT)
+
+        result = RunJobsResult()
+        # Their worker died on the last attempt, only the final failure is left
+        for job in stale_jobs:
+            self.logger.error(
+                f"Job {job.id} ({job.job_type}) lock expired on attempt {job.attempts}"
+            )
+            self._run_failure_handler(job)
+            result.failed += 1
+
+        # Jobs run outside of the claim transaction, so no row lock is held
+        # while Xendit is called
+        for job in jobs:
+            status = self.run(job)
+            if status == JobStatus.DONE.value:
+                result.done += 1
+            elif status == JobStatus.PENDING.value:
+                result.retried += 1
+            else:
+                result.failed += 1
+
+        return result
+
+    def run(self, job: Job) -> str:
+        """
+        Run a claimed job, returns its new status. Domain errors fail the job right
+        away, other errors are retried with backoff until max_attempts is reached.
+        """
+        handler, _ = self.handlers.get(job.job_type, (None, None))
+        try:
+            if not handler:
+                raise BaseException(f"Unknown job type: {job.job_type}")
+
+            handler(job.payload)
+        except Exception as error:
+            is_retryable = not isinstance(error, BaseException)
+            retry_at = (
+                self._get_retry_at(job.attempts)
+                if is_retryable and job.attempts < job.max_attempts
+                else None
+            )
+            self.logger.error(
+                f"Job {job.id} ({job.job_type}) failed on attempt {job.attempts}: {error}"
+            )
+            self.job_accessor.fail(
+                FailJobSpec(job_id=job.id, error=repr(error), retry_at=retry_at)
+            )
+            if retry_at:
+                return JobStatus.PENDING.value
+
+            self._run_failure_handler(job)
+            return JobStatus.FAILED.value
+
+        self.job_accessor.complete(job.id)
+        return JobStatus.DONE.value
+
+    def _run_failure_handler(self, job: Job) -> None:
+        _, failure_handler = self.handlers.get(job.job_type, (None, None))
+        if not failure_handler:
+            return
+
+        try:
+            failure_handler(job.payload)
+        except Exception as failure_error:
+            self.logger.error(
+                f"Failure handler of job {job.id} failed: {failure_error}"
+            )
+
+    @staticmethod
+    def _get_retry_at(attempts: int) -> datetime:
+        backoff = min(JOB_BACKOFF_MAX, JOB_BACKOFF_FACTOR * (2 ** (attempts - 1)))
+        # Jitter spreads out retries of jobs that failed together
+        return timezone.now() + timedelta(seconds=random.uniform(backoff / 2, backoff))
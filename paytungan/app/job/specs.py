@@ -0,0 +1,32 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from paytungan.app.base.constants import JOB_MAX_ATTEMPTS
+
+
+@dataclass
+class EnqueueJobSpec:
+    job_type: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    run_at: Optional[datetime] = None
+    max_attempts: int = JOB_MAX_ATTEMPTS
+
+
+@dataclass
+class FailJobSpec:
+    job_id: int
+    error: str
+    # None fails the job for good
+    retry_at: Optional[datetime] = None
+
+
+@dataclass
+class RunJobsResult:
+    done: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.done + self.retried + self.failed
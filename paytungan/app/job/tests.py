@@ -0,0 +1,171 @@
+from datetime import timedelta
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from django.test import TestCase as DjangoTestCase
+from django.utils import timezone
+
+from paytungan.app.common.exceptions import ValidationErrorException
+from paytungan.app.job.accessors import JobAccessor
+from paytungan.app.job.models import Job
+from paytungan.app.job.services import JobService
+from paytungan.app.job.specs import EnqueueJobSpec, FailJobSpec
+
+
+class TestJobService(TestCase):
+    def setUp(self) -> None:
+        self.job_accessor = MagicMock()
+        self.payment_service = MagicMock()
+        self.job_service = JobService(
+            job_accessor=self.job_accessor,
+            payment_service=self.payment_service,
+            logger=MagicMock(),
+        )
+        self.job_accessor.fail_stale.return_value = []
+
+    @staticmethod
+    def _get_job_dummy(job_type: str = "CREATE_INVOICE", attempts: int = 1) -> Job:
+        return Job(
+            id=1,
+            job_type=job_type,
+            payload={"payment_id": 1},
+            status="RUNNING",
+            attempts=attempts,
+            max_attempts=3,
+        )
+
+    def test_run_pending(self) -> None:
+        self.job_accessor.claim.return_value = [
+            self._get_job_dummy(),
+            self._get_job_dummy("CREATE_PAYOUT"),
+        ]
+
+        result = self.job_service.run_pending(10)
+
+        self.assertEqual((result.done, result.retried, result.failed), (2, 0, 0))
+        self.payment_service.run_create_invoice_job.assert_called_once_with(
+            {"payment_id": 1}
+        )
+        self.payment_service.run_create_payout_job.assert_called_once()
+        self.assertEqual(self.job_accessor.complete.call_count, 2)
+
+    def test_run_pending_stale_job_failed(self) -> None:
+        stale_job = self._get_job_dummy(attempts=3)
+        self.job_accessor.fail_stale.return_value = [stale_job]
+        self.job_accessor.claim.return_value = []
+
+        result = self.job_service.run_pending(10)
+
+        self.assertEqual((result.done, result.retried, result.failed), (0, 0, 1))
+        self.payment_service.fail_create_invoice_job.assert_called_once_with(
+            {"payment_id": 1}
+        )
+        self.payment_service.run_create_invoice_job.assert_not_called()
+
+    def test_run_retried_with_backoff(self) -> None:
+        self.payment_service.run_create_invoice_job.side_effect = ConnectionError()
+
+        status = self.job_service.run(self._get_job_dummy(attempts=1))
+
+        fail_spec: FailJobSpec = self.job_accessor.fail.call_args.args[0]
+        self.assertEqual(status, "PENDING")
+        self.assertGreater(fail_spec.retry_at, timezone.now())
+        self.payment_service.fail_create_invoice_job.assert_not_called()
+
+    def test_run_failed_after_max_attempts(self) -> None:
+        self.payment_service.run_create_invoice_job.side_effect = ConnectionError()
+
+        status = self.job_service.run(self._get_job_dummy(attempts=3))
+
+        fail_spec: FailJobSpec = self.job_accessor.fail.call_args.args[0]
+        self.assertEqual(status, "FAILED")
+        self.assertIsNone(fail_spec.retry_at)
+        self.payment_service.fail_create_invoice_job.assert_called_once_with(
+            {"payment_id": 1}
+        )
+
+    def test_run_domain_error_not_retried(self) -> None:
+        self.payment_service.run_create_invoice_job.side_effect = (
+            ValidationErrorException("Cant create invoice for payment_id: 1")
+        )
+
+        status = self.job_service.run(self._get_job_dummy(attempts=1))
+
+        self.assertEqual(status, "FAILED")
+        self.assertIsNone(self.job_accessor.fail.call_args.args[0].retry_at)
+
+    def test_run_unknown_job_type(self) -> None:
+        status = self.job_service.run(self._get_job_dummy("UNKNOWN"))
+
+        self.assertEqual(status, "FAILED")
+        self.job_accessor.complete.assert_not_called()
+
+
+class TestJobAccessor(DjangoTestCase):
+    def setUp(self) -> None:
+        self.job_accessor = JobAccessor()
+
+    def test_claim(self) -> None:
+        time_now = timezone.now()
+        due = self.job_accessor.enqueue(EnqueueJobSpec(job_type="CREATE_INVOICE"))
+        self.job_accessor.enqueue(
+            EnqueueJobSpec(
+                job_type="CREATE_INVOICE", run_at=time_now + timedelta(minutes=1)
+            )
+        )
+
+        jobs = self.job_accessor.claim(10, lock_timeout=300)
+        repeated = self.job_accessor.claim(10, lock_timeout=300)
+
+        due.refresh_from_db()
+        self.assertEqual([job.id for job in jobs], [due.id])
+        self.assertEqual(repeated, [])
+        self.assertEqual((due.status, due.attempts), ("RUNNING", 1))
+
+    def test_claim_stale_running_job(self) -> None:
+        job = self.job_accessor.enqueue(EnqueueJobSpec(job_type="CREATE_PAYOUT"))
+        Job.objects.filter(id=job.id).update(
+            status="RUNNING", locked_at=timezone.now() - timedelta(minutes=10)
+        )
+
+        jobs = self.job_accessor.claim(10, lock_timeout=300)
+
+        self.assertEqual([claimed.id for claimed in jobs], [job.id])
+
+    def test_stale_running_job_without_attempts_left(self) -> None:
+        job = self.job_accessor.enqueue(
+            EnqueueJobSpec(job_type="CREATE_INVOICE", max_attempts=3)
+        )
+        Job.objects.filter(id=job.id).update(
+            status="RUNNING",
+            attempts=3,
+            locked_at=timezone.now() - timedelta(minutes=10),
+        )
+
+        claimed = self.job_accessor.claim(10, lock_timeout=300)
+        failed = self.job_accessor.fail_stale(lock_timeout=300)
+
+        job.refresh_from_db()
+        self.assertEqual(claimed, [])
+        self.assertEqual([failed_job.id for failed_job in failed], [job.id])
+        self.assertEqual((job.status, job.attempts), ("FAILED", 3))
+        self.assertIsNone(job.locked_at)
+        self.assertEqual(self.job_accessor.fail_stale(lock_timeout=300), [])
+
+    def test_fail_and_complete(self) -> None:
+        retried = self.job_accessor.enqueue(EnqueueJobSpec(job_type="CREATE_PAYOUT"))
+        failed = self.job_accessor.enqueue(EnqueueJobSpec(job_type="CREATE_PAYOUT"))
+        done = self.job_accessor.enqueue(EnqueueJobSpec(job_type="CREATE_PAYOUT"))
+        retry_at = timezone.now() + timedelta(seconds=30)
+
+        self.job_accessor.fail(
+            FailJobSpec(job_id=retried.id, error="timeout", retry_at=retry_at)
+        )
+        self.job_accessor.fail(FailJobSpec(job_id=failed.id, error="invalid"))
+        self.job_accessor.complete(done.id)
+
+        for job in (retried, failed, done):
+            job.refresh_from_db()
+        self.assertEqual((retried.status, retried.run_at), ("PENDING", retry_at))
+        self.assertEqual((failed.status, failed.last_error), ("FAILED", "invalid"))
+        self.assertEqual(done.status, "DONE")
@@ -0,0 +1,133 @@
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Optional
+
+from sentry_sdk import capture_message, push_scope
+
+from paytungan.app.base.constants import LOG_QUEUE_MAX_SIZE
+from paytungan.app.common.metrics import LOG_RECORDS_DROPPED
+
+SENTRY_LEVELS = {
+    logging.WARNING: "warning",
+    logging.ERROR: "error",
+    logging.CRITICAL: "fatal",
+}
+
+
+class SentryHandler(logging.Handler):
+    """Sends records as Sentry messages, with the log record's `extra` as extras."""
+
+    def __init__(self, level: int = logging.WARNING) -> None:
+        super().__init__(level)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            # Runs outside of the request's Sentry scope, so tag the request here
+            with push_scope() as scope:
+                scope.set_tag("request_id", getattr(record, "request_id", None))
+                scope.set_tag("request_path", getattr(record, "request_path", None))
+                capture_message(
+                    record.getMessage(),
+                    level=SENTRY_LEVELS.get(record.levelno, "error"),
+                    extras=getattr(record, "extra", None),
+                )
+        except Exception:
+            self.handleError(record)
+
+
+class _DrainingQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue is bounded, wait for room instead of failing on stop
+        self.queue.put(self._sentinel)
+
+
+class BackgroundLogHandler(QueueHandler):
+    """
+    Hands records to a background thread, which formats and writes them to `stream`
+    and sends the ones at `sentry_level` or above to Sentry.
+
+    Filters still run on the logging thread, so context variables (request id, path,
+    payload) are read there. The queue holds at most `max_size` records, records
+    logged while it is full are dropped and counted in `dropped` and the
+    log_records_dropped_total metric instead of blocking the request.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[IO] = None,
+        sentry_level: int = logging.WARNING,
+        max_size: int = LOG_QUEUE_MAX_SIZE,
+    ) -> None:
+        super().__init__(queue.Queue(max_size))
+        self.stream_handler = logging.StreamHandler(stream or sys.stdout)
+        self.sentry_handler = SentryHandler(sentry_level)
+        self.dropped = 0
+        self._listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+        self._listener_lock = threading.Lock()
+
+    def setFormatter(self, fmt: Optional[logging.Formatter]) -> None:
+        super().setFormatter(fmt)
+        self.stream_handler.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener. Only the message is rendered here, so
+        # later changes to its arguments don't show up in the log.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._listener_lock:
+                self.dropped += 1
+
+            LOG_RECORDS_DROPPED.inc()
+
+    def flush(self) -> None:
+        # Waits until the listener handled everything queued so far
+        if self._listener is not None and self._pid == os.getpid():
+            self.queue.join()
+
+        self.stream_handler.flush()
+
+    def close(self) -> None:
+        with self._listener_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+
+            self._listener = None
+            self._pid = None
+
+        self.stream_handler.close()
+        self.sentry_handler.close()
+        super().close()
+
+    def _ensure_listener(self) -> None:
+        # The listener thread does not survive a fork, e.g. into gunicorn workers
+        if self._pid == os.getpid():
+            return
+
+        with self._listener_lock:
+            if self._pid == os.getpid():
+                return
+
+            if self._pid is not None:
+                # The parent's queue may have been copied mid operation
+                self.queue = queue.Queue(self.queue.maxsize)
+
+            self._listener = _DrainingQueueListener(
+                self.queue,
+                self.stream_handler,
+                self.sentry_handler,
+                respect_handler_level=True,
+            )
+            self._listener.start()
+            self._pid = os.getpid()
@@ -0,0 +1,97 @@
+import io
+import logging
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from paytungan.app.logging.adapters import LoggingProvider
+from paytungan.app.logging.handlers import BackgroundLogHandler, SentryHandler
+
+
+class _ThreadFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return f"{threading.current_thread().name} {super().format(record)}"
+
+
+def _make_record(level: int, message: str, *args, **attrs) -> logging.LogRecord:
+    record = logging.LogRecord("test", level, __file__, 1, message, args, None)
+    record.__dict__.update(attrs)
+    return record
+
+
+class TestBackgroundLogHandler(TestCase):
+    @patch("paytungan.app.logging.handlers.capture_message")
+    def test_handle_in_background(self, mock_capture_message) -> None:
+        stream = io.StringIO()
+        handler = BackgroundLogHandler(stream=stream)
+        handler.setFormatter(_ThreadFormatter())
+
+        args = ["a"]
+        handler.handle(_make_record(logging.INFO, "info %s", args))
+        args.append("b")
+        handler.handle(_make_record(logging.ERROR, "error"))
+        handler.flush()
+
+        self.assertEqual(stream.getvalue().count("\n"), 2)
+        self.assertIn("info ['a']\n", stream.getvalue())
+        self.assertNotIn(threading.current_thread().name, stream.getvalue())
+        mock_capture_message.assert_called_once()
+        self.assertEqual(mock_capture_message.call_args.kwargs["level"], "error")
+        handler.close()
+
+    def test_drop_when_full(self) -> None:
+        handler = BackgroundLogHandler(stream=io.StringIO(), max_size=1)
+        with patch.object(BackgroundLogHandler, "_ensure_listener"), patch(
+            "paytungan.app.logging.handlers.LOG_RECORDS_DROPPED"
+        ) as mock_dropped:
+            for _ in range(3):
+                handler.handle(_make_record(logging.INFO, "info"))
+
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual(mock_dropped.inc.call_count, 2)
+        self.assertEqual(handler.queue.qsize(), 1)
+
+    def test_close_drains_queue(self) -> None:
+        stream = io.StringIO()
+        handler = BackgroundLogHandler(stream=stream, max_size=10)
+        for index in range(10):
+            handler.handle(_make_record(logging.INFO, f"info {index}"))
+
+        handler.close()
+
+        self.assertIn("info 9\n", stream.getvalue())
+
+
+class TestSentryHandler(TestCase):
+    @patch("paytungan.app.logging.handlers.capture_message")
+    def test_emit(self, mock_capture_message) -> None:
+        record = _make_record(
+            logging.CRITICAL, "fatal", extra={"id": 1}, request_id="request-id"
+        )
+
+        SentryHandler().handle(record)
+
+        mock_capture_message.assert_called_once_with(
+            "fatal", level="fatal", extras={"id": 1}
+        )
+
+
+class TestLoggingProvider(TestCase):
+    def setUp(self) -> None:
+        self.provider = LoggingProvider()
+        self.provider.logger = logging.getLogger("paytungan.tests")
+        self.provider.logger.setLevel(logging.INFO)
+
+    @patch("paytungan.app.logging.adapters.DictionaryUtil")
+    def test_skip_disabled_level(self, mock_dictionary_util) -> None:
+        self.provider.debug("debug", {"id": 1})
+
+        mock_dictionary_util.transform_into_jsonable_dictionary.assert_not_called()
+
+    def test_log(self) -> None:
+        with self.assertLogs("paytungan.tests", "INFO") as logs:
+            self.provider.error("error", {"id": 1})
+
+        self.assertEqual(logs.records[0].levelno, logging.ERROR)
+        self.assertEqual(logs.records[0].extra, {"id": 1})
+        self.assertEqual(logs.records[0].funcName, "error")
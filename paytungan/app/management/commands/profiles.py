@@ -0,0 +1,81 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from paytungan.app.base.constants import PROFILING_DIR, PROFILING_SECRET
+from paytungan.app.common.profiling import ProfileStore, sign_profile_request
+
+
+class Command(BaseCommand):
+    help = "List and aggregate request profiles taken by ProfilingMiddleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["list", "aggregate", "sign"],
+            help=(
+                "list the profiles, aggregate their stats, or sign a path for the"
+                " x-profile header"
+            ),
+        )
+        parser.add_argument(
+            "path",
+            nargs="?",
+            help="Only profiles of requests to this path (prefix), or the path to sign",
+        )
+        parser.add_argument("--view", help="Only profiles of this view name")
+        parser.add_argument("--directory", default=PROFILING_DIR)
+        parser.add_argument(
+            "--sort",
+            default="cumulative",
+            help="pstats sort key of the aggregated stats",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=30, help="Number of functions printed"
+        )
+        parser.add_argument(
+            "--output", help="Also write the aggregated stats to this pstats file"
+        )
+
+    def handle(self, *args, **options):
+        if options["action"] == "sign":
+            self._sign(options["path"])
+            return
+
+        store = ProfileStore(options["directory"])
+        profiles = [
+            profile
+            for profile in store.list()
+            if (not options["path"] or profile.path.startswith(options["path"]))
+            and (not options["view"] or profile.view == options["view"])
+        ]
+        if not profiles:
+            self.stdout.write("No profiles found")
+            return
+
+        if options["action"] == "list":
+            for profile in profiles:
+                created_at = datetime.datetime.fromtimestamp(profile.created_at)
+                self.stdout.write(
+                    f"{profile.id}  {created_at:%Y-%m-%d %H:%M:%S}"
+                    f"  {profile.duration_ms:>10.2f} ms  {profile.status}"
+                    f"  {profile.method} {profile.path} ({profile.view},"
+                    f" {profile.trigger})"
+                )
+            return
+
+        stats = store.aggregate(profiles)
+        stats.stream = self.stdout
+        self.stdout.write(f"Aggregated {len(profiles)} profiles")
+        stats.sort_stats(options["sort"]).print_stats(options["limit"])
+        if options["output"]:
+            stats.dump_stats(options["output"])
+
+    def _sign(self, path):
+        if not path:
+            raise CommandError("A path is required to sign")
+
+        if not PROFILING_SECRET:
+            raise CommandError("PROFILING_SECRET is not set")
+
+        self.stdout.write(sign_profile_request(path))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from paytungan.app.di import injector
+from paytungan.app.split_bill.interfaces import ISplitBillAccessor
+
+
+class Command(BaseCommand):
+    help = "Recompute paid_amount, paid_count and total_count of split bills from their bills"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "split_bill_ids",
+            nargs="*",
+            type=int,
+            help="Only rebuild these split bills, all of them by default",
+        )
+
+    def handle(self, *args, **options):
+        split_bill_accessor = injector.get(ISplitBillAccessor)
+        with transaction.atomic():
+            updated = split_bill_accessor.rebuild_aggregates(
+                options["split_bill_ids"] or None
+            )
+
+        self.stdout.write(f"Rebuilt aggregates of {updated} split bills")
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from paytungan.app.base.constants import JOB_BATCH_SIZE, JOB_POLL_INTERVAL
+from paytungan.app.di import injector
+from paytungan.app.job.services import JobService
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (Xendit invoice and payout creation)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are due then exit, instead of polling forever",
+        )
+        parser.add_argument("--batch-size", type=int, default=JOB_BATCH_SIZE)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=JOB_POLL_INTERVAL,
+            help="Seconds to wait when no job is due",
+        )
+
+    def handle(self, *args, **options):
+        job_service = injector.get(JobService)
+        while True:
+            close_old_connections()
+            result = job_service.run_pending(options["batch_size"])
+            if result.total:
+                self.stdout.write(
+                    f"Ran {result.total} jobs: {result.done} done,"
+                    f" {result.retried} retried, {result.failed} failed"
+                )
+
+            if options["once"] and result.total < options["batch_size"]:
+                return
+
+            if not result.total:
+                time.sleep(options["poll_interval"])
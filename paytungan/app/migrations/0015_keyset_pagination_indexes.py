@@ -0,0 +1,31 @@
+# Generated by Django 3.2.8 on 2026-10-17 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0014_alter_user_email"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="index_bill_user_keyset"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="index_payment_keyset"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="splitbill",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="index_split_bill_keyset"
+            ),
+        ),
+    ]
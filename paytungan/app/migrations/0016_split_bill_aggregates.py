@@ -0,0 +1,55 @@
+# Generated by Django 3.2.8 on 2026-10-17 19:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_split_bill_aggregates(apps, schema_editor):
+    Bill = apps.get_model("app", "Bill")
+    SplitBill = apps.get_model("app", "SplitBill")
+
+    bills = (
+        Bill.objects.filter(split_bill_id=OuterRef("pk"), deleted__isnull=True)
+        .filter(~Q(user_id=OuterRef("user_fund_id")))
+        .order_by()
+        .values("split_bill_id")
+    )
+    paid_bills = bills.filter(status="PAID")
+    SplitBill.objects.update(
+        paid_amount=Coalesce(
+            Subquery(paid_bills.annotate(total=Sum("amount")).values("total")), 0
+        ),
+        paid_count=Coalesce(
+            Subquery(paid_bills.annotate(total=Count("id")).values("total")), 0
+        ),
+        total_count=Coalesce(
+            Subquery(bills.annotate(total=Count("id")).values("total")), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0015_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="splitbill",
+            name="paid_amount",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="splitbill",
+            name="paid_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="splitbill",
+            name="total_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_split_bill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.8 on 2026-10-17 19:03
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0016_split_bill_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="XenditCallbackEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("deleted", models.DateTimeField(editable=False, null=True)),
+                ("created_at", models.DateTimeField(default=datetime.datetime.now)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("event_id", models.CharField(max_length=256)),
+                ("callback_type", models.CharField(max_length=16)),
+                ("reference_no", models.CharField(max_length=256)),
+                ("status", models.CharField(max_length=32)),
+            ],
+            options={
+                "db_table": "xendit_callback_event",
+            },
+        ),
+        migrations.AddField(
+            model_name="splitbill",
+            name="payout_status",
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="xenditcallbackevent",
+            constraint=models.UniqueConstraint(
+                fields=("event_id",), name="unique_xendit_callback_event_id"
+            ),
+        ),
+    ]
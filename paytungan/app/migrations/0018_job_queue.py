@@ -0,0 +1,63 @@
+# Generated by Django 3.2.8 on 2026-10-17 19:14
+
+import datetime
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_invoice_status(apps, schema_editor):
+    # Payments before the job queue got their invoice in the request, no job will
+    # create the invoice of the ones without
+    Payment = apps.get_model("app", "Payment")
+    Payment.objects.filter(reference_no__isnull=False).update(invoice_status="CREATED")
+    Payment.objects.filter(reference_no__isnull=True).update(invoice_status="FAILED")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0017_xendit_callback_events"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("deleted", models.DateTimeField(editable=False, null=True)),
+                ("created_at", models.DateTimeField(default=datetime.datetime.now)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("job_type", models.CharField(max_length=32)),
+                ("payload", models.JSONField(default=dict)),
+                ("status", models.CharField(default="PENDING", max_length=16)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("max_attempts", models.PositiveIntegerField(default=1)),
+                ("run_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "job",
+            },
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="invoice_status",
+            field=models.CharField(default="QUEUED", max_length=16),
+        ),
+        migrations.RunPython(backfill_invoice_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["status", "run_at"], name="index_job_status_run_at"
+            ),
+        ),
+    ]
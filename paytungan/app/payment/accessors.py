@@ -1,24 +1,68 @@
-from typing import List, Optional
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import httpx
 from injector import inject
 from xendit import Xendit, Invoice, Payout
+from xendit.network.xendit_response import XenditResponse
 from xendit.xendit_error import XenditError
 
+from paytungan.app.common.cache import CacheStats, LRUCache
 from paytungan.app.common.exceptions import NotFoundException
+from paytungan.app.common.instrumentation import external_call
+from paytungan.app.common.http import (
+    AsyncPooledHttpClient,
+    HttpClientStats,
+    PooledHttpClient,
+)
+from paytungan.app.common.pagination import CursorPage, KeysetPagination
 from paytungan.app.common.utils import ObjectMapperUtil
-from paytungan.app.base.constants import XENDIT_API_KEY
+from paytungan.app.base.constants import (
+    XENDIT_API_KEY,
+    XENDIT_BASE_URL,
+    XENDIT_HTTP_BACKOFF_FACTOR,
+    XENDIT_HTTP_CONNECT_TIMEOUT,
+    XENDIT_HTTP_MAX_RETRIES,
+    XENDIT_HTTP_POOL_SIZE,
+    XENDIT_HTTP_READ_TIMEOUT,
+    XENDIT_INVOICE_CACHE_MAX_SIZE,
+    XENDIT_INVOICE_CACHE_TTL,
+    XENDIT_INVOICE_FINAL_CACHE_TTL,
+    XENDIT_MAX_WORKERS,
+    BillStatus,
+    InvoiceStatus,
+    PaymentStatus,
+)
 from paytungan.app.logging.interface import ILoggingProvider
-from paytungan.app.split_bill.models import Bill
+from paytungan.app.split_bill.models import Bill, SplitBill
 from .specs import (
+    CreateXenditCallbackEventSpec,
     CreateXenditInvoiceSpec,
     CreateXenditPayoutSpec,
     GetPaymentListSpec,
     InvoiceDomain,
+    MarkBillPaidResult,
+    MarkBillPaidSpec,
     PaymentDomain,
     PayoutDomain,
     UpdatePaymentSpec,
 )
-from .interfaces import IPaymentAccessor, IXenditProvider
-from .models import Payment
+from .interfaces import (
+    IAsyncXenditProvider,
+    IPaymentAccessor,
+    IXenditCallbackEventAccessor,
+    IXenditProvider,
+)
+from .models import Payment, XenditCallbackEvent
+
+# Name of Xendit calls in request metrics
+XENDIT_CALL_NAME = "xendit"
 
 
 class PaymentAccessor(IPaymentAccessor):
@@ -39,16 +83,34 @@ class PaymentAccessor(IPaymentAccessor):
         return self._convert_to_domain(payment)
 
     def get_list(self, spec: GetPaymentListSpec) -> List[Payment]:
-        queryset = Payment.objects.all()
+        queryset = Payment.objects.annotate(bill_amount=F("bill__amount"))
 
-        if spec.bill_ids:
+        # Payments of the listed bills are returned along with the user's own
+        if spec.user_id and spec.bill_ids:
+            queryset = queryset.filter(
+                Q(bill__user_id=spec.user_id) | Q(bill_id__in=spec.bill_ids)
+            )
+        elif spec.user_id:
+            queryset = queryset.filter(bill__user_id=spec.user_id)
+        elif spec.bill_ids:
             queryset = queryset.filter(bill_id__in=spec.bill_ids)
 
+        if spec.payment_ids:
+            queryset = queryset.filter(id__in=spec.payment_ids)
+
         if spec.status:
             queryset = queryset.filter(status=spec.status)
 
+        if spec.eager_loading:
+            queryset = spec.eager_loading.apply(queryset)
+
         return queryset
 
+    def get_page(self, spec: GetPaymentListSpec) -> CursorPage[Payment]:
+        pagination = KeysetPagination()
+        queryset = pagination.apply(self.get_list(spec), spec.cursor, spec.limit)
+        return pagination.build_page(queryset, spec.limit)
+
     def create(self, obj: PaymentDomain) -> PaymentDomain:
         payment = self._convert_to_model(obj=obj, is_create=True)
         payment.save()
@@ -60,6 +122,52 @@ class PaymentAccessor(IPaymentAccessor):
 
         return self._convert_to_domain(payment)
 
+    def delete(self, id: int) -> None:
+        Payment.objects.filter(pk=id).delete()
+
+    def mark_bill_paid(self, spec: MarkBillPaidSpec) -> MarkBillPaidResult:
+        """
+        Mark a payment and its bill paid with conditional UPDATEs instead of a read
+        and save, so concurrent or repeated calls only change each row once.
+        """
+        time_now = timezone.now()
+        if spec.payment_id:
+            payment_filter = Q(id=spec.payment_id)
+            bill_filter = Q(payment__id=spec.payment_id)
+        else:
+            payment_filter = Q(bill_id=spec.bill_id)
+            bill_filter = Q(id=spec.bill_id)
+
+        payment_fields = {"status": PaymentStatus.PAID.value, "updated_at": time_now}
+        if spec.paid_at:
+            payment_fields["paid_at"] = spec.paid_at
+        if spec.method:
+            payment_fields["method"] = spec.method
+
+        payment_count = (
+            Payment.objects.filter(payment_filter)
+            .exclude(status=PaymentStatus.PAID.value)
+            .update(**payment_fields)
+        )
+        bill_count = (
+            Bill.objects.filter(bill_filter)
+            .exclude(status=BillStatus.PAID.value)
+            .update(status=BillStatus.PAID.value, updated_at=time_now)
+        )
+
+        # Only the call that actually paid the bill adds it to the split bill
+        if bill_count:
+            paid_bill = Bill.objects.filter(bill_filter)
+            split_bills = SplitBill.objects.filter(
+                id=Subquery(paid_bill.values("split_bill_id")[:1])
+            ).exclude(user_fund_id=Subquery(paid_bill.values("user_id")[:1]))
+            split_bills.update(
+                paid_amount=F("paid_amount") + Subquery(paid_bill.values("amount")[:1]),
+                paid_count=F("paid_count") + 1,
+            )
+
+        return MarkBillPaidResult(payment_count=payment_count, bill_count=bill_count)
+
     @staticmethod
     def _convert_to_domain(obj: Payment) -> PaymentDomain:
         return ObjectMapperUtil.map(obj, PaymentDomain)
@@ -74,6 +182,7 @@ class PaymentAccessor(IPaymentAccessor):
             reference_no=obj.reference_no,
             paid_at=obj.paid_at,
             expiry_date=obj.expiry_date,
+            invoice_status=obj.invoice_status,
             **ObjectMapperUtil.default_model_creation_params(),
         )
 
@@ -83,53 +192,191 @@ class PaymentAccessor(IPaymentAccessor):
         return [self._convert_to_model(obj, is_create) for obj in objects]
 
 
+class XenditCallbackEventAccessor(IXenditCallbackEventAccessor):
+    def create(self, spec: CreateXenditCallbackEventSpec) -> bool:
+        """
+        Record a callback event, returns False when the event id was already recorded
+        """
+        try:
+            # Savepoint, so a duplicate does not break the caller's transaction
+            with transaction.atomic():
+                XenditCallbackEvent.objects.create(
+                    event_id=spec.event_id,
+                    callback_type=spec.callback_type,
+                    reference_no=spec.reference_no,
+                    status=spec.status,
+                    **ObjectMapperUtil.default_model_creation_params(),
+                )
+        except IntegrityError:
+            return False
+
+        return True
+
+
+class XenditInvoiceCache:
+    """
+    Invoices by id, shared by XenditProvider and AsyncXenditProvider so an
+    invalidation from either one is seen by both.
+    """
+
+    def __init__(self) -> None:
+        self._cache: LRUCache[InvoiceDomain] = LRUCache(
+            max_size=XENDIT_INVOICE_CACHE_MAX_SIZE, name="xendit_invoice"
+        )
+
+    def get(self, invoice_id: str) -> Optional[InvoiceDomain]:
+        return self._cache.get(invoice_id)
+
+    def set(self, invoice: InvoiceDomain) -> None:
+        self._cache.set(invoice.id, invoice, ttl=self._get_invoice_ttl(invoice))
+
+    def delete(self, invoice_id: str) -> None:
+        self._cache.delete(invoice_id)
+
+    def get_stats(self) -> CacheStats:
+        return self._cache.stats
+
+    @staticmethod
+    def _get_invoice_ttl(invoice: InvoiceDomain) -> float:
+        """
+        Final invoices are kept longer, pending ones never outlive their expiry_date
+        """
+        if invoice.status in (
+            InvoiceStatus.PAID.value,
+            InvoiceStatus.SETTLED.value,
+            InvoiceStatus.EXPIRED.value,
+        ):
+            return XENDIT_INVOICE_FINAL_CACHE_TTL
+
+        expiry_date = XenditInvoiceCache._to_datetime(invoice.expiry_date)
+        if not expiry_date:
+            return XENDIT_INVOICE_CACHE_TTL
+
+        seconds_to_expiry = (expiry_date - timezone.now()).total_seconds()
+        return min(XENDIT_INVOICE_CACHE_TTL, seconds_to_expiry)
+
+    @staticmethod
+    def _to_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+        if isinstance(value, str):
+            return parse_datetime(value)
+
+        return value
+
+
 class XenditProvider(IXenditProvider):
     @inject
-    def __init__(self, logger: ILoggingProvider) -> None:
+    def __init__(
+        self, logger: ILoggingProvider, invoice_cache: XenditInvoiceCache
+    ) -> None:
         self.logger = logger
         self._client = None
+        self._executor = None
+        self._http_client = PooledHttpClient(
+            pool_size=XENDIT_HTTP_POOL_SIZE,
+            timeout=(XENDIT_HTTP_CONNECT_TIMEOUT, XENDIT_HTTP_READ_TIMEOUT),
+            max_retries=XENDIT_HTTP_MAX_RETRIES,
+            backoff_factor=XENDIT_HTTP_BACKOFF_FACTOR,
+        )
+        self._invoice_cache = invoice_cache
 
     def _get_client(self):
         if self._client is not None:
             return self._client
 
-        self._client = Xendit(api_key=XENDIT_API_KEY)
+        self._client = Xendit(
+            api_key=XENDIT_API_KEY,
+            base_url=XENDIT_BASE_URL,
+            http_client=self._http_client,
+        )
         return self._client
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is not None:
+            return self._executor
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=XENDIT_MAX_WORKERS, thread_name_prefix="xendit"
+        )
+        return self._executor
+
     def get_invoice(self, invoice_id: str) -> Optional[InvoiceDomain]:
+        cached_invoice = self._invoice_cache.get(invoice_id)
+        if cached_invoice:
+            return cached_invoice
+
         client = self._get_client()
 
         try:
-            invoice = client.Invoice.get(
-                invoice_id=invoice_id,
-            )
+            with external_call(XENDIT_CALL_NAME):
+                invoice = client.Invoice.get(
+                    invoice_id=invoice_id,
+                )
         except XenditError:
             self.logger.warning(f"Invoice with id: {invoice_id} is not found.")
             return None
 
-        return self._convert_invoice_domain(invoice)
+        result = self._convert_invoice_domain(invoice)
+        self._invoice_cache.set(result)
+        return result
+
+    def get_invoices(
+        self, invoice_ids: List[str]
+    ) -> Dict[str, Optional[InvoiceDomain]]:
+        """
+        Get invoices concurrently, bounded by XENDIT_MAX_WORKERS.
+        Duplicate and empty ids are dropped, missing invoices are mapped to None.
+        """
+        unique_ids = list(dict.fromkeys(filter(None, invoice_ids)))
+        if len(unique_ids) <= 1:
+            return {
+                invoice_id: self.get_invoice(invoice_id) for invoice_id in unique_ids
+            }
+
+        # Each task runs in a copy of the caller's context, so calls are recorded
+        # in the metrics of the current request
+        contexts = [contextvars.copy_context() for _ in unique_ids]
+        invoices = self._get_executor().map(
+            lambda context, invoice_id: context.run(self.get_invoice, invoice_id),
+            contexts,
+            unique_ids,
+        )
+        return dict(zip(unique_ids, invoices))
 
     def create_invoice(self, spec: CreateXenditInvoiceSpec) -> InvoiceDomain:
         client = self._get_client()
-        invoice = client.Invoice.create(
-            external_id=spec.external_id,
-            amount=spec.amount,
-            payer_email=spec.payer_email,
-            description=spec.description,
-            should_send_email=True,
-            success_redirect_url=spec.success_redirect_url,
-            failure_redirect_url=spec.failure_redirect_url,
-        )
+        with external_call(XENDIT_CALL_NAME):
+            invoice = client.Invoice.create(
+                external_id=spec.external_id,
+                amount=spec.amount,
+                payer_email=spec.payer_email,
+                description=spec.description,
+                should_send_email=True,
+                success_redirect_url=spec.success_redirect_url,
+                failure_redirect_url=spec.failure_redirect_url,
+            )
+
+        result = self._convert_invoice_domain(invoice)
+        self._invoice_cache.set(result)
+        return result
+
+    def invalidate_invoice(self, invoice_id: str) -> None:
+        if invoice_id:
+            self._invoice_cache.delete(invoice_id)
+
+    def get_invoice_cache_stats(self) -> CacheStats:
+        return self._invoice_cache.get_stats()
 
-        return self._convert_invoice_domain(invoice)
+    def get_http_stats(self) -> HttpClientStats:
+        return self._http_client.get_stats()
 
     def get_payout(self, payout_id: str) -> Optional[PayoutDomain]:
         client = self._get_client()
 
         try:
-            payout = client.Payout.get(
-                id=payout_id,
-            )
+            with external_call(XENDIT_CALL_NAME):
+                payout = client.Payout.get(
+                    id=payout_id,
+                )
         except XenditError:
             self.logger.warning(f"Payout with id: {payout_id} is not found.")
             return None
@@ -138,11 +385,12 @@ class XenditProvider(IXenditProvider):
 
     def create_payout(self, spec: CreateXenditPayoutSpec) -> PayoutDomain:
         client = self._get_client()
-        payout = client.Payout.create(
-            external_id=spec.external_id,
-            amount=spec.amount,
-            email=spec.email,
-        )
+        with external_call(XENDIT_CALL_NAME):
+            payout = client.Payout.create(
+                external_id=spec.external_id,
+                amount=spec.amount,
+                email=spec.email,
+            )
 
         return self._convert_payout_domain(payout)
 
@@ -153,3 +401,141 @@ class XenditProvider(IXenditProvider):
     @staticmethod
     def _convert_payout_domain(obj: Payout) -> PayoutDomain:
         return ObjectMapperUtil.map(vars(obj), PayoutDomain)
+
+
+class AsyncXenditProvider(IAsyncXenditProvider):
+    """
+    XenditProvider for async views, calling the invoice and payout endpoints with an
+    AsyncPooledHttpClient instead of xendit-python's blocking client.
+    """
+
+    @inject
+    def __init__(
+        self, logger: ILoggingProvider, invoice_cache: XenditInvoiceCache
+    ) -> None:
+        self.logger = logger
+        self._invoice_cache = invoice_cache
+        self._http_client = AsyncPooledHttpClient(
+            base_url=XENDIT_BASE_URL,
+            auth=(XENDIT_API_KEY or "", ""),
+            pool_size=XENDIT_HTTP_POOL_SIZE,
+            timeout=(XENDIT_HTTP_CONNECT_TIMEOUT, XENDIT_HTTP_READ_TIMEOUT),
+            max_retries=XENDIT_HTTP_MAX_RETRIES,
+            backoff_factor=XENDIT_HTTP_BACKOFF_FACTOR,
+        )
+
+    async def get_invoice(self, invoice_id: str) -> Optional[InvoiceDomain]:
+        if not invoice_id:
+            return None
+
+        cached_invoice = self._invoice_cache.get(invoice_id)
+        if cached_invoice:
+            return cached_invoice
+
+        response = await self._request("GET", f"v2/invoices/{invoice_id}")
+        if response.status_code != 200:
+            self.logger.warning(f"Invoice with id: {invoice_id} is not found.")
+            return None
+
+        result = ObjectMapperUtil.map(response.json(), InvoiceDomain)
+        self._invoice_cache.set(result)
+        return result
+
+    async def get_invoices(
+        self, invoice_ids: List[str]
+    ) -> Dict[str, Optional[InvoiceDomain]]:
+        """
+        Get invoices concurrently, bounded by the connection pool size.
+        Duplicate and empty ids are dropped, missing invoices are mapped to None.
+        """
+        unique_ids = list(dict.fromkeys(filter(None, invoice_ids)))
+        invoices = await asyncio.gather(
+            *(self.get_invoice(invoice_id) for invoice_id in unique_ids)
+        )
+        return dict(zip(unique_ids, invoices))
+
+    async def create_invoice(self, spec: CreateXenditInvoiceSpec) -> InvoiceDomain:
+        body = await self._post(
+            "v2/invoices",
+            {
+                "external_id": spec.external_id,
+                "amount": spec.amount,
+                "payer_email": spec.payer_email,
+                "description": spec.description,
+                "should_send_email": True,
+                "success_redirect_url": spec.success_redirect_url,
+                "failure_redirect_url": spec.failure_redirect_url,
+            },
+        )
+
+        result = ObjectMapperUtil.map(body, InvoiceDomain)
+        self._invoice_cache.set(result)
+        return result
+
+    def invalidate_invoice(self, invoice_id: str) -> None:
+        if invoice_id:
+            self._invoice_cache.delete(invoice_id)
+
+    async def get_payout(self, payout_id: str) -> Optional[PayoutDomain]:
+        if not payout_id:
+            return None
+
+        response = await self._request("GET", f"payouts/{payout_id}")
+        if response.status_code != 200:
+            self.logger.warning(f"Payout with id: {payout_id} is not found.")
+            return None
+
+        return ObjectMapperUtil.map(response.json(), PayoutDomain)
+
+    async def create_payout(self, spec: CreateXenditPayoutSpec) -> PayoutDomain:
+        body = await self._post(
+            "payouts",
+            {
+                "external_id": spec.external_id,
+                "amount": spec.amount,
+                "email": spec.email,
+            },
+        )
+
+        return ObjectMapperUtil.map(body, PayoutDomain)
+
+    def get_http_stats(self) -> HttpClientStats:
+        return self._http_client.get_stats()
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        with external_call(XENDIT_CALL_NAME):
+            return await self._http_client.request(method, url, **kwargs)
+
+    async def _post(self, url: str, body: dict) -> dict:
+        response = await self._request(
+            "POST",
+            url,
+            json={key: value for key, value in body.items() if value is not None},
+        )
+        if response.status_code != 200:
+            # Same error as xendit-python raises for the blocking provider
+            raise XenditError(
+                XenditResponse(
+                    response.status_code,
+                    response.headers,
+                    self._get_error_body(response),
+                )
+            )
+
+        return response.json()
+
+    @staticmethod
+    def _get_error_body(response: httpx.Response) -> dict:
+        """
+        Xendit errors are JSON with an error_code and a message. Other responses (e.g.
+        a proxy's HTML 502) are wrapped in one, with the raw text as the message.
+        """
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+
+        if isinstance(body, dict) and "error_code" in body and "message" in body:
+            return body
+
+        return {"error_code": "UNEXPECTED_RESPONSE_ERROR", "message": response.text}
@@ -1,13 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional
 from xendit.models.invoice import Invoice
 
+from paytungan.app.common.pagination import CursorPage
 from .models import Payment
 from .specs import (
+    CreateXenditCallbackEventSpec,
     CreateXenditInvoiceSpec,
     CreateXenditPayoutSpec,
     GetPaymentListSpec,
     InvoiceDomain,
+    MarkBillPaidResult,
+    MarkBillPaidSpec,
     PaymentDomain,
     PayoutDomain,
     UpdatePaymentSpec,
@@ -23,6 +27,10 @@ class IPaymentAccessor(ABC):
     def get_list(self, spec: GetPaymentListSpec) -> List[Payment]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_page(self, spec: GetPaymentListSpec) -> CursorPage[Payment]:
+        raise NotImplementedError
+
     @abstractmethod
     def create(self, obj: PaymentDomain) -> PaymentDomain:
         raise NotImplementedError
@@ -35,6 +43,20 @@ class IPaymentAccessor(ABC):
     def get_by_bill_id(self, bill_id: int) -> Optional[PaymentDomain]:
         raise NotImplementedError
 
+    @abstractmethod
+    def mark_bill_paid(self, spec: MarkBillPaidSpec) -> MarkBillPaidResult:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, id: int) -> None:
+        raise NotImplementedError
+
+
+class IXenditCallbackEventAccessor(ABC):
+    @abstractmethod
+    def create(self, spec: CreateXenditCallbackEventSpec) -> bool:
+        raise NotImplementedError
+
 
 class IXenditProvider(ABC):
     @abstractmethod
@@ -45,6 +67,16 @@ class IXenditProvider(ABC):
     def get_invoice(self, invoice_id: str) -> Optional[InvoiceDomain]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_invoices(
+        self, invoice_ids: List[str]
+    ) -> Dict[str, Optional[InvoiceDomain]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate_invoice(self, invoice_id: str) -> None:
+        raise NotImplementedError
+
     @abstractmethod
     def create_payout(self, spec: CreateXenditPayoutSpec) -> PayoutDomain:
         raise NotImplementedError
@@ -52,3 +84,31 @@ class IXenditProvider(ABC):
     @abstractmethod
     def get_payout(self, payout_id: str) -> Optional[PayoutDomain]:
         raise NotImplementedError
+
+
+class IAsyncXenditProvider(ABC):
+    @abstractmethod
+    async def create_invoice(self, spec: CreateXenditInvoiceSpec) -> InvoiceDomain:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_invoice(self, invoice_id: str) -> Optional[InvoiceDomain]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_invoices(
+        self, invoice_ids: List[str]
+    ) -> Dict[str, Optional[InvoiceDomain]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate_invoice(self, invoice_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_payout(self, spec: CreateXenditPayoutSpec) -> PayoutDomain:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_payout(self, payout_id: str) -> Optional[PayoutDomain]:
+        raise NotImplementedError
@@ -1,7 +1,7 @@
 from django.db import models
 from django.db.models import Q
 
-from paytungan.app.base.constants import PaymentStatus
+from paytungan.app.base.constants import PaymentInvoiceStatus, PaymentStatus
 from paytungan.app.base.models import BaseModel
 from paytungan.app.split_bill.models import Bill
 
@@ -18,9 +18,18 @@ class Payment(BaseModel):
     reference_no = models.CharField(max_length=256, blank=True, null=True)
     paid_at = models.DateTimeField(blank=True, null=True)
     expiry_date = models.DateTimeField(blank=True, null=True)
+    invoice_status = models.CharField(
+        max_length=16, default=PaymentInvoiceStatus.QUEUED.value
+    )
 
     class Meta:
         db_table = "payment"
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="index_payment_keyset",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["bill_id"],
@@ -39,4 +48,29 @@ class Payment(BaseModel):
 
     @property
     def amount(self) -> int:
+        # Querysets annotated with bill_amount avoid fetching the bill per payment
+        if hasattr(self, "bill_amount"):
+            return self.bill_amount
+
         return self.bill.amount
+
+
+class XenditCallbackEvent(BaseModel):
+    """Xendit callbacks already handled, keyed by event id so retries are no-ops."""
+
+    event_id = models.CharField(max_length=256)
+    callback_type = models.CharField(max_length=16)
+    reference_no = models.CharField(max_length=256)
+    status = models.CharField(max_length=32)
+
+    class Meta:
+        db_table = "xendit_callback_event"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event_id"],
+                name="unique_xendit_callback_event_id",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{str(self.id)} - {str(self.event_id)}"
@@ -1,8 +1,19 @@
 from injector import Binder, Module, singleton
 
-from .interfaces import IPaymentAccessor, IXenditProvider
-from .accessors import PaymentAccessor, XenditProvider
-from .services import PaymentService
+from .interfaces import (
+    IAsyncXenditProvider,
+    IPaymentAccessor,
+    IXenditCallbackEventAccessor,
+    IXenditProvider,
+)
+from .accessors import (
+    AsyncXenditProvider,
+    PaymentAccessor,
+    XenditCallbackEventAccessor,
+    XenditInvoiceCache,
+    XenditProvider,
+)
+from .services import AsyncPaymentService, PaymentService
 
 
 class PaymentModule(Module):
@@ -10,3 +21,11 @@ class PaymentModule(Module):
         binder.bind(IPaymentAccessor, to=PaymentAccessor, scope=singleton)
         binder.bind(PaymentService, to=PaymentService, scope=singleton)
         binder.bind(IXenditProvider, to=XenditProvider, scope=singleton)
+        binder.bind(AsyncPaymentService, to=AsyncPaymentService, scope=singleton)
+        binder.bind(IAsyncXenditProvider, to=AsyncXenditProvider, scope=singleton)
+        binder.bind(XenditInvoiceCache, to=XenditInvoiceCache, scope=singleton)
+        binder.bind(
+            IXenditCallbackEventAccessor,
+            to=XenditCallbackEventAccessor,
+            scope=singleton,
+        )
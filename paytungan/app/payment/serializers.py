@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from paytungan.app.base.serializers import CursorPaginationRequest
+from paytungan.app.common.serializers import ReadOnlySerializer
 from paytungan.app.common.utils import EnumUtil
 from paytungan.app.split_bill.serializers import BillSerializer
 
@@ -8,7 +10,7 @@ class GetPaymentRequest(serializers.Serializer):
     id = serializers.IntegerField(min_value=1)
 
 
-class XenditInvoiceSerializers(serializers.Serializer):
+class XenditInvoiceSerializers(ReadOnlySerializer):
     description = serializers.CharField()
     invoice_url = serializers.CharField()
     payment_method = serializers.CharField(required=False)
@@ -22,7 +24,7 @@ class XenditInvoiceSerializers(serializers.Serializer):
     failure_redirect_url = serializers.CharField(required=False)
 
 
-class XenditPayoutSerializers(serializers.Serializer):
+class XenditPayoutSerializers(ReadOnlySerializer):
     id = serializers.CharField()
     external_id = serializers.CharField()
     amount = serializers.IntegerField()
@@ -33,13 +35,14 @@ class XenditPayoutSerializers(serializers.Serializer):
     payout_url = serializers.CharField()
 
 
-class PaymentSerializers(serializers.Serializer):
+class PaymentSerializers(ReadOnlySerializer):
     id = serializers.IntegerField(min_value=1)
     bill_id = serializers.IntegerField(min_value=1)
     status = serializers.CharField()
     method = serializers.CharField()
     reference_no = serializers.CharField()
     expiry_date = serializers.DateTimeField()
+    invoice_status = serializers.CharField()
     paid_at = serializers.DateTimeField()
     number = serializers.CharField()
     amount = serializers.IntegerField()
@@ -49,21 +52,23 @@ class PaymentSerializers(serializers.Serializer):
     invoice = XenditInvoiceSerializers()
 
 
-class FilteredPaymentSerializers(serializers.Serializer):
+class FilteredPaymentSerializers(ReadOnlySerializer):
     id = serializers.IntegerField(min_value=1)
     bill_id = serializers.IntegerField(min_value=1)
     status = serializers.CharField()
     method = serializers.CharField()
     reference_no = serializers.CharField()
     expiry_date = serializers.DateTimeField()
+    invoice_status = serializers.CharField()
     paid_at = serializers.DateTimeField()
     number = serializers.CharField()
     amount = serializers.IntegerField()
+    payment_url = serializers.CharField(required=False)
     created_at = serializers.DateTimeField()
     updated_at = serializers.DateTimeField()
 
 
-class GetPaymentResponse(serializers.Serializer):
+class GetPaymentResponse(ReadOnlySerializer):
     data = PaymentSerializers()
 
 
@@ -73,7 +78,7 @@ class CreatePaymentRequest(serializers.Serializer):
     failure_redirect_url = serializers.CharField(required=False)
 
 
-class CreatePaymentResponse(serializers.Serializer):
+class CreatePaymentResponse(ReadOnlySerializer):
     data = PaymentSerializers()
 
 
@@ -81,12 +86,12 @@ class UpdateStatusRequest(serializers.Serializer):
     bill_id = serializers.IntegerField(min_value=1)
 
 
-class PaymentWithBillDomain(serializers.Serializer):
+class PaymentWithBillDomain(ReadOnlySerializer):
     payment = PaymentSerializers()
     bill = BillSerializer()
 
 
-class UpdateStatusResponse(serializers.Serializer):
+class UpdateStatusResponse(ReadOnlySerializer):
     data = PaymentWithBillDomain()
 
 
@@ -94,7 +99,7 @@ class GetPaymentByBillIdRequest(serializers.Serializer):
     bill_id = serializers.IntegerField(min_value=1)
 
 
-class GetPaymentByBillIdResponse(serializers.Serializer):
+class GetPaymentByBillIdResponse(ReadOnlySerializer):
     data = PaymentSerializers()
 
 
@@ -102,7 +107,7 @@ class GetPayoutRequest(serializers.Serializer):
     split_bill_id = serializers.IntegerField(min_value=1)
 
 
-class GetPayoutResponse(serializers.Serializer):
+class GetPayoutResponse(ReadOnlySerializer):
     data = XenditPayoutSerializers()
 
 
@@ -110,17 +115,42 @@ class CreatePayoutRequest(serializers.Serializer):
     split_bill_id = serializers.IntegerField(min_value=1)
 
 
-class CreatePayoutResponse(serializers.Serializer):
+class CreatePayoutResponse(ReadOnlySerializer):
     data = XenditPayoutSerializers()
 
 
-class GetPaymentListRequest(serializers.Serializer):
+class GetPaymentListRequest(CursorPaginationRequest):
     bill_ids = serializers.ListField(
         child=serializers.IntegerField(min_value=1), required=False, default=[]
     )
     user_id = serializers.IntegerField(min_value=1, required=False)
     status = serializers.CharField(required=False)
+    with_payment_url = serializers.BooleanField(default=False)
 
 
-class GetPaymentListResponse(serializers.Serializer):
+class GetPaymentListResponse(ReadOnlySerializer):
     data = FilteredPaymentSerializers(many=True)
+    next_cursor = serializers.CharField(allow_null=True)
+
+
+class XenditInvoiceCallbackRequest(serializers.Serializer):
+    id = serializers.CharField()
+    external_id = serializers.CharField()
+    status = serializers.CharField()
+    payment_method = serializers.CharField(required=False, allow_null=True)
+    paid_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class XenditPayoutCallbackRequest(serializers.Serializer):
+    id = serializers.CharField()
+    external_id = serializers.CharField()
+    status = serializers.CharField()
+
+
+class XenditCallbackResultSerializer(ReadOnlySerializer):
+    event_id = serializers.CharField()
+    processed = serializers.BooleanField()
+
+
+class XenditCallbackResponse(ReadOnlySerializer):
+    data = XenditCallbackResultSerializer()
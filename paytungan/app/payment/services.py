@@ -1,14 +1,34 @@
-from typing import List, Optional
+from dataclasses import asdict
+from typing import Dict, List, Optional, Union
+from asgiref.sync import sync_to_async
 from injector import inject
-from datetime import datetime, timedelta
+from datetime import timedelta
+from django.db import transaction
 from django.utils import timezone
 import pytz
 
 from paytungan.app.auth.specs import UserDomain
-from paytungan.app.base.constants import BillStatus
+from paytungan.app.base.constants import (
+    JOB_QUEUE_ENABLED,
+    BillStatus,
+    InvoiceStatus,
+    JobType,
+    PaymentInvoiceStatus,
+    PaymentStatus,
+    XenditCallbackType,
+)
+from paytungan.app.base.specs import EagerLoadingPlan
 from paytungan.app.common.exceptions import NotFoundException, ValidationErrorException
+from paytungan.app.common.pagination import CursorPage
 from paytungan.app.common.utils import DateUtil, ObjectMapperUtil
-from paytungan.app.payment.interfaces import IPaymentAccessor, IXenditProvider
+from paytungan.app.job.interfaces import IJobAccessor
+from paytungan.app.job.specs import EnqueueJobSpec
+from paytungan.app.payment.interfaces import (
+    IAsyncXenditProvider,
+    IPaymentAccessor,
+    IXenditCallbackEventAccessor,
+    IXenditProvider,
+)
 from paytungan.app.payment.models import Payment
 from paytungan.app.payment.specs import (
     CreateInvoicePaymentResult,
@@ -16,21 +36,27 @@ from paytungan.app.payment.specs import (
     CreatePaymentSpec,
     CreatePayoutResult,
     CreatePayoutSpec,
+    CreateXenditCallbackEventSpec,
     CreateXenditInvoiceSpec,
     CreateXenditPayoutSpec,
     GetPaymentListSpec,
+    InvoiceDomain,
+    MarkBillPaidSpec,
     PaymentDomain,
     PayoutDomain,
     UpdatePaymentSpec,
     UpdateStatusSpec,
     PaymentWithBillDomain,
+    XenditCallbackResult,
+    XenditInvoiceCallbackSpec,
+    XenditPayoutCallbackSpec,
 )
 from paytungan.app.split_bill.specs import (
-    GetBillListSpec,
-    UpdateBillSpec,
+    BillDomain,
     UpdateSplitBillSpec,
 )
 from paytungan.app.split_bill.interfaces import IBillAccessor, ISplitBillAccessor
+from paytungan.app.split_bill.models import SplitBill
 
 
 class PaymentService:
@@ -41,33 +67,43 @@ class PaymentService:
         xendit_provider: IXenditProvider,
         bill_accessor: IBillAccessor,
         split_bill_accessor: ISplitBillAccessor,
+        callback_event_accessor: IXenditCallbackEventAccessor,
+        job_accessor: IJobAccessor,
     ) -> None:
         self.payment_accessor = payment_accessor
         self.xendit_provider = xendit_provider
         self.bill_accessor = bill_accessor
         self.split_bill_accessor = split_bill_accessor
+        self.callback_event_accessor = callback_event_accessor
+        self.job_accessor = job_accessor
 
     def get_payment(self, payment_id: int) -> Optional[PaymentDomain]:
-        time_now = timezone.now()
         payment = self.payment_accessor.get(payment_id)
 
         if not payment:
             return None
 
+        # Paid status comes from the invoice callback, nothing left to ask Xendit
+        if payment.status == PaymentStatus.PAID.value:
+            return payment
+
+        # The invoice job gave up, retry it like an expired invoice is renewed
+        if payment.invoice_status == PaymentInvoiceStatus.FAILED.value:
+            return self.retry_invoice(payment)
+
+        # The invoice is still queued
+        if payment.invoice_status != PaymentInvoiceStatus.CREATED.value:
+            return payment
+
         invoice = self.xendit_provider.get_invoice(payment.reference_no)
         if not invoice:
             raise ValidationErrorException(
                 f"Payment with id: {payment.id} have no invoice."
             )
 
-        if not payment.expiry_date or payment.expiry_date < time_now:
+        if self._is_invoice_expired(payment):
             result = self.create_invoice_for_payment(
-                CreateInvoicePaymentSpec(
-                    payment_id=payment.id,
-                    payer_email=invoice.payer_email,
-                    success_redirect_url=invoice.success_redirect_url,
-                    failure_redirect_url=invoice.failure_redirect_url,
-                )
+                self._build_renew_invoice_spec(payment, invoice)
             )
             payment = result.payment
             invoice = result.invoice
@@ -80,22 +116,37 @@ class PaymentService:
     def get_payment_by_bill_id(self, payment_bill_id: int) -> List[PaymentDomain]:
         return self.payment_accessor.get_by_bill_id(payment_bill_id)
 
-    def get_payment_list(self, spec: GetPaymentListSpec) -> List[Payment]:
-        bills = self.bill_accessor.get_list(
-            GetBillListSpec(
-                user_ids=[spec.user_id],
-            )
-        )
-        if not bills:
-            return []
+    def get_payment_list(
+        self, spec: GetPaymentListSpec
+    ) -> CursorPage[Union[Payment, PaymentDomain]]:
+        if not spec.user_id:
+            return CursorPage()
 
-        bill_ids = [bill.id for bill in bills]
-        spec.bill_ids.extend(bill_ids)
+        page = self.payment_accessor.get_page(spec)
+        if not spec.with_payment_url:
+            return page
 
-        return self.payment_accessor.get_list(spec)
+        invoices = self.xendit_provider.get_invoices(
+            [payment.reference_no for payment in page.results]
+        )
+        return self._attach_payment_urls(page, invoices)
 
     def create_payment(
         self, spec: CreatePaymentSpec, user: UserDomain
+    ) -> PaymentDomain:
+        payment = self.create_pending_payment(spec, user)
+        invoice_payment_spec = self._build_invoice_payment_spec(payment, spec, user)
+
+        if JOB_QUEUE_ENABLED:
+            self.enqueue_invoice(invoice_payment_spec)
+            return payment
+
+        result = self.create_invoice_for_payment(invoice_payment_spec)
+
+        return result.payment
+
+    def create_pending_payment(
+        self, spec: CreatePaymentSpec, user: UserDomain
     ) -> PaymentDomain:
         bill = self.bill_accessor.get(spec.bill_id)
 
@@ -110,88 +161,220 @@ class PaymentService:
         if bill.status == BillStatus.PAID.value:
             raise ValidationErrorException("Bill already been paid")
 
-        payment = self.payment_accessor.create(
+        return self.payment_accessor.create(
             PaymentDomain(
                 bill_id=spec.bill_id,
                 **ObjectMapperUtil.default_domain_creation_params(),
             )
         )
 
-        result = self.create_invoice_for_payment(
-            CreateInvoicePaymentSpec(
-                payment_id=payment.id,
-                payer_email=user.email,
-                success_redirect_url=spec.success_redirect_url,
-                failure_redirect_url=spec.failure_redirect_url,
-            )
-        )
-
-        return result.payment
-
     def update_status(self, spec: UpdateStatusSpec) -> Optional[PaymentWithBillDomain]:
+        self.payment_accessor.mark_bill_paid(MarkBillPaidSpec(bill_id=spec.bill_id))
+
         payment_spec = GetPaymentListSpec(
             bill_ids=list([spec.bill_id]),
+            eager_loading=EagerLoadingPlan(select_related=("bill", "bill__user")),
         )
-        payment = self.payment_accessor.get_list(payment_spec)
+        payments = list(self.payment_accessor.get_list(payment_spec))
+        if not payments:
+            raise NotFoundException(
+                f"Payment of bill with id: {spec.bill_id} not found"
+            )
 
-        obj_payment = payment[0]
-        obj_payment.status = "PAID"
-        obj_payment.updated_at = datetime.utcnow()
+        payment = payments[0]
+        self.xendit_provider.invalidate_invoice(payment.reference_no)
 
-        update_payment_spec = UpdatePaymentSpec(
-            obj=obj_payment, updated_fields=["status", "updated_at"]
+        return PaymentWithBillDomain(
+            payment=ObjectMapperUtil.map(payment, PaymentDomain),
+            bill=ObjectMapperUtil.map(payment.bill, BillDomain),
         )
-        payment = self.payment_accessor.update(update_payment_spec)
-
-        obj_bill = obj_payment.bill
-        obj_bill.status = "PAID"
-        obj_bill.updated_at = datetime.utcnow()
 
-        update_bill_spec = UpdateBillSpec(
-            obj=obj_bill, updated_fields=["status", "updated_at"]
+    def handle_invoice_callback(
+        self, spec: XenditInvoiceCallbackSpec
+    ) -> XenditCallbackResult:
+        is_new_event = self.callback_event_accessor.create(
+            CreateXenditCallbackEventSpec(
+                event_id=spec.event_id,
+                callback_type=XenditCallbackType.INVOICE.value,
+                reference_no=spec.invoice_id,
+                status=spec.status,
+            )
         )
-        bill = self.bill_accessor.update(update_bill_spec)
+        if not is_new_event:
+            return XenditCallbackResult(event_id=spec.event_id, processed=False)
+
+        self.xendit_provider.invalidate_invoice(spec.invoice_id)
+        if spec.status not in [
+            InvoiceStatus.PAID.value,
+            InvoiceStatus.SETTLED.value,
+        ]:
+            return XenditCallbackResult(event_id=spec.event_id, processed=True)
+
+        # Invoices are created with the payment id as external_id
+        if spec.external_id.isdigit():
+            self.payment_accessor.mark_bill_paid(
+                MarkBillPaidSpec(
+                    payment_id=int(spec.external_id),
+                    paid_at=spec.paid_at,
+                    method=spec.payment_method,
+                )
+            )
 
-        return PaymentWithBillDomain(
-            payment=payment,
-            bill=bill,
+        return XenditCallbackResult(event_id=spec.event_id, processed=True)
+
+    def handle_payout_callback(
+        self, spec: XenditPayoutCallbackSpec
+    ) -> XenditCallbackResult:
+        is_new_event = self.callback_event_accessor.create(
+            CreateXenditCallbackEventSpec(
+                event_id=spec.event_id,
+                callback_type=XenditCallbackType.PAYOUT.value,
+                reference_no=spec.payout_id,
+                status=spec.status,
+            )
+        )
+        if not is_new_event:
+            return XenditCallbackResult(event_id=spec.event_id, processed=False)
+
+        # Payouts are created with the split bill id as external_id
+        split_bill = (
+            self.split_bill_accessor.get(int(spec.external_id))
+            if spec.external_id.isdigit()
+            else None
         )
 
+        # Callbacks of a payout replaced by a newer one are ignored
+        if split_bill and split_bill.payout_reference_no == spec.payout_id:
+            split_bill.payout_status = spec.status
+            split_bill.updated_at = timezone.now()
+            self.split_bill_accessor.update(
+                UpdateSplitBillSpec(
+                    obj=split_bill, updated_fields=["payout_status", "updated_at"]
+                )
+            )
+
+        return XenditCallbackResult(event_id=spec.event_id, processed=True)
+
     def create_invoice_for_payment(
         self, spec: CreateInvoicePaymentSpec
     ) -> CreateInvoicePaymentResult:
-        payment = self.payment_accessor.get(spec.payment_id)
+        payment = self.get_payment_for_invoice(spec.payment_id)
+        return self._create_invoice(payment, spec)
+
+    def enqueue_invoice(self, spec: CreateInvoicePaymentSpec) -> None:
+        """
+        Defer the invoice of a payment to the job worker. The job is only picked up
+        once the caller's transaction commits.
+        """
+        self.job_accessor.enqueue(
+            EnqueueJobSpec(job_type=JobType.CREATE_INVOICE.value, payload=asdict(spec))
+        )
+
+    def run_create_invoice_job(self, payload: dict) -> None:
+        spec = CreateInvoicePaymentSpec(**payload)
+        payment = self.get_payment_for_invoice(spec.payment_id)
+
+        # Retry of a job whose invoice was already saved, or paid in the meantime
+        if (
+            payment.invoice_status == PaymentInvoiceStatus.CREATED.value
+            or payment.status == PaymentStatus.PAID.value
+        ):
+            return
+
+        self._create_invoice(payment, spec)
+
+    def fail_create_invoice_job(self, payload: dict) -> None:
+        payment = self.payment_accessor.get(payload["payment_id"])
+        if not payment or payment.invoice_status != PaymentInvoiceStatus.QUEUED.value:
+            return
+
+        payment.invoice_status = PaymentInvoiceStatus.FAILED.value
+        payment.updated_at = timezone.now()
+        self.payment_accessor.update(
+            UpdatePaymentSpec(payment, updated_fields=["invoice_status", "updated_at"])
+        )
+
+    def retry_invoice(self, payment: PaymentDomain) -> PaymentDomain:
+        spec = self.get_retry_invoice_spec(payment)
+
+        if JOB_QUEUE_ENABLED:
+            return self.requeue_invoice(payment, spec)
+
+        result = self.create_invoice_for_payment(spec)
+
+        return result.payment
+
+    def get_retry_invoice_spec(
+        self, payment: PaymentDomain
+    ) -> CreateInvoicePaymentSpec:
+        """
+        The redirect urls of the failed attempt only lived in its job payload, the
+        retried invoice is created without them.
+        """
+        bill = self.bill_accessor.get(payment.bill_id)
+        if not bill:
+            raise NotFoundException(f"Bill object with id: {payment.bill_id} not found")
+
+        return CreateInvoicePaymentSpec(
+            payment_id=payment.id, payer_email=bill.user.email
+        )
+
+    def requeue_invoice(
+        self, payment: PaymentDomain, spec: CreateInvoicePaymentSpec
+    ) -> PaymentDomain:
+        payment.invoice_status = PaymentInvoiceStatus.QUEUED.value
+        payment.updated_at = timezone.now()
+        self.payment_accessor.update(
+            UpdatePaymentSpec(payment, updated_fields=["invoice_status", "updated_at"])
+        )
+        self.enqueue_invoice(spec)
+
+        return payment
+
+    def _create_invoice(
+        self, payment: PaymentDomain, spec: CreateInvoicePaymentSpec
+    ) -> CreateInvoicePaymentResult:
+        invoice = self.xendit_provider.create_invoice(
+            self._build_xendit_invoice_spec(payment, spec)
+        )
+
+        self.xendit_provider.invalidate_invoice(payment.reference_no)
+        return self.save_payment_invoice(payment, invoice)
+
+    def get_payment_for_invoice(self, payment_id: int) -> PaymentDomain:
+        payment = self.payment_accessor.get(payment_id)
 
         if not payment:
             raise ValidationErrorException(
-                f"Cant create invoice for payment_id: {spec.payment_id}"
+                f"Cant create invoice for payment_id: {payment_id}"
             )
 
-        invoice = self.xendit_provider.create_invoice(
-            CreateXenditInvoiceSpec(
-                external_id=str(payment.id),
-                amount=payment.amount,
-                payer_email=spec.payer_email,
-                description=payment.number,
-                success_redirect_url=spec.success_redirect_url,
-                failure_redirect_url=spec.failure_redirect_url,
-            )
-        )
+        return payment
 
+    def save_payment_invoice(
+        self, payment: PaymentDomain, invoice: InvoiceDomain
+    ) -> CreateInvoicePaymentResult:
         payment.reference_no = invoice.id
         payment.expiry_date = invoice.expiry_date
+        payment.invoice_status = PaymentInvoiceStatus.CREATED.value
         payment.updated_at = timezone.now()
         payment.invoice = invoice
         payment.payment_url = invoice.invoice_url
         self.payment_accessor.update(
             UpdatePaymentSpec(
-                payment, updated_fields=["reference_no", "expiry_date", "updated_at"]
+                payment,
+                updated_fields=[
+                    "reference_no",
+                    "expiry_date",
+                    "invoice_status",
+                    "updated_at",
+                ],
             )
         )
 
         return CreateInvoicePaymentResult(payment=payment, invoice=invoice)
 
-    def get_or_create_payout(self, spec: CreatePayoutSpec) -> PayoutDomain:
+    def get_or_create_payout(self, spec: CreatePayoutSpec) -> Optional[PayoutDomain]:
         payout = self.get_payout(spec.split_bill_id)
         if payout:
             return payout
@@ -199,55 +382,76 @@ class PaymentService:
         return self.create_payout(spec)
 
     def get_payout(self, split_bill_id: int) -> Optional[PayoutDomain]:
-        split_bill = self.split_bill_accessor.get(split_bill_id)
-
-        if not split_bill:
-            raise ValidationErrorException(
-                f"Cant get payout for split_bill: {split_bill_id}"
-            )
+        split_bill = self.get_split_bill_for_payout(
+            split_bill_id, f"Cant get payout for split_bill: {split_bill_id}"
+        )
 
         if not split_bill.payout_reference_no:
             return None
 
         return self.xendit_provider.get_payout(split_bill.payout_reference_no)
 
-    def create_payout(self, spec: CreatePayoutSpec) -> PayoutDomain:
-        time_now = timezone.now()
-        split_bill = self.split_bill_accessor.get(spec.split_bill_id)
-
-        if not split_bill:
-            raise ValidationErrorException(
-                f"Cant create payout for split_bill: {spec.split_bill_id}"
-            )
+    def create_payout(self, spec: CreatePayoutSpec) -> Optional[PayoutDomain]:
+        """
+        Create the payout of a split bill. With the job queue enabled the payout is
+        created by the job worker and None is returned.
+        """
+        split_bill = self.get_split_bill_for_payout(
+            spec.split_bill_id,
+            f"Cant create payout for split_bill: {spec.split_bill_id}",
+        )
 
         payout = self.xendit_provider.get_payout(split_bill.payout_reference_no)
-        if payout and DateUtil.transform_str_to_datetime(
-            payout.expiration_timestamp
-        ) > time_now - timedelta(hours=2):
-            raise ValidationErrorException(
-                f"Split_bill: {spec.split_bill_id} already have payout"
-            )
+        self._validate_no_active_payout(spec, payout)
 
-        bills = self.bill_accessor.get_list(
-            GetBillListSpec(split_bill_ids=[split_bill.id])
+        if JOB_QUEUE_ENABLED:
+            self.enqueue_payout(split_bill)
+            return None
+
+        payout = self.xendit_provider.create_payout(
+            self._build_xendit_payout_spec(split_bill)
+        )
+
+        self.save_split_bill_payout(split_bill, payout)
+        return payout
+
+    def enqueue_payout(self, split_bill: SplitBill) -> None:
+        self.job_accessor.enqueue(
+            EnqueueJobSpec(
+                job_type=JobType.CREATE_PAYOUT.value,
+                payload={"split_bill_id": split_bill.id},
+            )
         )
-        amount_paid = sum(
-            [
-                bill.amount
-                for bill in bills
-                if bill.status == BillStatus.PAID.value
-                and bill.user_id != split_bill.user_fund_id
-            ]
+
+    def run_create_payout_job(self, payload: dict) -> None:
+        split_bill_id = payload["split_bill_id"]
+        split_bill = self.get_split_bill_for_payout(
+            split_bill_id, f"Cant create payout for split_bill: {split_bill_id}"
         )
 
+        # Created by an earlier attempt of the job, or another request
+        payout = self.xendit_provider.get_payout(split_bill.payout_reference_no)
+        if self._is_payout_active(payout):
+            return
+
         payout = self.xendit_provider.create_payout(
-            CreateXenditPayoutSpec(
-                external_id=str(split_bill.id),
-                amount=amount_paid,
-                email=split_bill.user_fund_email,
-            )
+            self._build_xendit_payout_spec(split_bill)
         )
+        self.save_split_bill_payout(split_bill, payout)
 
+    def get_split_bill_for_payout(
+        self, split_bill_id: int, error_message: str
+    ) -> SplitBill:
+        split_bill = self.split_bill_accessor.get(split_bill_id)
+
+        if not split_bill:
+            raise ValidationErrorException(error_message)
+
+        return split_bill
+
+    def save_split_bill_payout(
+        self, split_bill: SplitBill, payout: PayoutDomain
+    ) -> None:
         split_bill.payout_reference_no = payout.id
         split_bill.updated_at = timezone.now()
         self.split_bill_accessor.update(
@@ -256,4 +460,255 @@ class PaymentService:
             )
         )
 
+    @staticmethod
+    def _build_invoice_payment_spec(
+        payment: PaymentDomain, spec: CreatePaymentSpec, user: UserDomain
+    ) -> CreateInvoicePaymentSpec:
+        return CreateInvoicePaymentSpec(
+            payment_id=payment.id,
+            payer_email=user.email,
+            success_redirect_url=spec.success_redirect_url,
+            failure_redirect_url=spec.failure_redirect_url,
+        )
+
+    @staticmethod
+    def _build_renew_invoice_spec(
+        payment: PaymentDomain, invoice: InvoiceDomain
+    ) -> CreateInvoicePaymentSpec:
+        return CreateInvoicePaymentSpec(
+            payment_id=payment.id,
+            payer_email=invoice.payer_email,
+            success_redirect_url=invoice.success_redirect_url,
+            failure_redirect_url=invoice.failure_redirect_url,
+        )
+
+    @staticmethod
+    def _build_xendit_invoice_spec(
+        payment: PaymentDomain, spec: CreateInvoicePaymentSpec
+    ) -> CreateXenditInvoiceSpec:
+        return CreateXenditInvoiceSpec(
+            external_id=str(payment.id),
+            amount=payment.amount,
+            payer_email=spec.payer_email,
+            description=payment.number,
+            success_redirect_url=spec.success_redirect_url,
+            failure_redirect_url=spec.failure_redirect_url,
+        )
+
+    @staticmethod
+    def _build_xendit_payout_spec(split_bill: SplitBill) -> CreateXenditPayoutSpec:
+        return CreateXenditPayoutSpec(
+            external_id=str(split_bill.id),
+            amount=split_bill.paid_amount,
+            email=split_bill.user_fund_email,
+        )
+
+    @staticmethod
+    def _is_invoice_expired(payment: PaymentDomain) -> bool:
+        return not payment.expiry_date or payment.expiry_date < timezone.now()
+
+    @staticmethod
+    def _is_payout_active(payout: Optional[PayoutDomain]) -> bool:
+        return bool(payout) and DateUtil.transform_str_to_datetime(
+            payout.expiration_timestamp
+        ) > timezone.now() - timedelta(hours=2)
+
+    @classmethod
+    def _validate_no_active_payout(
+        cls, spec: CreatePayoutSpec, payout: Optional[PayoutDomain]
+    ) -> None:
+        if cls._is_payout_active(payout):
+            raise ValidationErrorException(
+                f"Split_bill: {spec.split_bill_id} already have payout"
+            )
+
+    @staticmethod
+    def _attach_payment_urls(
+        page: CursorPage[Payment], invoices: Dict[str, Optional[InvoiceDomain]]
+    ) -> CursorPage[PaymentDomain]:
+        results = []
+        for payment in page.results:
+            payment_domain = ObjectMapperUtil.map(payment, PaymentDomain)
+            invoice = invoices.get(payment.reference_no)
+            payment_domain.payment_url = invoice.invoice_url if invoice else None
+            results.append(payment_domain)
+
+        return CursorPage(results=results, next_cursor=page.next_cursor)
+
+
+class AsyncPaymentService:
+    """
+    PaymentService for async views. Xendit is called through the async provider,
+    database work reuses PaymentService's accessor steps through sync_to_async, so
+    each step runs in its own transaction on the thread that owns the connection.
+    """
+
+    @inject
+    def __init__(
+        self,
+        payment_service: PaymentService,
+        payment_accessor: IPaymentAccessor,
+        xendit_provider: IAsyncXenditProvider,
+    ) -> None:
+        self.payment_service = payment_service
+        self.payment_accessor = payment_accessor
+        self.xendit_provider = xendit_provider
+
+    async def get_payment(self, payment_id: int) -> Optional[PaymentDomain]:
+        payment = await sync_to_async(self.payment_accessor.get)(payment_id)
+
+        if not payment:
+            return None
+
+        # Paid status comes from the invoice callback, nothing left to ask Xendit
+        if payment.status == PaymentStatus.PAID.value:
+            return payment
+
+        # The invoice job gave up, retry it like an expired invoice is renewed
+        if payment.invoice_status == PaymentInvoiceStatus.FAILED.value:
+            return await self.retry_invoice(payment)
+
+        # The invoice is still queued
+        if payment.invoice_status != PaymentInvoiceStatus.CREATED.value:
+            return payment
+
+        invoice = await self.xendit_provider.get_invoice(payment.reference_no)
+        if not invoice:
+            raise ValidationErrorException(
+                f"Payment with id: {payment.id} have no invoice."
+            )
+
+        if PaymentService._is_invoice_expired(payment):
+            result = await self.create_invoice_for_payment(
+                PaymentService._build_renew_invoice_spec(payment, invoice)
+            )
+            payment = result.payment
+            invoice = result.invoice
+
+        payment.invoice = invoice
+        payment.payment_url = invoice.invoice_url
+
+        return payment
+
+    async def get_payment_by_bill_id(self, payment_bill_id: int) -> List[PaymentDomain]:
+        return await sync_to_async(self.payment_service.get_payment_by_bill_id)(
+            payment_bill_id
+        )
+
+    async def get_payment_list(
+        self, spec: GetPaymentListSpec
+    ) -> CursorPage[Union[Payment, PaymentDomain]]:
+        if not spec.user_id:
+            return CursorPage()
+
+        page = await sync_to_async(self.payment_accessor.get_page)(spec)
+        if not spec.with_payment_url:
+            return page
+
+        invoices = await self.xendit_provider.get_invoices(
+            [payment.reference_no for payment in page.results]
+        )
+        return PaymentService._attach_payment_urls(page, invoices)
+
+    async def create_payment(
+        self, spec: CreatePaymentSpec, user: UserDomain
+    ) -> PaymentDomain:
+        if JOB_QUEUE_ENABLED:
+            return await sync_to_async(
+                transaction.atomic(self.payment_service.create_payment)
+            )(spec, user)
+
+        payment = await sync_to_async(
+            transaction.atomic(self.payment_service.create_pending_payment)
+        )(spec, user)
+
+        try:
+            result = await self.create_invoice_for_payment(
+                PaymentService._build_invoice_payment_spec(payment, spec, user)
+            )
+        except Exception:
+            # There is no request transaction to roll back, and a leftover pending
+            # payment would block new payments of the bill
+            await sync_to_async(self.payment_accessor.delete)(payment.id)
+            raise
+
+        return result.payment
+
+    async def update_status(
+        self, spec: UpdateStatusSpec
+    ) -> Optional[PaymentWithBillDomain]:
+        # The invoice cache is shared with the blocking provider, which invalidates it
+        return await sync_to_async(
+            transaction.atomic(self.payment_service.update_status)
+        )(spec)
+
+    async def retry_invoice(self, payment: PaymentDomain) -> PaymentDomain:
+        spec = await sync_to_async(self.payment_service.get_retry_invoice_spec)(payment)
+
+        if JOB_QUEUE_ENABLED:
+            return await sync_to_async(
+                transaction.atomic(self.payment_service.requeue_invoice)
+            )(payment, spec)
+
+        result = await self.create_invoice_for_payment(spec)
+
+        return result.payment
+
+    async def create_invoice_for_payment(
+        self, spec: CreateInvoicePaymentSpec
+    ) -> CreateInvoicePaymentResult:
+        payment = await sync_to_async(self.payment_service.get_payment_for_invoice)(
+            spec.payment_id
+        )
+
+        invoice = await self.xendit_provider.create_invoice(
+            PaymentService._build_xendit_invoice_spec(payment, spec)
+        )
+
+        self.xendit_provider.invalidate_invoice(payment.reference_no)
+        return await sync_to_async(self.payment_service.save_payment_invoice)(
+            payment, invoice
+        )
+
+    async def get_or_create_payout(
+        self, spec: CreatePayoutSpec
+    ) -> Optional[PayoutDomain]:
+        payout = await self.get_payout(spec.split_bill_id)
+        if payout:
+            return payout
+
+        return await self.create_payout(spec)
+
+    async def get_payout(self, split_bill_id: int) -> Optional[PayoutDomain]:
+        split_bill = await sync_to_async(
+            self.payment_service.get_split_bill_for_payout
+        )(split_bill_id, f"Cant get payout for split_bill: {split_bill_id}")
+
+        if not split_bill.payout_reference_no:
+            return None
+
+        return await self.xendit_provider.get_payout(split_bill.payout_reference_no)
+
+    async def create_payout(self, spec: CreatePayoutSpec) -> Optional[PayoutDomain]:
+        split_bill = await sync_to_async(
+            self.payment_service.get_split_bill_for_payout
+        )(
+            spec.split_bill_id,
+            f"Cant create payout for split_bill: {spec.split_bill_id}",
+        )
+
+        payout = await self.xendit_provider.get_payout(split_bill.payout_reference_no)
+        PaymentService._validate_no_active_payout(spec, payout)
+
+        if JOB_QUEUE_ENABLED:
+            await sync_to_async(self.payment_service.enqueue_payout)(split_bill)
+            return None
+
+        payout = await self.xendit_provider.create_payout(
+            PaymentService._build_xendit_payout_spec(split_bill)
+        )
+
+        await sync_to_async(self.payment_service.save_split_bill_payout)(
+            split_bill, payout
+        )
         return payout
@@ -3,16 +3,25 @@ from datetime import datetime
 from typing import List, Optional
 from xendit import Invoice
 
-from paytungan.app.base.constants import PaymentStatus
-from paytungan.app.base.specs import BaseDomain
+from paytungan.app.base.constants import (
+    PAGINATION_DEFAULT_LIMIT,
+    PaymentInvoiceStatus,
+    PaymentStatus,
+)
+from paytungan.app.base.specs import BaseDomain, EagerLoadingPlan
 from .models import Bill
 
 
 @dataclass
 class GetPaymentListSpec:
     bill_ids: List[int] = field(default_factory=list)
+    payment_ids: List[int] = field(default_factory=list)
     user_id: Optional[int] = None
     status: Optional[str] = None
+    with_payment_url: bool = False
+    eager_loading: Optional[EagerLoadingPlan] = None
+    cursor: Optional[str] = None
+    limit: int = PAGINATION_DEFAULT_LIMIT
 
 
 @dataclass
@@ -23,6 +32,7 @@ class PaymentDomain(BaseDomain):
     reference_no: Optional[str] = None
     paid_at: Optional[datetime] = None
     expiry_date: Optional[datetime] = None
+    invoice_status: str = PaymentInvoiceStatus.QUEUED.value
     amount: Optional[str] = None
     number: Optional[str] = None
     payment_url: Optional[str] = None
@@ -120,3 +130,50 @@ class CreatePayoutSpec:
 @dataclass
 class CreatePayoutResult:
     payout: PayoutDomain
+
+
+@dataclass
+class MarkBillPaidSpec:
+    # Exactly one of bill_id and payment_id identifies the bill
+    bill_id: Optional[int] = None
+    payment_id: Optional[int] = None
+    paid_at: Optional[datetime] = None
+    method: Optional[str] = None
+
+
+@dataclass
+class MarkBillPaidResult:
+    payment_count: int
+    bill_count: int
+
+
+@dataclass
+class XenditInvoiceCallbackSpec:
+    event_id: str
+    invoice_id: str
+    external_id: str
+    status: str
+    payment_method: Optional[str] = None
+    paid_at: Optional[datetime] = None
+
+
+@dataclass
+class XenditPayoutCallbackSpec:
+    event_id: str
+    payout_id: str
+    external_id: str
+    status: str
+
+
+@dataclass
+class CreateXenditCallbackEventSpec:
+    event_id: str
+    callback_type: str
+    reference_no: str
+    status: str
+
+
+@dataclass
+class XenditCallbackResult:
+    event_id: str
+    processed: bool
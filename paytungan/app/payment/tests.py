@@ -1,22 +1,57 @@
+import asyncio
+import json
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+from asgiref.sync import sync_to_async
+from django.test import TestCase as DjangoTestCase
 from django.utils import timezone
 from typing import Optional
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
+import httpx
 from faker import Faker
+from xendit import XenditError
 
+from paytungan.app.auth.models import User
+from paytungan.app.auth.specs import UserDomain
 from paytungan.app.auth.tests import TestAuthService
 from paytungan.app.base.constants import BillStatus
-from paytungan.app.common.exceptions import NotFoundException, ValidationErrorException
-from paytungan.app.payment.services import PaymentService
+from paytungan.app.common.http import AsyncPooledHttpClient
+from paytungan.app.common.pagination import CursorPage
+from paytungan.app.common.utils import ObjectMapperUtil
+from paytungan.app.common.exceptions import (
+    NotFoundException,
+    UnauthorizedError,
+    ValidationErrorException,
+)
+from paytungan.app.payment.accessors import (
+    AsyncXenditProvider,
+    PaymentAccessor,
+    XenditCallbackEventAccessor,
+    XenditInvoiceCache,
+    XenditProvider,
+)
+from paytungan.app.payment.models import Payment, XenditCallbackEvent
+from paytungan.app.payment.serializers import GetPaymentListResponse
+from paytungan.app.payment.services import AsyncPaymentService, PaymentService
 from paytungan.app.payment.specs import (
     CreateInvoicePaymentSpec,
     CreatePaymentSpec,
+    CreatePayoutSpec,
+    CreateXenditCallbackEventSpec,
+    CreateXenditInvoiceSpec,
+    CreateXenditPayoutSpec,
     GetPaymentListSpec,
     InvoiceDomain,
+    MarkBillPaidSpec,
     PaymentDomain,
     UpdateStatusSpec,
+    XenditInvoiceCallbackSpec,
+    XenditPayoutCallbackSpec,
 )
+from paytungan.app.payment.utils import get_callback_event_id, xendit_callback_auth
+from paytungan.app.split_bill.models import Bill, SplitBill
+from paytungan.app.split_bill.specs import BillDomain
 from paytungan.app.split_bill.tests import TestSplitBillService
 
 
@@ -26,11 +61,15 @@ class TestPaymentService(TestCase):
         self.xendit_provider = MagicMock()
         self.bill_accessor = MagicMock()
         self.split_bill_accessor = MagicMock()
+        self.callback_event_accessor = MagicMock()
+        self.job_accessor = MagicMock()
         self.payment_service = PaymentService(
             payment_accessor=self.payment_accessor,
             xendit_provider=self.xendit_provider,
             bill_accessor=self.bill_accessor,
             split_bill_accessor=self.split_bill_accessor,
+            callback_event_accessor=self.callback_event_accessor,
+            job_accessor=self.job_accessor,
         )
 
     @staticmethod
@@ -45,6 +84,7 @@ class TestPaymentService(TestCase):
             created_at=time_now,
             bill_id=bill_id or fake.pyint(),
             expiry_date=time_now + timedelta(days=1),
+            invoice_status="CREATED",
         )
 
     @staticmethod
@@ -73,6 +113,16 @@ class TestPaymentService(TestCase):
 
         self.assertEqual(payment.invoice, fake_invoice)
 
+    def test_get_payment_paid_without_xendit(self) -> None:
+        fake_payment = self._get_payment_dummy(3009)
+        fake_payment.status = "PAID"
+        self.payment_accessor.get.return_value = fake_payment
+
+        payment = self.payment_service.get_payment(fake_payment.id)
+
+        self.assertEqual(payment, fake_payment)
+        self.xendit_provider.get_invoice.assert_not_called()
+
     def test_get_payment_empty(self) -> None:
         self.payment_accessor.get.return_value = None
         payment = self.payment_service.get_payment(1)
@@ -113,14 +163,33 @@ class TestPaymentService(TestCase):
 
         self.assertTrue(1)
 
+    def test_get_list_payment_with_payment_url(self) -> None:
+        seed = 3008
+        fake_payment = self._get_payment_dummy(seed)
+        fake_payment.reference_no = "invoice-id"
+        fake_invoice = self._get_invoice_dummy(seed)
+        spec = GetPaymentListSpec(user_id=1, with_payment_url=True)
+
+        self.payment_accessor.get_page.return_value = CursorPage(
+            results=[fake_payment], next_cursor="cursor"
+        )
+        self.xendit_provider.get_invoices.return_value = {"invoice-id": fake_invoice}
+
+        page = self.payment_service.get_payment_list(spec)
+
+        self.xendit_provider.get_invoices.assert_called_once_with(["invoice-id"])
+        self.assertEqual(page.results[0].payment_url, fake_invoice.invoice_url)
+        self.assertEqual(page.next_cursor, "cursor")
+
     def test_get_list_payment_by_status(self) -> None:
         spec = GetPaymentListSpec(
             status="PAID",
         )
 
-        self.payment_service.get_payment_list(spec)
+        page = self.payment_service.get_payment_list(spec)
 
-        self.assertTrue(1)
+        self.assertEqual(page.results, [])
+        self.payment_accessor.get_page.assert_not_called()
 
     def test_create_payment_success(self):
         seed = 3004
@@ -141,6 +210,118 @@ class TestPaymentService(TestCase):
 
         self.assertEqual(payment.reference_no, invoice_dummy.id)
 
+    @patch("paytungan.app.payment.services.JOB_QUEUE_ENABLED", True)
+    def test_create_payment_queued(self):
+        seed = 3010
+        user_dummy = TestAuthService._get_user_dummy(seed)
+        bill_dummy = TestSplitBillService._get_bill_dummy(seed, user_id=user_dummy.id)
+        payment_dummy = self._get_payment_dummy(seed, bill_dummy.id)
+
+        self.bill_accessor.get.return_value = bill_dummy
+        self.payment_accessor.create.return_value = payment_dummy
+
+        payment = self.payment_service.create_payment(
+            CreatePaymentSpec(bill_id=bill_dummy.id), user_dummy
+        )
+
+        job_spec = self.job_accessor.enqueue.call_args.args[0]
+        self.assertEqual(payment, payment_dummy)
+        self.assertEqual(job_spec.job_type, "CREATE_INVOICE")
+        self.assertEqual(job_spec.payload["payment_id"], payment_dummy.id)
+        self.assertEqual(job_spec.payload["payer_email"], user_dummy.email)
+        self.xendit_provider.create_invoice.assert_not_called()
+
+    def test_get_payment_queued_invoice_without_xendit(self) -> None:
+        fake_payment = self._get_payment_dummy(3011)
+        fake_payment.invoice_status = "QUEUED"
+        self.payment_accessor.get.return_value = fake_payment
+
+        payment = self.payment_service.get_payment(fake_payment.id)
+
+        self.assertIsNone(payment.payment_url)
+        self.xendit_provider.get_invoice.assert_not_called()
+
+    def test_get_payment_failed_invoice_retried(self) -> None:
+        seed = 3020
+        user_dummy = TestAuthService._get_user_dummy(seed)
+        bill_dummy = TestSplitBillService._get_bill_dummy(seed, user_id=user_dummy.id)
+        bill_dummy.user = user_dummy
+        fake_payment = self._get_payment_dummy(seed, bill_dummy.id)
+        fake_payment.invoice_status = "FAILED"
+        fake_invoice = self._get_invoice_dummy(seed)
+
+        self.payment_accessor.get.return_value = fake_payment
+        self.bill_accessor.get.return_value = bill_dummy
+        self.xendit_provider.create_invoice.return_value = fake_invoice
+
+        payment = self.payment_service.get_payment(fake_payment.id)
+
+        xendit_spec = self.xendit_provider.create_invoice.call_args.args[0]
+        self.assertEqual(xendit_spec.payer_email, user_dummy.email)
+        self.assertEqual(payment.invoice_status, "CREATED")
+        self.assertEqual(payment.payment_url, fake_invoice.invoice_url)
+        self.xendit_provider.get_invoice.assert_not_called()
+
+    @patch("paytungan.app.payment.services.JOB_QUEUE_ENABLED", True)
+    def test_get_payment_failed_invoice_requeued(self) -> None:
+        seed = 3021
+        user_dummy = TestAuthService._get_user_dummy(seed)
+        bill_dummy = TestSplitBillService._get_bill_dummy(seed, user_id=user_dummy.id)
+        bill_dummy.user = user_dummy
+        fake_payment = self._get_payment_dummy(seed, bill_dummy.id)
+        fake_payment.invoice_status = "FAILED"
+
+        self.payment_accessor.get.return_value = fake_payment
+        self.bill_accessor.get.return_value = bill_dummy
+
+        payment = self.payment_service.get_payment(fake_payment.id)
+
+        job_spec = self.job_accessor.enqueue.call_args.args[0]
+        update_spec = self.payment_accessor.update.call_args.args[0]
+        self.assertEqual(payment.invoice_status, "QUEUED")
+        self.assertEqual(update_spec.updated_fields, ["invoice_status", "updated_at"])
+        self.assertEqual(job_spec.job_type, "CREATE_INVOICE")
+        self.assertEqual(job_spec.payload["payment_id"], fake_payment.id)
+        self.assertEqual(job_spec.payload["payer_email"], user_dummy.email)
+        self.xendit_provider.create_invoice.assert_not_called()
+
+    def test_run_create_invoice_job(self) -> None:
+        seed = 3012
+        fake_payment = self._get_payment_dummy(seed)
+        fake_payment.invoice_status = "QUEUED"
+        fake_invoice = self._get_invoice_dummy(seed)
+        self.payment_accessor.get.return_value = fake_payment
+        self.xendit_provider.create_invoice.return_value = fake_invoice
+
+        self.payment_service.run_create_invoice_job(
+            {"payment_id": fake_payment.id, "payer_email": "user@paytungan.com"}
+        )
+
+        update_spec = self.payment_accessor.update.call_args.args[0]
+        self.assertEqual(update_spec.obj.reference_no, fake_invoice.id)
+        self.assertEqual(update_spec.obj.invoice_status, "CREATED")
+        self.assertIn("invoice_status", update_spec.updated_fields)
+
+    def test_run_create_invoice_job_already_created(self) -> None:
+        fake_payment = self._get_payment_dummy(3013)
+        self.payment_accessor.get.return_value = fake_payment
+
+        self.payment_service.run_create_invoice_job(
+            {"payment_id": fake_payment.id, "payer_email": "user@paytungan.com"}
+        )
+
+        self.xendit_provider.create_invoice.assert_not_called()
+
+    def test_fail_create_invoice_job(self) -> None:
+        fake_payment = self._get_payment_dummy(3014)
+        fake_payment.invoice_status = "QUEUED"
+        self.payment_accessor.get.return_value = fake_payment
+
+        self.payment_service.fail_create_invoice_job({"payment_id": fake_payment.id})
+
+        update_spec = self.payment_accessor.update.call_args.args[0]
+        self.assertEqual(update_spec.obj.invoice_status, "FAILED")
+
     def test_create_payment_bill_not_found(self):
         spec = CreatePaymentSpec(
             bill_id=1,
@@ -183,8 +364,145 @@ class TestPaymentService(TestCase):
         spec = UpdateStatusSpec(
             bill_id=1,
         )
-        self.payment_service.update_status(spec)
-        assert True
+        bill = Bill(
+            id=1,
+            user=User(id=2, firebase_uid="uid", phone_number="+62"),
+            split_bill_id=3,
+            amount=10000,
+            status="PAID",
+        )
+        self.payment_accessor.get_list.return_value = [
+            Payment(id=5, bill=bill, status="PAID", reference_no="invoice-id")
+        ]
+
+        result = self.payment_service.update_status(spec)
+
+        self.payment_accessor.mark_bill_paid.assert_called_once_with(
+            MarkBillPaidSpec(bill_id=1)
+        )
+        self.assertIsInstance(result.payment, PaymentDomain)
+        self.assertIsInstance(result.bill, BillDomain)
+        self.assertEqual(result.payment.id, 5)
+        self.assertEqual(result.bill.id, 1)
+        self.xendit_provider.invalidate_invoice.assert_called_once_with("invoice-id")
+
+    def test_update_status_payment_not_found(self):
+        self.payment_accessor.get_list.return_value = []
+
+        with self.assertRaises(NotFoundException):
+            self.payment_service.update_status(UpdateStatusSpec(bill_id=1))
+
+    def test_handle_invoice_callback_paid(self):
+        self.callback_event_accessor.create.return_value = True
+        paid_at = timezone.now()
+
+        result = self.payment_service.handle_invoice_callback(
+            XenditInvoiceCallbackSpec(
+                event_id="event-id",
+                invoice_id="invoice-id",
+                external_id="5",
+                status="PAID",
+                payment_method="BANK_TRANSFER",
+                paid_at=paid_at,
+            )
+        )
+
+        self.assertTrue(result.processed)
+        self.payment_accessor.mark_bill_paid.assert_called_once_with(
+            MarkBillPaidSpec(payment_id=5, paid_at=paid_at, method="BANK_TRANSFER")
+        )
+        self.payment_accessor.get_list.assert_not_called()
+        self.xendit_provider.invalidate_invoice.assert_called_with("invoice-id")
+
+    def test_handle_invoice_callback_duplicate(self):
+        self.callback_event_accessor.create.return_value = False
+
+        result = self.payment_service.handle_invoice_callback(
+            XenditInvoiceCallbackSpec(
+                event_id="event-id",
+                invoice_id="invoice-id",
+                external_id="5",
+                status="PAID",
+            )
+        )
+
+        self.assertFalse(result.processed)
+        self.payment_accessor.mark_bill_paid.assert_not_called()
+
+    def test_handle_invoice_callback_expired(self):
+        self.callback_event_accessor.create.return_value = True
+
+        result = self.payment_service.handle_invoice_callback(
+            XenditInvoiceCallbackSpec(
+                event_id="event-id",
+                invoice_id="invoice-id",
+                external_id="5",
+                status="EXPIRED",
+            )
+        )
+
+        self.assertTrue(result.processed)
+        self.payment_accessor.mark_bill_paid.assert_not_called()
+        self.xendit_provider.invalidate_invoice.assert_called_once_with("invoice-id")
+
+    def test_handle_payout_callback(self):
+        split_bill = SplitBill(id=1, payout_reference_no="payout-id")
+        self.split_bill_accessor.get.return_value = split_bill
+        self.callback_event_accessor.create.return_value = True
+
+        stale = self.payment_service.handle_payout_callback(
+            XenditPayoutCallbackSpec(
+                event_id="stale-event-id",
+                payout_id="old-payout-id",
+                external_id="1",
+                status="VOIDED",
+            )
+        )
+        self.split_bill_accessor.update.assert_not_called()
+
+        result = self.payment_service.handle_payout_callback(
+            XenditPayoutCallbackSpec(
+                event_id="event-id",
+                payout_id="payout-id",
+                external_id="1",
+                status="COMPLETED",
+            )
+        )
+
+        self.assertTrue(stale.processed)
+        self.assertTrue(result.processed)
+        update_spec = self.split_bill_accessor.update.call_args.args[0]
+        self.assertEqual(update_spec.obj.payout_status, "COMPLETED")
+
+    def test_create_payout_use_paid_amount(self):
+        user_fund = User(id=1, email="fund@paytungan.com")
+        self.split_bill_accessor.get.return_value = SplitBill(
+            id=1, user_fund=user_fund, amount=30000, paid_amount=20000
+        )
+        self.xendit_provider.get_payout.return_value = None
+
+        self.payment_service.create_payout(CreatePayoutSpec(split_bill_id=1))
+
+        payout_spec = self.xendit_provider.create_payout.call_args.args[0]
+        self.assertEqual(payout_spec.amount, 20000)
+        self.assertEqual(payout_spec.email, "fund@paytungan.com")
+        self.bill_accessor.get_list.assert_not_called()
+
+    @patch("paytungan.app.payment.services.JOB_QUEUE_ENABLED", True)
+    def test_create_payout_queued(self):
+        user_fund = User(id=1, email="fund@paytungan.com")
+        self.split_bill_accessor.get.return_value = SplitBill(
+            id=1, user_fund=user_fund, amount=30000, paid_amount=20000
+        )
+        self.xendit_provider.get_payout.return_value = None
+
+        payout = self.payment_service.create_payout(CreatePayoutSpec(split_bill_id=1))
+
+        job_spec = self.job_accessor.enqueue.call_args.args[0]
+        self.assertIsNone(payout)
+        self.assertEqual(job_spec.job_type, "CREATE_PAYOUT")
+        self.assertEqual(job_spec.payload, {"split_bill_id": 1})
+        self.xendit_provider.create_payout.assert_not_called()
 
     def test_create_invoice_for_payment_success(self):
         seed = 3007
@@ -201,9 +519,13 @@ class TestPaymentService(TestCase):
             failure_redirect_url=fake_invoice.failure_redirect_url,
         )
 
+        old_reference_no = fake_payment.reference_no
         result = self.payment_service.create_invoice_for_payment(spec)
 
         self.assertEqual(result.payment.invoice, fake_invoice)
+        self.xendit_provider.invalidate_invoice.assert_called_once_with(
+            old_reference_no
+        )
 
     def test_create_invoice_for_payment_failed_payment_not_found(self):
         seed = 3007
@@ -225,3 +547,570 @@ class TestPaymentService(TestCase):
     def test_get_payment_by_bill_id(self) -> None:
         self.payment_service.get_payment_by_bill_id(1)
         assert True
+
+
+class TestXenditProvider(TestCase):
+    def setUp(self) -> None:
+        self.xendit_provider = XenditProvider(
+            logger=MagicMock(), invoice_cache=XenditInvoiceCache()
+        )
+
+    def test_get_invoices(self) -> None:
+        fake_invoices = {
+            "a": TestPaymentService._get_invoice_dummy(3101),
+            "b": None,
+        }
+
+        with patch.object(
+            self.xendit_provider, "get_invoice", side_effect=fake_invoices.get
+        ) as get_invoice:
+            invoices = self.xendit_provider.get_invoices(["a", "b", "a", None])
+
+        self.assertEqual(invoices, fake_invoices)
+        self.assertEqual(get_invoice.call_count, 2)
+
+    def test_get_invoices_empty(self) -> None:
+        self.assertEqual(self.xendit_provider.get_invoices([]), {})
+
+    def _mock_client_invoice(self, status: str, expiry_date: datetime) -> MagicMock:
+        client = MagicMock()
+        client.Invoice.get.return_value = SimpleNamespace(
+            id="invoice-id",
+            description="PAY/00001",
+            invoice_url="https://checkout.xendit.co/web/invoice-id",
+            expiry_date=expiry_date.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            status=status,
+            amount=10000,
+        )
+        self.xendit_provider._client = client
+        return client
+
+    def test_get_invoice_cached(self) -> None:
+        client = self._mock_client_invoice(
+            "PENDING", timezone.now() + timedelta(days=1)
+        )
+
+        first = self.xendit_provider.get_invoice("invoice-id")
+        second = self.xendit_provider.get_invoice("invoice-id")
+
+        self.assertEqual(first, second)
+        self.assertEqual(client.Invoice.get.call_count, 1)
+
+    def test_get_invoice_expired_pending_not_cached(self) -> None:
+        client = self._mock_client_invoice(
+            "PENDING", timezone.now() - timedelta(days=1)
+        )
+
+        self.xendit_provider.get_invoice("invoice-id")
+        self.xendit_provider.get_invoice("invoice-id")
+
+        self.assertEqual(client.Invoice.get.call_count, 2)
+
+    def test_get_invoice_paid_cached_after_expiry(self) -> None:
+        client = self._mock_client_invoice("PAID", timezone.now() - timedelta(days=1))
+
+        self.xendit_provider.get_invoice("invoice-id")
+        self.xendit_provider.get_invoice("invoice-id")
+
+        self.assertEqual(client.Invoice.get.call_count, 1)
+
+    def test_invalidate_invoice(self) -> None:
+        client = self._mock_client_invoice(
+            "PENDING", timezone.now() + timedelta(days=1)
+        )
+
+        self.xendit_provider.get_invoice("invoice-id")
+        self.xendit_provider.invalidate_invoice("invoice-id")
+        self.xendit_provider.get_invoice("invoice-id")
+
+        self.assertEqual(client.Invoice.get.call_count, 2)
+
+
+class TestAsyncXenditProvider(TestCase):
+    def setUp(self) -> None:
+        self.requests = []
+        self.xendit_provider = AsyncXenditProvider(
+            logger=MagicMock(), invoice_cache=XenditInvoiceCache()
+        )
+        self.xendit_provider._http_client = AsyncPooledHttpClient(
+            base_url="https://api.xendit.co/",
+            transport=httpx.MockTransport(self._handle),
+            backoff_factor=0,
+        )
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/v2/invoices/missing":
+            return httpx.Response(
+                404,
+                json={"error_code": "INVOICE_NOT_FOUND_ERROR", "message": "Not found"},
+            )
+
+        if request.method == "POST" and request.url.path == "/payouts":
+            return httpx.Response(
+                400,
+                json={"error_code": "API_VALIDATION_ERROR", "message": "Invalid"},
+            )
+
+        invoice_id = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(
+            200,
+            json={
+                "id": "created" if request.method == "POST" else invoice_id,
+                "description": "PAY/00001",
+                "invoice_url": f"https://checkout.xendit.co/web/{invoice_id}",
+                "expiry_date": (timezone.now() + timedelta(days=1)).strftime(
+                    "%Y-%m-%dT%H:%M:%S.%fZ"
+                ),
+                "status": "PENDING",
+                "amount": 10000,
+            },
+        )
+
+    def test_get_invoices(self) -> None:
+        invoices = asyncio.run(
+            self.xendit_provider.get_invoices(["a", "missing", "a", None])
+        )
+
+        self.assertEqual(set(invoices), {"a", "missing"})
+        self.assertEqual(invoices["a"].invoice_url, "https://checkout.xendit.co/web/a")
+        self.assertIsNone(invoices["missing"])
+        self.assertEqual(len(self.requests), 2)
+
+    def test_get_invoice_cached(self) -> None:
+        async def get_twice():
+            await self.xendit_provider.get_invoice("a")
+            return await self.xendit_provider.get_invoice("a")
+
+        invoice = asyncio.run(get_twice())
+
+        self.assertEqual(invoice.id, "a")
+        self.assertEqual(len(self.requests), 1)
+
+    def test_create_invoice(self) -> None:
+        invoice = asyncio.run(
+            self.xendit_provider.create_invoice(
+                CreateXenditInvoiceSpec(
+                    external_id="1",
+                    amount=10000,
+                    payer_email=None,
+                    description="PAY/00001",
+                )
+            )
+        )
+
+        body = json.loads(self.requests[0].content)
+        self.assertEqual(invoice.id, "created")
+        self.assertEqual(body["external_id"], "1")
+        self.assertNotIn("payer_email", body)
+
+    def test_create_payout_error(self) -> None:
+        with self.assertRaises(XenditError):
+            asyncio.run(
+                self.xendit_provider.create_payout(
+                    CreateXenditPayoutSpec(external_id="1", amount=10000, email="a@b.c")
+                )
+            )
+
+    def test_create_invoice_non_json_error(self) -> None:
+        self.xendit_provider._http_client = AsyncPooledHttpClient(
+            base_url="https://api.xendit.co/",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(502, text="<html>Bad Gateway</html>")
+            ),
+            max_retries=0,
+        )
+
+        with self.assertRaises(XenditError) as context:
+            asyncio.run(
+                self.xendit_provider.create_invoice(
+                    CreateXenditInvoiceSpec(
+                        external_id="1",
+                        amount=10000,
+                        payer_email=None,
+                        description="PAY/00001",
+                    )
+                )
+            )
+
+        self.assertEqual(context.exception.status_code, 502)
+        self.assertEqual(context.exception.error_code, "UNEXPECTED_RESPONSE_ERROR")
+        self.assertEqual(str(context.exception), "<html>Bad Gateway</html>")
+
+
+class TestAsyncPaymentService(TestCase):
+    def setUp(self) -> None:
+        self.payment_accessor = MagicMock()
+        self.bill_accessor = MagicMock()
+        self.xendit_provider = AsyncMock()
+        self.xendit_provider.invalidate_invoice = MagicMock()
+        self.async_payment_service = AsyncPaymentService(
+            payment_service=PaymentService(
+                payment_accessor=self.payment_accessor,
+                xendit_provider=MagicMock(),
+                bill_accessor=self.bill_accessor,
+                split_bill_accessor=MagicMock(),
+                callback_event_accessor=MagicMock(),
+                job_accessor=MagicMock(),
+            ),
+            payment_accessor=self.payment_accessor,
+            xendit_provider=self.xendit_provider,
+        )
+
+    def test_get_payment_success(self) -> None:
+        seed = 3301
+        fake_payment = TestPaymentService._get_payment_dummy(seed)
+        fake_invoice = TestPaymentService._get_invoice_dummy(seed)
+
+        self.payment_accessor.get.return_value = fake_payment
+        self.xendit_provider.get_invoice.return_value = fake_invoice
+        payment = asyncio.run(self.async_payment_service.get_payment(fake_payment.id))
+
+        self.assertEqual(payment.invoice, fake_invoice)
+        self.assertEqual(payment.payment_url, fake_invoice.invoice_url)
+
+    def test_get_payment_failed_invoice_retried(self) -> None:
+        seed = 3303
+        user_dummy = TestAuthService._get_user_dummy(seed)
+        bill_dummy = TestSplitBillService._get_bill_dummy(seed, user_id=user_dummy.id)
+        bill_dummy.user = user_dummy
+        fake_payment = TestPaymentService._get_payment_dummy(seed, bill_dummy.id)
+        fake_payment.invoice_status = "FAILED"
+        fake_invoice = TestPaymentService._get_invoice_dummy(seed)
+
+        self.payment_accessor.get.return_value = fake_payment
+        self.bill_accessor.get.return_value = bill_dummy
+        self.xendit_provider.create_invoice.return_value = fake_invoice
+
+        payment = asyncio.run(self.async_payment_service.get_payment(fake_payment.id))
+
+        self.assertEqual(payment.invoice_status, "CREATED")
+        self.assertEqual(payment.payment_url, fake_invoice.invoice_url)
+        self.xendit_provider.get_invoice.assert_not_called()
+
+    def test_create_payment_deletes_payment_without_invoice(self) -> None:
+        seed = 3302
+        user_dummy = TestAuthService._get_user_dummy(seed)
+        bill_dummy = TestSplitBillService._get_bill_dummy(seed, user_id=user_dummy.id)
+        payment_dummy = TestPaymentService._get_payment_dummy(seed, bill_dummy.id)
+
+        self.bill_accessor.get.return_value = bill_dummy
+        self.payment_accessor.create.return_value = payment_dummy
+        self.payment_accessor.get.return_value = payment_dummy
+        self.xendit_provider.create_invoice.side_effect = XenditError(MagicMock())
+
+        with self.assertRaises(XenditError):
+            asyncio.run(
+                self.async_payment_service.create_payment(
+                    CreatePaymentSpec(bill_id=bill_dummy.id), user_dummy
+                )
+            )
+
+        self.payment_accessor.delete.assert_called_once_with(payment_dummy.id)
+
+
+class TestPaymentAccessor(DjangoTestCase):
+    def setUp(self) -> None:
+        self.payment_accessor = PaymentAccessor()
+        user_fund = User.objects.create(firebase_uid="fund", phone_number="+62")
+        self.user = User.objects.create(firebase_uid="user", phone_number="+62")
+        self.bills = []
+        for index in range(5):
+            split_bill = SplitBill.objects.create(
+                name=f"split bill {index}", user_fund=user_fund, amount=20000
+            )
+            bill = Bill.objects.create(
+                user=self.user, split_bill=split_bill, amount=10000 + index
+            )
+            Payment.objects.create(bill=bill)
+            self.bills.append(bill)
+
+    def test_mark_bill_paid(self):
+        bill = self.bills[0]
+
+        # Payment, bill, then the split bill aggregates
+        with self.assertNumQueries(3):
+            result = self.payment_accessor.mark_bill_paid(
+                MarkBillPaidSpec(bill_id=bill.id)
+            )
+        with self.assertNumQueries(2):
+            repeated = self.payment_accessor.mark_bill_paid(
+                MarkBillPaidSpec(bill_id=bill.id)
+            )
+
+        bill.refresh_from_db()
+        split_bill = SplitBill.objects.get(pk=bill.split_bill_id)
+        self.assertEqual((result.payment_count, result.bill_count), (1, 1))
+        self.assertEqual((repeated.payment_count, repeated.bill_count), (0, 0))
+        self.assertEqual(bill.status, "PAID")
+        self.assertEqual(Payment.objects.get(bill=bill).status, "PAID")
+        self.assertEqual((split_bill.paid_amount, split_bill.paid_count), (10000, 1))
+        self.assertEqual(SplitBill.objects.filter(paid_count__gt=0).count(), 1)
+
+    def test_mark_bill_paid_by_payment_id(self):
+        bill = self.bills[1]
+        payment = Payment.objects.get(bill=bill)
+        paid_at = timezone.now()
+
+        result = self.payment_accessor.mark_bill_paid(
+            MarkBillPaidSpec(payment_id=payment.id, paid_at=paid_at, method="EWALLET")
+        )
+
+        payment.refresh_from_db()
+        bill.refresh_from_db()
+        self.assertEqual((result.payment_count, result.bill_count), (1, 1))
+        self.assertEqual(
+            (payment.status, payment.paid_at, payment.method),
+            ("PAID", paid_at, "EWALLET"),
+        )
+        self.assertEqual(bill.status, "PAID")
+        self.assertEqual(
+            SplitBill.objects.get(pk=bill.split_bill_id).paid_amount, 10001
+        )
+
+    def test_create_callback_event_idempotent(self):
+        callback_event_accessor = XenditCallbackEventAccessor()
+        spec = CreateXenditCallbackEventSpec(
+            event_id="event-id",
+            callback_type="INVOICE",
+            reference_no="invoice-id",
+            status="PAID",
+        )
+
+        self.assertTrue(callback_event_accessor.create(spec))
+        self.assertFalse(callback_event_accessor.create(spec))
+        self.assertEqual(XenditCallbackEvent.objects.count(), 1)
+
+    def test_get_list_serialize_with_constant_queries(self):
+        spec = GetPaymentListSpec(
+            user_id=self.user.id, bill_ids=[bill.id for bill in self.bills]
+        )
+
+        with self.assertNumQueries(1):
+            payments = self.payment_accessor.get_list(spec)
+            data = GetPaymentListResponse({"data": payments}).data["data"]
+
+        self.assertEqual(
+            sorted(payment["amount"] for payment in data),
+            [bill.amount for bill in self.bills],
+        )
+
+    def test_get_list_user_and_bill_ids(self):
+        other_user = User.objects.create(firebase_uid="other", phone_number="+62")
+        other_bill = Bill.objects.create(
+            user=other_user, split_bill=self.bills[0].split_bill, amount=10000
+        )
+        Payment.objects.create(bill=other_bill)
+        Payment.objects.create(
+            bill=Bill.objects.create(
+                user=other_user, split_bill=self.bills[1].split_bill, amount=10000
+            )
+        )
+
+        payments = self.payment_accessor.get_list(
+            GetPaymentListSpec(user_id=self.user.id, bill_ids=[other_bill.id])
+        )
+
+        self.assertEqual(
+            sorted(payment.bill_id for payment in payments),
+            sorted([bill.id for bill in self.bills] + [other_bill.id]),
+        )
+
+    def test_get_page(self):
+        spec = GetPaymentListSpec(user_id=self.user.id, limit=3)
+
+        first_page = self.payment_accessor.get_page(spec)
+        spec.cursor = first_page.next_cursor
+        second_page = self.payment_accessor.get_page(spec)
+
+        self.assertEqual(len(first_page.results), 3)
+        self.assertIsNone(second_page.next_cursor)
+        self.assertEqual(
+            [payment.bill_id for payment in first_page.results + second_page.results],
+            [bill.id for bill in reversed(self.bills)],
+        )
+
+
+@patch("paytungan.app.auth.utils.auth_service")
+class TestPaymentViews(DjangoTestCase):
+    def setUp(self) -> None:
+        user_fund = User.objects.create(firebase_uid="fund", phone_number="+62")
+        self.user = User.objects.create(firebase_uid="user", phone_number="+62")
+        split_bill = SplitBill.objects.create(
+            name="split bill", user_fund=user_fund, amount=20000
+        )
+        self.bill = Bill.objects.create(
+            user=self.user, split_bill=split_bill, amount=10000
+        )
+        self.payment = Payment.objects.create(bill=self.bill, invoice_status="CREATED")
+
+    def test_update_status(self, mock_auth_service) -> None:
+        response = self.client.post(
+            "/api/payments/update/paid",
+            {"bill_id": self.bill.id},
+            content_type="application/json",
+            HTTP_AUTHENTICATION="token",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["payment"]["id"], self.payment.id)
+        self.assertEqual(data["payment"]["status"], "PAID")
+        self.assertIsNone(data["payment"]["payment_url"])
+        self.assertEqual(data["bill"]["id"], self.bill.id)
+        self.assertEqual(data["bill"]["status"], "PAID")
+        self.assertEqual(data["bill"]["user"]["phone_number"], "+62")
+        self.bill.refresh_from_db()
+        self.assertEqual(self.bill.status, "PAID")
+
+
+class TestAsyncPaymentViews(DjangoTestCase):
+    def setUp(self) -> None:
+        user_fund = User.objects.create(firebase_uid="fund", phone_number="+62")
+        self.user = User.objects.create(
+            firebase_uid="user", phone_number="+62", email="user@paytungan.com"
+        )
+        self.split_bill = SplitBill.objects.create(
+            name="split bill", user_fund=user_fund, amount=20000
+        )
+        self.bill = Bill.objects.create(
+            user=self.user, split_bill=self.split_bill, amount=10000
+        )
+        self.payment = Payment.objects.create(
+            bill=self.bill,
+            invoice_status="CREATED",
+            reference_no="invoice-id",
+            expiry_date=timezone.now() + timedelta(days=1),
+        )
+        self.invoice = TestPaymentService._get_invoice_dummy(3401)
+
+        self.async_auth_service = patch(
+            "paytungan.app.auth.utils.async_auth_service", new_callable=AsyncMock
+        ).start()
+        self.async_auth_service.get_user_from_token.return_value = ObjectMapperUtil.map(
+            self.user, UserDomain
+        )
+        self.xendit_provider = patch(
+            "paytungan.app.payment.views.async_payment_service.xendit_provider",
+            new_callable=AsyncMock,
+        ).start()
+        self.xendit_provider.invalidate_invoice = MagicMock()
+        self.addCleanup(patch.stopall)
+
+    async def test_get_payment(self) -> None:
+        self.xendit_provider.get_invoice.return_value = self.invoice
+
+        response = await self.async_client.get(
+            f"/api/async/payments/get?id={self.payment.id}"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["id"], self.payment.id)
+        self.assertEqual(data["payment_url"], self.invoice.invoice_url)
+        self.assertEqual(data["invoice"]["invoice_url"], self.invoice.invoice_url)
+        self.xendit_provider.get_invoice.assert_awaited_once_with("invoice-id")
+
+    async def test_get_payment_list_with_payment_url(self) -> None:
+        self.xendit_provider.get_invoices.return_value = {"invoice-id": self.invoice}
+
+        response = await self.async_client.get(
+            f"/api/async/payments/list/get?user_id={self.user.id}"
+            "&with_payment_url=true",
+            AUTHENTICATION="token",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual([payment["id"] for payment in data], [self.payment.id])
+        self.assertEqual(data[0]["payment_url"], self.invoice.invoice_url)
+        self.assertIsNone(response.json()["next_cursor"])
+        self.xendit_provider.get_invoices.assert_awaited_once_with(["invoice-id"])
+
+    async def test_create_payment(self) -> None:
+        split_bill = await sync_to_async(SplitBill.objects.create)(
+            name="other split bill", user_fund=self.split_bill.user_fund, amount=10000
+        )
+        bill = await sync_to_async(Bill.objects.create)(
+            user=self.user, split_bill=split_bill, amount=10000
+        )
+        self.xendit_provider.create_invoice.return_value = self.invoice
+
+        response = await self.async_client.post(
+            "/api/async/payments/create",
+            {"bill_id": bill.id, "success_redirect_url": "https://paytungan.com"},
+            content_type="application/json",
+            AUTHENTICATION="token",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["bill_id"], bill.id)
+        self.assertEqual(data["reference_no"], self.invoice.id)
+        self.assertEqual(data["invoice_status"], "CREATED")
+        self.assertEqual(data["payment_url"], self.invoice.invoice_url)
+        xendit_spec = self.xendit_provider.create_invoice.call_args.args[0]
+        self.assertEqual(xendit_spec.payer_email, "user@paytungan.com")
+        self.assertEqual(xendit_spec.success_redirect_url, "https://paytungan.com")
+        payment = await sync_to_async(Payment.objects.get)(bill=bill)
+        self.assertEqual(payment.reference_no, self.invoice.id)
+
+    async def test_update_status(self) -> None:
+        response = await self.async_client.post(
+            "/api/async/payments/update/paid",
+            {"bill_id": self.bill.id},
+            content_type="application/json",
+            AUTHENTICATION="token",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["payment"]["id"], self.payment.id)
+        self.assertEqual(data["payment"]["status"], "PAID")
+        self.assertEqual(data["bill"]["id"], self.bill.id)
+        self.assertEqual(data["bill"]["status"], "PAID")
+        self.assertEqual(data["bill"]["user"]["email"], "user@paytungan.com")
+        self.xendit_provider.create_invoice.assert_not_awaited()
+
+    async def test_create_payment_without_token(self) -> None:
+        response = await self.async_client.post(
+            "/api/async/payments/create",
+            {"bill_id": self.bill.id},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.async_auth_service.get_user_from_token.assert_not_awaited()
+
+
+class TestXenditCallbackAuth(TestCase):
+    def setUp(self) -> None:
+        self.view = xendit_callback_auth(lambda view, request: "handled")
+
+    def _request(self, headers: dict):
+        return SimpleNamespace(headers=headers)
+
+    @patch("paytungan.app.payment.utils.XENDIT_CALLBACK_TOKEN", "secret")
+    def test_valid_token(self):
+        request = self._request({"x-callback-token": "secret"})
+        self.assertEqual(self.view(None, request), "handled")
+
+    @patch("paytungan.app.payment.utils.XENDIT_CALLBACK_TOKEN", "secret")
+    def test_invalid_token(self):
+        for headers in [{}, {"x-callback-token": "wrong"}]:
+            with self.assertRaises(UnauthorizedError):
+                self.view(None, self._request(headers))
+
+    @patch("paytungan.app.payment.utils.XENDIT_CALLBACK_TOKEN", None)
+    def test_token_not_configured(self):
+        with self.assertRaises(UnauthorizedError):
+            self.view(None, self._request({"x-callback-token": ""}))
+
+    def test_get_callback_event_id(self):
+        self.assertEqual(
+            get_callback_event_id(self._request({"webhook-id": "event"}), "id"),
+            "event",
+        )
+        self.assertEqual(
+            get_callback_event_id(self._request({}), "id", "PAID"), "id:PAID"
+        )
@@ -0,0 +1,34 @@
+import hmac
+from functools import wraps
+
+from paytungan.app.base.constants import XENDIT_CALLBACK_TOKEN
+from paytungan.app.common.exceptions import UnauthorizedError
+
+XENDIT_CALLBACK_TOKEN_HEADER = "x-callback-token"
+XENDIT_WEBHOOK_ID_HEADER = "webhook-id"
+
+
+def xendit_callback_auth(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        """
+        Decorator for callback views to verify the Xendit callback token
+        """
+        request = args[1]
+        token = request.headers.get(XENDIT_CALLBACK_TOKEN_HEADER, "")
+        if not XENDIT_CALLBACK_TOKEN or not hmac.compare_digest(
+            token.encode(), XENDIT_CALLBACK_TOKEN.encode()
+        ):
+            raise UnauthorizedError(message="Callback token is invalid", code=401)
+
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def get_callback_event_id(request, *fallback_parts: str) -> str:
+    """
+    Xendit sends a unique webhook-id header per event, older callbacks without it are
+    keyed by the object id and status they report.
+    """
+    return request.headers.get(XENDIT_WEBHOOK_ID_HEADER) or ":".join(fallback_parts)
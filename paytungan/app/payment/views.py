@@ -1,13 +1,24 @@
+import json
+
+from asgiref.sync import sync_to_async
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 from django.db import transaction
+from django.http import HttpRequest, HttpResponse
 
-from paytungan.app.common.decorators import api_exception
-from paytungan.app.base.headers import AUTH_HEADERS
-from paytungan.app.auth.utils import user_auth, firebase_auth
+from paytungan.app.common.decorators import api_exception, async_api_view
+from paytungan.app.common.exceptions import ValidationErrorException
+from paytungan.app.common.responses import JSONResponse
+from paytungan.app.base.headers import AUTH_HEADERS, XENDIT_CALLBACK_HEADERS
+from paytungan.app.auth.utils import (
+    async_firebase_auth,
+    async_user_auth,
+    firebase_auth,
+    user_auth,
+)
 from paytungan.app.auth.specs import UserDomain, FirebaseDecodedToken
 from paytungan.app.common.utils import ObjectMapperUtil
 
@@ -16,6 +27,8 @@ from .specs import (
     CreatePayoutSpec,
     UpdateStatusSpec,
     GetPaymentListSpec,
+    XenditInvoiceCallbackSpec,
+    XenditPayoutCallbackSpec,
 )
 from .serializers import (
     CreatePaymentRequest,
@@ -32,13 +45,19 @@ from .serializers import (
     GetPaymentByBillIdResponse,
     GetPaymentListRequest,
     GetPaymentListResponse,
+    XenditCallbackResponse,
+    XenditInvoiceCallbackRequest,
+    XenditPayoutCallbackRequest,
 )
 from .services import (
+    AsyncPaymentService,
     PaymentService,
 )
+from .utils import get_callback_event_id, xendit_callback_auth
 from paytungan.app.di import injector
 
 payment_service = injector.get(PaymentService)
+async_payment_service = injector.get(AsyncPaymentService)
 
 
 class PaymentViewSet(viewsets.ViewSet):
@@ -51,6 +70,7 @@ class PaymentViewSet(viewsets.ViewSet):
         query_serializer=GetPaymentRequest(),
         responses={200: GetPaymentResponse()},
     )
+    @transaction.atomic
     @api_exception
     def get_payment(self, request: Request) -> Response:
         """
@@ -81,8 +101,8 @@ class PaymentViewSet(viewsets.ViewSet):
         data = serializer.data
         spec = CreatePaymentSpec(
             bill_id=data["bill_id"],
-            success_redirect_url=data["success_redirect_url"],
-            failure_redirect_url=data["failure_redirect_url"],
+            success_redirect_url=data.get("success_redirect_url"),
+            failure_redirect_url=data.get("failure_redirect_url"),
         )
         user = payment_service.create_payment(spec, user)
         return Response(CreatePaymentResponse({"data": user}).data)
@@ -229,5 +249,192 @@ class PaymentViewSet(viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.data
         spec = ObjectMapperUtil.map(data, GetPaymentListSpec)
-        payments = payment_service.get_payment_list(spec)
-        return Response(GetPaymentListResponse({"data": payments}).data)
+        page = payment_service.get_payment_list(spec)
+        return Response(
+            GetPaymentListResponse(
+                {"data": page.results, "next_cursor": page.next_cursor}
+            ).data
+        )
+
+    @action(
+        detail=False,
+        url_path="callback/invoice",
+        methods=["post"],
+    )
+    @swagger_auto_schema(
+        manual_parameters=XENDIT_CALLBACK_HEADERS,
+        request_body=XenditInvoiceCallbackRequest(),
+        responses={200: XenditCallbackResponse()},
+    )
+    @transaction.atomic
+    @api_exception
+    @xendit_callback_auth
+    def invoice_callback(self, request: Request) -> Response:
+        """
+        Xendit invoice callback, marks the payment and its bill paid
+        """
+        serializer = XenditInvoiceCallbackRequest(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        spec = XenditInvoiceCallbackSpec(
+            event_id=get_callback_event_id(request, data["id"], data["status"]),
+            invoice_id=data["id"],
+            external_id=data["external_id"],
+            status=data["status"],
+            payment_method=data.get("payment_method"),
+            paid_at=data.get("paid_at"),
+        )
+        result = payment_service.handle_invoice_callback(spec)
+        return Response(XenditCallbackResponse({"data": result}).data)
+
+    @action(
+        detail=False,
+        url_path="callback/payout",
+        methods=["post"],
+    )
+    @swagger_auto_schema(
+        manual_parameters=XENDIT_CALLBACK_HEADERS,
+        request_body=XenditPayoutCallbackRequest(),
+        responses={200: XenditCallbackResponse()},
+    )
+    @transaction.atomic
+    @api_exception
+    @xendit_callback_auth
+    def payout_callback(self, request: Request) -> Response:
+        """
+        Xendit payout callback, records the payout status of the split bill
+        """
+        serializer = XenditPayoutCallbackRequest(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        spec = XenditPayoutCallbackSpec(
+            event_id=get_callback_event_id(request, data["id"], data["status"]),
+            payout_id=data["id"],
+            external_id=data["external_id"],
+            status=data["status"],
+        )
+        result = payment_service.handle_payout_callback(spec)
+        return Response(XenditCallbackResponse({"data": result}).data)
+
+
+# Async variants of the PaymentViewSet endpoints, served under api/async/payments when
+# the app runs on an ASGI server. DRF views can't be async, so these are plain Django
+# views responding with the same payloads.
+
+
+def _get_request_body(request: HttpRequest) -> dict:
+    if not request.body:
+        return {}
+
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        raise ValidationErrorException("Request body is not valid JSON")
+
+
+@async_api_view(["GET"])
+async def async_get_payment(request: HttpRequest) -> HttpResponse:
+    serializer = GetPaymentRequest(data=request.GET)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    payment = await async_payment_service.get_payment(data["id"])
+    return JSONResponse(GetPaymentResponse({"data": payment}).data)
+
+
+@async_api_view(["POST"])
+@async_user_auth
+async def async_create_payment(request: HttpRequest, user: UserDomain) -> HttpResponse:
+    serializer = CreatePaymentRequest(data=_get_request_body(request))
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    spec = CreatePaymentSpec(
+        bill_id=data["bill_id"],
+        success_redirect_url=data.get("success_redirect_url"),
+        failure_redirect_url=data.get("failure_redirect_url"),
+    )
+    payment = await async_payment_service.create_payment(spec, user)
+    return JSONResponse(CreatePaymentResponse({"data": payment}).data)
+
+
+@async_api_view(["POST"])
+@async_firebase_auth
+async def async_update_status(
+    request: HttpRequest, cred: FirebaseDecodedToken
+) -> HttpResponse:
+    serializer = UpdateStatusRequest(data=_get_request_body(request))
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    spec = UpdateStatusSpec(
+        bill_id=data["bill_id"],
+    )
+    payment = await async_payment_service.update_status(spec)
+    return JSONResponse(UpdateStatusResponse({"data": payment}).data)
+
+
+@async_api_view(["GET"])
+@async_firebase_auth
+async def async_get_payment_by_bill_id(
+    request: HttpRequest, cred: FirebaseDecodedToken
+) -> HttpResponse:
+    serializer = GetPaymentByBillIdRequest(data=request.GET)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    payment = await async_payment_service.get_payment_by_bill_id(data["bill_id"])
+    return JSONResponse(GetPaymentByBillIdResponse({"data": payment}).data)
+
+
+@async_api_view(["GET"])
+@async_firebase_auth
+async def async_get_payout(
+    request: HttpRequest, cred: FirebaseDecodedToken
+) -> HttpResponse:
+    serializer = GetPayoutRequest(data=request.GET)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    payout = await async_payment_service.get_payout(data["split_bill_id"])
+    return JSONResponse(GetPayoutResponse({"data": payout}).data)
+
+
+@async_api_view(["POST"])
+@async_firebase_auth
+async def async_create_payout(
+    request: HttpRequest, cred: FirebaseDecodedToken
+) -> HttpResponse:
+    serializer = CreatePayoutRequest(data=_get_request_body(request))
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    spec = ObjectMapperUtil.map(data, CreatePayoutSpec)
+    payout = await async_payment_service.create_payout(spec)
+    return JSONResponse(GetPayoutResponse({"data": payout}).data)
+
+
+@async_api_view(["POST"])
+@async_firebase_auth
+async def async_get_or_create_payout(
+    request: HttpRequest, cred: FirebaseDecodedToken
+) -> HttpResponse:
+    serializer = GetPayoutRequest(data=_get_request_body(request))
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    spec = ObjectMapperUtil.map(data, CreatePayoutSpec)
+    payout = await async_payment_service.get_or_create_payout(spec)
+    return JSONResponse(GetPayoutResponse({"data": payout}).data)
+
+
+@async_api_view(["GET"])
+@async_firebase_auth
+async def async_get_payment_list(
+    request: HttpRequest, cred: FirebaseDecodedToken
+) -> HttpResponse:
+    serializer = GetPaymentListRequest(data=request.GET)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.data
+    spec = ObjectMapperUtil.map(data, GetPaymentListSpec)
+    page = await async_payment_service.get_payment_list(spec)
+    # Pages without payment urls are still model instances
+    response = await sync_to_async(
+        lambda: GetPaymentListResponse(
+            {"data": page.results, "next_cursor": page.next_cursor}
+        ).data
+    )()
+    return JSONResponse(response)
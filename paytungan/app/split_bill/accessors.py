@@ -1,7 +1,11 @@
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from injector import inject
 
+from paytungan.app.common.pagination import CursorPage, KeysetPagination
 from paytungan.app.common.utils import ObjectMapperUtil
 from paytungan.app.logging.interface import ILoggingProvider
 
@@ -12,11 +16,18 @@ from .specs import (
     CreateSplitBillSpec,
     DeleteSplitBillSpec,
     GetBillListSpec,
+    GetSplitBillCurrentUserSpec,
     GetSplitBillListSpec,
+    IncrementSplitBillAggregatesSpec,
+    SplitBillWithBillDomain,
     UpdateBillSpec,
     UpdateSplitBillSpec,
 )
-from paytungan.app.base.constants import DEFAULT_LOGGER
+from paytungan.app.base.constants import (
+    DEFAULT_LOGGER,
+    STREAM_CHUNK_SIZE,
+    BillStatus,
+)
 
 
 class BillAccessor(IBillAccessor):
@@ -53,8 +64,20 @@ class BillAccessor(IBillAccessor):
         if spec.user_ids:
             queryset = queryset.filter(user__id__in=spec.user_ids)
 
+        if spec.eager_loading:
+            queryset = spec.eager_loading.apply(queryset)
+
         return queryset
 
+    def get_page(self, spec: GetBillListSpec) -> CursorPage[Bill]:
+        pagination = KeysetPagination()
+        queryset = pagination.apply(self.get_list(spec), spec.cursor, spec.limit)
+        return pagination.build_page(queryset, spec.limit)
+
+    def iter_list(self, spec: GetBillListSpec) -> Iterator[Bill]:
+        queryset = self.get_list(spec).order_by("-created_at", "-id")
+        return queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+
     def update(self, spec: UpdateBillSpec) -> BillDomain:
         bill = self._convert_to_model(obj=spec.obj, is_create=False)
         bill.save(update_fields=spec.updated_fields)
@@ -119,21 +142,36 @@ class SplitBillAccessor(ISplitBillAccessor):
         if spec.user_fund_id:
             queryset = queryset.filter(user_fund__id=spec.user_fund_id)
 
+        if spec.eager_loading:
+            queryset = spec.eager_loading.apply(queryset)
+
         return queryset
 
+    def get_page(self, spec: GetSplitBillListSpec) -> CursorPage[SplitBill]:
+        pagination = KeysetPagination()
+        queryset = pagination.apply(self.get_list(spec), spec.cursor, spec.limit)
+        return pagination.build_page(queryset, spec.limit)
+
+    def iter_list(self, spec: GetSplitBillListSpec) -> Iterator[SplitBill]:
+        # QuerySet.iterator() would skip the bills prefetch, so walk keyset pages
+        return KeysetPagination().iterate(self.get_list(spec), STREAM_CHUNK_SIZE)
+
     def create(self, spec: CreateSplitBillSpec) -> SplitBill:
-        split_bill = SplitBill(
-            name=spec.name,
-            user_fund_id=spec.user_fund_id,
-            withdrawal_method=spec.withdrawal_method,
-            withdrawal_number=spec.withdrawal_number,
-            amount=spec.amount,
-            details=spec.details,
-            **ObjectMapperUtil.default_model_creation_params()
-        )
+        split_bill = self._convert_to_model(spec)
         split_bill.save()
         return split_bill
 
+    def bulk_create(self, specs: List[CreateSplitBillSpec]) -> List[SplitBill]:
+        split_bills = [self._convert_to_model(spec) for spec in specs]
+        if connection.features.can_return_rows_from_bulk_insert:
+            return SplitBill.objects.bulk_create(split_bills)
+
+        # Bills need the split bill ids, which this backend cannot return in bulk
+        for split_bill in split_bills:
+            split_bill.save()
+
+        return split_bills
+
     def get_list_by_user(self, user_id: int) -> List[SplitBill]:
         split_bill_ids = list(
             Bill.objects.filter(user_id=user_id)
@@ -144,6 +182,29 @@ class SplitBillAccessor(ISplitBillAccessor):
         queryset = SplitBill.objects.filter(id__in=split_bill_ids)
         return queryset
 
+    def get_list_with_bill_by_user(
+        self, spec: GetSplitBillCurrentUserSpec
+    ) -> CursorPage[SplitBillWithBillDomain]:
+        # A user has at most one bill per split bill, so the user's bills joined with
+        # their split bills give the pairs in a single query
+        queryset = Bill.objects.filter(
+            user_id=spec.user_id, split_bill__deleted__isnull=True
+        ).select_related("user", "split_bill__user_fund")
+
+        if spec.is_user_fund:
+            queryset = queryset.filter(split_bill__user_fund_id=spec.user_id)
+
+        pagination = KeysetPagination(prefix="split_bill__")
+        queryset = pagination.apply(queryset, spec.cursor, spec.limit)
+        return pagination.build_page(
+            (
+                SplitBillWithBillDomain(split_bill=bill.split_bill, bill=bill)
+                for bill in queryset.iterator()
+            ),
+            spec.limit,
+            get_model=lambda pair: pair.split_bill,
+        )
+
     def delete(self, spec: DeleteSplitBillSpec) -> None:
         queryset = SplitBill.objects.all()
 
@@ -163,3 +224,52 @@ class SplitBillAccessor(ISplitBillAccessor):
         split_bill.save(update_fields=spec.updated_fields)
 
         return split_bill
+
+    def increment_aggregates(self, spec: IncrementSplitBillAggregatesSpec) -> int:
+        queryset = SplitBill.objects.filter(pk=spec.split_bill_id)
+        if spec.bill_user_id is not None:
+            queryset = queryset.exclude(user_fund_id=spec.bill_user_id)
+
+        return queryset.update(
+            paid_amount=F("paid_amount") + spec.paid_amount,
+            paid_count=F("paid_count") + spec.paid_count,
+            total_count=F("total_count") + spec.total_count,
+        )
+
+    def rebuild_aggregates(self, split_bill_ids: Optional[List[int]] = None) -> int:
+        bills = (
+            Bill.objects.filter(split_bill_id=OuterRef("pk"))
+            .filter(~Q(user_id=OuterRef("user_fund_id")))
+            .order_by()
+            .values("split_bill_id")
+        )
+        paid_bills = bills.filter(status=BillStatus.PAID.value)
+
+        queryset = SplitBill.objects.all()
+        if split_bill_ids is not None:
+            queryset = queryset.filter(id__in=split_bill_ids)
+
+        return queryset.update(
+            paid_amount=Coalesce(
+                Subquery(paid_bills.annotate(total=Sum("amount")).values("total")), 0
+            ),
+            paid_count=Coalesce(
+                Subquery(paid_bills.annotate(total=Count("id")).values("total")), 0
+            ),
+            total_count=Coalesce(
+                Subquery(bills.annotate(total=Count("id")).values("total")), 0
+            ),
+        )
+
+    @staticmethod
+    def _convert_to_model(spec: CreateSplitBillSpec) -> SplitBill:
+        return SplitBill(
+            name=spec.name,
+            user_fund_id=spec.user_fund_id,
+            withdrawal_method=spec.withdrawal_method,
+            withdrawal_number=spec.withdrawal_number,
+            amount=spec.amount,
+            details=spec.details,
+            total_count=spec.total_count,
+            **ObjectMapperUtil.default_model_creation_params()
+        )
@@ -1,12 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
+from paytungan.app.common.pagination import CursorPage
 from .specs import (
     BillDomain,
     CreateSplitBillSpec,
     DeleteSplitBillSpec,
     GetBillListSpec,
+    GetSplitBillCurrentUserSpec,
     GetSplitBillListSpec,
+    IncrementSplitBillAggregatesSpec,
+    SplitBillWithBillDomain,
     UpdateBillSpec,
     UpdateSplitBillSpec,
 )
@@ -22,14 +26,32 @@ class ISplitBillAccessor(ABC):
     def get_list(self, spec: GetSplitBillListSpec) -> List[SplitBill]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_page(self, spec: GetSplitBillListSpec) -> CursorPage[SplitBill]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_list(self, spec: GetSplitBillListSpec) -> Iterator[SplitBill]:
+        raise NotImplementedError
+
     @abstractmethod
     def create(self, spec: CreateSplitBillSpec) -> SplitBill:
         raise NotImplementedError
 
+    @abstractmethod
+    def bulk_create(self, specs: List[CreateSplitBillSpec]) -> List[SplitBill]:
+        raise NotImplementedError
+
     @abstractmethod
     def get_list_by_user(self, user_id: int) -> List[SplitBill]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_list_with_bill_by_user(
+        self, spec: GetSplitBillCurrentUserSpec
+    ) -> CursorPage[SplitBillWithBillDomain]:
+        raise NotImplementedError
+
     @abstractmethod
     def delete(self, spec: DeleteSplitBillSpec) -> None:
         raise NotImplementedError
@@ -38,6 +60,14 @@ class ISplitBillAccessor(ABC):
     def update(self, spec: UpdateSplitBillSpec) -> SplitBill:
         raise NotImplementedError
 
+    @abstractmethod
+    def increment_aggregates(self, spec: IncrementSplitBillAggregatesSpec) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def rebuild_aggregates(self, split_bill_ids: Optional[List[int]] = None) -> int:
+        raise NotImplementedError
+
 
 class IBillAccessor(ABC):
     @abstractmethod
@@ -48,6 +78,14 @@ class IBillAccessor(ABC):
     def get_list(self, spec: GetBillListSpec) -> List[Bill]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_page(self, spec: GetBillListSpec) -> CursorPage[Bill]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_list(self, spec: GetBillListSpec) -> Iterator[Bill]:
+        raise NotImplementedError
+
     @abstractmethod
     def create(self, obj: BillDomain) -> Bill:
         raise NotImplementedError
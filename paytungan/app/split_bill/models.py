@@ -16,8 +16,15 @@ class SplitBill(BaseModel):
     withdrawal_method = models.CharField(max_length=128, blank=True, null=True)
     withdrawal_number = models.CharField(max_length=128, blank=True, null=True)
     payout_reference_no = models.CharField(max_length=256, blank=True, null=True)
+    payout_status = models.CharField(max_length=32, blank=True, null=True)
     amount = models.PositiveIntegerField()
     details = models.TextField(null=True, blank=True)
+    # Aggregates of the bills collected through payments, the fund holder's own bill
+    # is left out. Kept up to date on bill creation and payment, see
+    # rebuild_split_bill_aggregates to recompute them.
+    paid_amount = models.PositiveIntegerField(default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "split_bill"
@@ -26,6 +33,10 @@ class SplitBill(BaseModel):
                 fields=["name"],
                 name="index_split_bill_name",
             ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="index_split_bill_keyset",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -51,6 +62,12 @@ class Bill(BaseModel):
 
     class Meta:
         db_table = "bill"
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                name="index_bill_user_keyset",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["user_id", "split_bill_id"],
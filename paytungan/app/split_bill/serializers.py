@@ -1,6 +1,13 @@
 from rest_framework import serializers
-from paytungan.app.base.constants import BillStatus, WithdrawalMethod
-
+from paytungan.app.base.constants import (
+    BillStatus,
+    SPLIT_BILL_BATCH_MAX_SIZE,
+    WithdrawalMethod,
+)
+from paytungan.app.base.serializers import CursorPaginationRequest
+from paytungan.app.base.specs import EagerLoadingPlan
+
+from paytungan.app.common.serializers import ReadOnlySerializer
 from paytungan.app.common.utils import EnumUtil
 
 
@@ -8,7 +15,7 @@ class GetBillRequest(serializers.Serializer):
     id = serializers.IntegerField(min_value=1)
 
 
-class UserProfileSerializer(serializers.Serializer):
+class UserProfileSerializer(ReadOnlySerializer):
     phone_number = serializers.CharField()
     username = serializers.CharField(
         required=False, default=None, allow_null=True, allow_blank=True
@@ -24,7 +31,7 @@ class UserProfileSerializer(serializers.Serializer):
     )
 
 
-class BillSerializer(serializers.Serializer):
+class BillSerializer(ReadOnlySerializer):
     id = serializers.IntegerField(min_value=1)
     user_id = serializers.IntegerField(min_value=1)
     split_bill_id = serializers.IntegerField(min_value=1)
@@ -36,7 +43,7 @@ class BillSerializer(serializers.Serializer):
     details = serializers.CharField(required=False, allow_null=True)
 
 
-class GetBillResponse(serializers.Serializer):
+class GetBillResponse(ReadOnlySerializer):
     data = BillSerializer()
 
 
@@ -46,7 +53,7 @@ class CreateBillRequest(serializers.Serializer):
     details = serializers.CharField(required=False, allow_null=True, allow_blank=True)
 
 
-class CreateBillResponse(serializers.Serializer):
+class CreateBillResponse(ReadOnlySerializer):
     data = BillSerializer()
 
 
@@ -54,23 +61,27 @@ class GetSplitBillRequest(serializers.Serializer):
     id = serializers.IntegerField(min_value=1)
 
 
-class SplitBillSerializer(serializers.Serializer):
+class SplitBillSerializer(ReadOnlySerializer):
     id = serializers.IntegerField(min_value=1)
     name = serializers.CharField()
     user_fund_id = serializers.IntegerField(min_value=1)
     user_fund_email = serializers.CharField()
     payout_reference_no = serializers.CharField(required=False)
+    payout_status = serializers.CharField(required=False, allow_null=True)
     withdrawal_method = serializers.CharField(required=False)
     withdrawal_number = serializers.CharField(required=False)
     amount = serializers.IntegerField(min_value=0)
     details = serializers.CharField(required=False, allow_null=True)
+    paid_amount = serializers.IntegerField(min_value=0)
+    paid_count = serializers.IntegerField(min_value=0)
+    total_count = serializers.IntegerField(min_value=0)
 
 
 class GroupSplitBillSerializer(SplitBillSerializer):
     bills = BillSerializer(many=True, required=False)
 
 
-class GetSplitBillResponse(serializers.Serializer):
+class GetSplitBillResponse(ReadOnlySerializer):
     data = SplitBillSerializer()
 
 
@@ -99,16 +110,35 @@ class CreateSplitBillRequest(serializers.Serializer):
     bills = UserIdWithAmountBillSerializer(many=True)
 
 
-class CreateSplitBillResponse(serializers.Serializer):
+class CreateSplitBillResponse(ReadOnlySerializer):
     data = GroupSplitBillSerializer()
 
 
-class SplitBillWithBillCurrentUserSerializer(serializers.Serializer):
+class CreateSplitBillBatchRequest(serializers.Serializer):
+    split_bills = CreateSplitBillRequest(
+        many=True, allow_empty=False, max_length=SPLIT_BILL_BATCH_MAX_SIZE
+    )
+
+
+class CreateSplitBillBatchResultSerializer(ReadOnlySerializer):
+    index = serializers.IntegerField(min_value=0)
+    data = GroupSplitBillSerializer(allow_null=True)
+    errors = serializers.DictField(
+        child=serializers.ListField(child=serializers.CharField()), allow_null=True
+    )
+
+
+class CreateSplitBillBatchResponse(ReadOnlySerializer):
+    data = CreateSplitBillBatchResultSerializer(many=True)
+
+
+class SplitBillWithBillCurrentUserSerializer(ReadOnlySerializer):
     split_bill = SplitBillSerializer()
     bill = BillSerializer()
 
 
-class GetSplitBillListRequest(serializers.Serializer):
+class GetSplitBillListRequest(CursorPaginationRequest):
+    stream = serializers.BooleanField(default=False)
     user_id = serializers.IntegerField(min_value=1, required=False)
     user_fund_id = serializers.IntegerField(min_value=1, required=False)
     name = serializers.CharField(required=False)
@@ -120,23 +150,32 @@ class GetSplitBillListRequest(serializers.Serializer):
     )
 
 
-class GetSplitBillListResponse(serializers.Serializer):
+class GetSplitBillListResponse(ReadOnlySerializer):
     data = GroupSplitBillSerializer(many=True)
+    next_cursor = serializers.CharField(allow_null=True)
+
 
+# Relations read by GroupSplitBillSerializer through user_fund_email and bills[].user
+GROUP_SPLIT_BILL_EAGER_LOADING = EagerLoadingPlan(
+    select_related=("user_fund",), prefetch_related=("bills__user",)
+)
 
-class GetSplitBillListCurrentUserRequest(serializers.Serializer):
+
+class GetSplitBillListCurrentUserRequest(CursorPaginationRequest):
     is_user_fund = serializers.BooleanField(default=False)
 
 
-class GetSplitBillListCurrentUserResponse(serializers.Serializer):
+class GetSplitBillListCurrentUserResponse(ReadOnlySerializer):
     data = SplitBillWithBillCurrentUserSerializer(many=True)
+    next_cursor = serializers.CharField(allow_null=True)
 
 
 class DeleteSplitBillRequest(serializers.Serializer):
     split_bill_id = serializers.IntegerField(min_value=1)
 
 
-class GetBillListRequest(serializers.Serializer):
+class GetBillListRequest(CursorPaginationRequest):
+    stream = serializers.BooleanField(default=False)
     user_ids = serializers.ListField(
         child=serializers.IntegerField(min_value=1), required=False
     )
@@ -148,5 +187,10 @@ class GetBillListRequest(serializers.Serializer):
     )
 
 
-class GetBillListResponse(serializers.Serializer):
+class GetBillListResponse(ReadOnlySerializer):
     data = BillSerializer(many=True)
+    next_cursor = serializers.CharField(allow_null=True)
+
+
+# Relations read by BillSerializer through user
+BILL_EAGER_LOADING = EagerLoadingPlan(select_related=("user",))
@@ -1,9 +1,14 @@
-from typing import List, Optional
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set
 from injector import inject
 
 from paytungan.app.base.constants import BillStatus
+from paytungan.app.common.exceptions import ValidationErrorException
+from paytungan.app.common.pagination import CursorPage
 from paytungan.app.common.utils import ObjectMapperUtil
 from .models import Bill, SplitBill
+from paytungan.app.auth.interfaces import IUserAccessor
+from paytungan.app.auth.specs import GetUserListSpec
 from .interfaces import (
     IBillAccessor,
     ISplitBillAccessor,
@@ -11,6 +16,7 @@ from .interfaces import (
 from .specs import (
     BillDomain,
     CreateBillSpec,
+    CreateGroupSplitBillResult,
     CreateGroupSplitBillSpec,
     CreateSplitBillSpec,
     DeleteSplitBillSpec,
@@ -18,23 +24,39 @@ from .specs import (
     GetSplitBillCurrentUserSpec,
     GetSplitBillListSpec,
     GroupSplitBillDomain,
+    IncrementSplitBillAggregatesSpec,
     SplitBillWithBillDomain,
 )
 
 
 class BillService:
     @inject
-    def __init__(self, bill_accessor: IBillAccessor) -> None:
+    def __init__(
+        self, bill_accessor: IBillAccessor, split_bill_accessor: ISplitBillAccessor
+    ) -> None:
         self.bill_accessor = bill_accessor
+        self.split_bill_accessor = split_bill_accessor
 
     def get_bill(self, bill_id: int) -> Optional[Bill]:
         return self.bill_accessor.get(bill_id)
 
-    def get_bill_list(self, spec: GetBillListSpec) -> List[Bill]:
-        return self.bill_accessor.get_list(spec)
+    def get_bill_list(self, spec: GetBillListSpec) -> CursorPage[Bill]:
+        return self.bill_accessor.get_page(spec)
+
+    def iter_bill_list(self, spec: GetBillListSpec) -> Iterator[Bill]:
+        return self.bill_accessor.iter_list(spec)
 
     def create_bill(self, spec: CreateBillSpec) -> Bill:
-        return self.bill_accessor.create(spec)
+        bill = self.bill_accessor.create(spec)
+        self.split_bill_accessor.increment_aggregates(
+            IncrementSplitBillAggregatesSpec(
+                split_bill_id=spec.split_bill_id,
+                total_count=1,
+                bill_user_id=spec.user_id,
+            )
+        )
+
+        return bill
 
 
 class SplitBillService:
@@ -43,15 +65,20 @@ class SplitBillService:
         self,
         bill_accessor: IBillAccessor,
         split_bill_accessor: ISplitBillAccessor,
+        user_accessor: IUserAccessor,
     ) -> None:
         self.bill_accessor = bill_accessor
         self.split_bill_accessor = split_bill_accessor
+        self.user_accessor = user_accessor
 
     def get_split_bill(self, split_bill_id: int) -> Optional[SplitBill]:
         return self.split_bill_accessor.get(split_bill_id)
 
-    def get_split_bill_list(self, spec: GetSplitBillListSpec) -> List[SplitBill]:
-        return self.split_bill_accessor.get_list(spec)
+    def get_split_bill_list(self, spec: GetSplitBillListSpec) -> CursorPage[SplitBill]:
+        return self.split_bill_accessor.get_page(spec)
+
+    def iter_split_bill_list(self, spec: GetSplitBillListSpec) -> Iterator[SplitBill]:
+        return self.split_bill_accessor.iter_list(spec)
 
     def create_split_bill(self, spec: CreateSplitBillSpec) -> SplitBill:
         return self.split_bill_accessor.create(spec)
@@ -59,75 +86,167 @@ class SplitBillService:
     def create_group_split_bill(
         self, spec: CreateGroupSplitBillSpec
     ) -> GroupSplitBillDomain:
-        split_bill_create_spec = ObjectMapperUtil.map(spec, CreateSplitBillSpec)
-        split_bill = self.create_split_bill(split_bill_create_spec)
+        self._validate_user_ids(spec)
+
+        split_bill = self.create_split_bill(self._build_split_bill_spec(spec))
+
+        bills_domain = self._build_bills_domain(spec, split_bill.id)
+        bills = self.bill_accessor.bulk_create(bills_domain)
+
+        return self._convert_to_group_domain(
+            split_bill, bills, split_bill.user_fund.email
+        )
+
+    def create_group_split_bill_batch(
+        self, specs: List[CreateGroupSplitBillSpec]
+    ) -> List[CreateGroupSplitBillResult]:
+        user_ids = set().union(*(self._get_user_ids(spec) for spec in specs))
+        users = {
+            user.id: user
+            for user in self.user_accessor.get_list(
+                GetUserListSpec(user_ids=list(user_ids))
+            )
+        }
 
+        results = [
+            CreateGroupSplitBillResult(index=index) for index in range(len(specs))
+        ]
+        valid_results = []
+        for result, spec in zip(results, specs):
+            field_errors = self._get_user_id_errors(spec, set(users))
+            if field_errors:
+                result.errors = field_errors
+            else:
+                valid_results.append((result, spec))
+
+        if not valid_results:
+            return results
+
+        split_bills = self.split_bill_accessor.bulk_create(
+            [self._build_split_bill_spec(spec) for _, spec in valid_results]
+        )
         bills_domain = [
+            self._build_bills_domain(spec, split_bill.id)
+            for (_, spec), split_bill in zip(valid_results, split_bills)
+        ]
+        bills = self.bill_accessor.bulk_create(
+            [bill for bills in bills_domain for bill in bills]
+        )
+
+        position = 0
+        for (result, spec), split_bill in zip(valid_results, split_bills):
+            split_bill_bills = bills[position : position + len(spec.bills)]
+            position += len(spec.bills)
+            for bill in split_bill_bills:
+                bill.user = users[bill.user_id]
+
+            result.data = self._convert_to_group_domain(
+                split_bill, split_bill_bills, users[spec.user_fund_id].email
+            )
+
+        return results
+
+    def get_list_current_user(
+        self, spec: GetSplitBillCurrentUserSpec
+    ) -> CursorPage[SplitBillWithBillDomain]:
+        return self.split_bill_accessor.get_list_with_bill_by_user(spec)
+
+    def delete(self, spec: DeleteSplitBillSpec) -> None:
+        return self.split_bill_accessor.delete(spec)
+
+    def _validate_user_ids(self, spec: CreateGroupSplitBillSpec) -> None:
+        """
+        Resolve every referenced user before anything is written, so a bad id fails
+        the request instead of an IntegrityError rolling back the split bill.
+        """
+        existing_ids = self.user_accessor.get_existing_ids(self._get_user_ids(spec))
+
+        field_errors = self._get_user_id_errors(spec, existing_ids)
+        if field_errors:
+            raise ValidationErrorException("Invalid user id", field_errors=field_errors)
+
+    @staticmethod
+    def _get_user_id_errors(
+        spec: CreateGroupSplitBillSpec, existing_ids: Set[int]
+    ) -> Dict[str, List[str]]:
+        """
+        Unknown users, and users with more than one bill, which would break the
+        unique bill per user and split bill constraint.
+        """
+        field_errors = {}
+        if spec.user_fund_id not in existing_ids:
+            field_errors["user_fund_id"] = [f"User {spec.user_fund_id} does not exist."]
+
+        bill_user_ids = Counter(bill["user_id"] for bill in spec.bills)
+        bill_errors = [
+            f"User {id} does not exist."
+            for id in sorted(bill_user_ids.keys() - existing_ids)
+        ]
+        bill_errors += [
+            f"User {id} has more than one bill."
+            for id, count in sorted(bill_user_ids.items())
+            if count > 1
+        ]
+        if bill_errors:
+            field_errors["bills"] = bill_errors
+
+        return field_errors
+
+    @staticmethod
+    def _get_user_ids(spec: CreateGroupSplitBillSpec) -> Set[int]:
+        return {spec.user_fund_id, *(bill["user_id"] for bill in spec.bills)}
+
+    @staticmethod
+    def _build_split_bill_spec(spec: CreateGroupSplitBillSpec) -> CreateSplitBillSpec:
+        split_bill_spec = ObjectMapperUtil.map(spec, CreateSplitBillSpec)
+        # Bills other than the fund holder's start unpaid
+        split_bill_spec.total_count = sum(
+            1 for bill in spec.bills if bill["user_id"] != spec.user_fund_id
+        )
+
+        return split_bill_spec
+
+    @staticmethod
+    def _build_bills_domain(
+        spec: CreateGroupSplitBillSpec, split_bill_id: int
+    ) -> List[BillDomain]:
+        return [
             BillDomain(
                 user_id=bill["user_id"],
-                split_bill_id=split_bill.id,
+                split_bill_id=split_bill_id,
                 amount=bill["amount"],
                 details=bill["details"],
-                **ObjectMapperUtil.default_domain_creation_params()
+                **ObjectMapperUtil.default_domain_creation_params(),
             )
             if bill["user_id"] != spec.user_fund_id
             else BillDomain(
                 user_id=spec.user_fund_id,
-                split_bill_id=split_bill.id,
+                split_bill_id=split_bill_id,
                 amount=bill["amount"],
                 status=BillStatus.PAID.value,
                 details=bill["details"],
-                **ObjectMapperUtil.default_domain_creation_params()
+                **ObjectMapperUtil.default_domain_creation_params(),
             )
             for bill in spec.bills
         ]
-        bills = self.bill_accessor.bulk_create(bills_domain)
 
+    @staticmethod
+    def _convert_to_group_domain(
+        split_bill: SplitBill, bills: List[Bill], user_fund_email: str
+    ) -> GroupSplitBillDomain:
         return GroupSplitBillDomain(
             id=split_bill.id,
             created_at=split_bill.created_at,
             updated_at=split_bill.updated_at,
             name=split_bill.name,
             user_fund_id=split_bill.user_fund_id,
-            user_fund_email=split_bill.user_fund.email,
+            user_fund_email=user_fund_email,
             withdrawal_method=split_bill.withdrawal_method,
             withdrawal_number=split_bill.withdrawal_number,
             amount=split_bill.amount,
             details=split_bill.details,
+            paid_amount=split_bill.paid_amount,
+            paid_count=split_bill.paid_count,
+            total_count=split_bill.total_count,
             bills=bills,
         )
-
-    def get_list_current_user(
-        self, spec: GetSplitBillCurrentUserSpec
-    ) -> List[SplitBillWithBillDomain]:
-        bills = self.bill_accessor.get_list(
-            GetBillListSpec(
-                user_ids=[spec.user_id],
-            )
-        )
-
-        if not bills:
-            return []
-
-        split_bills_ids = [bill.split_bill_id for bill in bills]
-        split_bills = self.split_bill_accessor.get_list(
-            GetSplitBillListSpec(
-                split_bill_ids=split_bills_ids,
-                user_fund_id=spec.user_id if spec.is_user_fund else None,
-            )
-        )
-
-        if not split_bills:
-            return []
-
-        split_bill_to_bill_mapping = {bill.split_bill_id: bill for bill in bills}
-        return [
-            SplitBillWithBillDomain(
-                split_bill=split_bill,
-                bill=split_bill_to_bill_mapping[split_bill.id],
-            )
-            for split_bill in split_bills
-        ]
-
-    def delete(self, spec: DeleteSplitBillSpec) -> None:
-        return self.split_bill_accessor.delete(spec)
@@ -1,8 +1,8 @@
 from dataclasses import dataclass, field
-from typing import List, Optional
-from paytungan.app.base.constants import BillStatus
+from typing import Dict, List, Optional
+from paytungan.app.base.constants import BillStatus, PAGINATION_DEFAULT_LIMIT
 
-from paytungan.app.base.specs import BaseDomain
+from paytungan.app.base.specs import BaseDomain, EagerLoadingPlan
 from .models import Bill, SplitBill, User
 
 
@@ -13,9 +13,13 @@ class GroupSplitBillDomain(BaseDomain):
     user_fund_email: str
     amount: int
     payout_reference_no: Optional[str] = None
+    payout_status: Optional[str] = None
     withdrawal_method: Optional[str] = None
     withdrawal_number: Optional[int] = None
     details: Optional[str] = None
+    paid_amount: int = 0
+    paid_count: int = 0
+    total_count: int = 0
     bills: Optional[Bill] = None
 
 
@@ -40,6 +44,9 @@ class GetBillListSpec:
     user_ids: Optional[List[int]] = None
     bill_ids: Optional[List[int]] = None
     split_bill_ids: Optional[List[int]] = None
+    eager_loading: Optional[EagerLoadingPlan] = None
+    cursor: Optional[str] = None
+    limit: int = PAGINATION_DEFAULT_LIMIT
 
 
 @dataclass
@@ -62,6 +69,9 @@ class GetSplitBillListSpec:
     name: Optional[str] = None
     bill_ids: Optional[List[int]] = None
     split_bill_ids: List[int] = field(default_factory=list)
+    eager_loading: Optional[EagerLoadingPlan] = None
+    cursor: Optional[str] = None
+    limit: int = PAGINATION_DEFAULT_LIMIT
 
 
 @dataclass
@@ -77,6 +87,17 @@ class CreateSplitBillSpec:
     withdrawal_number: str
     amount: int
     details: Optional[str] = None
+    total_count: int = 0
+
+
+@dataclass
+class IncrementSplitBillAggregatesSpec:
+    split_bill_id: int
+    paid_amount: int = 0
+    paid_count: int = 0
+    total_count: int = 0
+    # Skip the increment when this is the fund holder's own bill
+    bill_user_id: Optional[int] = None
 
 
 @dataclass
@@ -96,6 +117,13 @@ class CreateGroupSplitBillSpec:
     details: Optional[str] = None
 
 
+@dataclass
+class CreateGroupSplitBillResult:
+    index: int
+    data: Optional[GroupSplitBillDomain] = None
+    errors: Optional[Dict[str, List[str]]] = None
+
+
 @dataclass
 class DeleteSplitBillSpec:
     user_fund_id: Optional[int] = None
@@ -107,6 +135,8 @@ class DeleteSplitBillSpec:
 class GetSplitBillCurrentUserSpec:
     user_id: int
     is_user_fund: Optional[bool] = None
+    cursor: Optional[str] = None
+    limit: int = PAGINATION_DEFAULT_LIMIT
 
 
 @dataclass
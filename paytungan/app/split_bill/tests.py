@@ -1,23 +1,44 @@
 # from django.test import TestCase
 from datetime import datetime
+from io import StringIO
 from re import U
 from typing import Optional
 from unittest import TestCase
-from unittest.mock import MagicMock
+from django.core.management import call_command
+from django.test import TestCase as DjangoTestCase
+from unittest.mock import MagicMock, patch
 from collections import OrderedDict
 from faker import Faker
+from rest_framework.renderers import JSONRenderer
 
+from paytungan.app.common.exceptions import ValidationErrorException
+from paytungan.app.common.pagination import CursorPage
+from paytungan.app.common.responses import StreamingJSONListResponse
+from paytungan.app.common.utils import ObjectMapperUtil
+from paytungan.app.split_bill.accessors import BillAccessor, SplitBillAccessor
 from paytungan.app.split_bill.models import Bill, SplitBill, User
+from paytungan.app.split_bill.serializers import (
+    BILL_EAGER_LOADING,
+    GROUP_SPLIT_BILL_EAGER_LOADING,
+    BillSerializer,
+    CreateSplitBillBatchResponse,
+    GetBillListResponse,
+    GetSplitBillListResponse,
+    GroupSplitBillSerializer,
+)
 from paytungan.app.split_bill.services import BillService, SplitBillService
 from paytungan.app.split_bill.specs import (
     BillDomain,
     CreateBillSpec,
     CreateGroupSplitBillSpec,
+    CreateSplitBillSpec,
     DeleteSplitBillSpec,
     GetBillListSpec,
     GetSplitBillCurrentUserSpec,
     GetSplitBillListSpec,
     GroupSplitBillDomain,
+    IncrementSplitBillAggregatesSpec,
+    SplitBillWithBillDomain,
 )
 
 
@@ -25,10 +46,15 @@ class TestSplitBillService(TestCase):
     def setUp(self) -> None:
         self.bill_accessor = MagicMock()
         self.split_bill_accessor = MagicMock()
-        self.bill_service = BillService(bill_accessor=self.bill_accessor)
+        self.bill_service = BillService(
+            bill_accessor=self.bill_accessor,
+            split_bill_accessor=self.split_bill_accessor,
+        )
+        self.user_accessor = MagicMock()
         self.split_bill_service = SplitBillService(
             split_bill_accessor=self.split_bill_accessor,
             bill_accessor=self.bill_accessor,
+            user_accessor=self.user_accessor,
         )
 
     @staticmethod
@@ -65,7 +91,11 @@ class TestSplitBillService(TestCase):
         self.bill_service.create_bill(
             CreateBillSpec(user_id=1, split_bill_id=1, amount=123)
         )
-        assert True
+        self.split_bill_accessor.increment_aggregates.assert_called_once_with(
+            IncrementSplitBillAggregatesSpec(
+                split_bill_id=1, total_count=1, bill_user_id=1
+            )
+        )
 
     def test_bill_service_get_list_by_split_bill_id(self):
         self.bill_service.get_bill_list(
@@ -148,60 +178,432 @@ class TestSplitBillService(TestCase):
 
         self.split_bill_accessor.create.return_value = dummy_split_bill
         self.bill_accessor.bulk_create.return_value = dummy_bills
+        self.user_accessor.get_existing_ids.return_value = {1, 2}
 
         result = self.split_bill_service.create_group_split_bill(spec)
 
         self.assertEqual(result.name, spec.name)
+        self.user_accessor.get_existing_ids.assert_called_once_with({1, 2})
 
-    def test_get_split_bill_list_current_user_success(self):
-        dummy_split_bills = [
-            GroupSplitBillDomain(
-                id=1,
-                name="tets",
-                user_fund_id=1,
-                user_fund_email="user123@gmail.com",
+    def test_create_group_split_bill_invalid_user_id(self):
+        spec = CreateGroupSplitBillSpec(
+            name="tets",
+            user_fund_id=1,
+            withdrawal_method="GOPAY",
+            withdrawal_number="asasa",
+            amount=2460,
+            bills=[
+                OrderedDict([("user_id", 1), ("amount", 1230), ("details", None)]),
+                OrderedDict([("user_id", 3), ("amount", 1230), ("details", None)]),
+            ],
+        )
+        self.user_accessor.get_existing_ids.return_value = {1}
+
+        with self.assertRaises(ValidationErrorException) as context:
+            self.split_bill_service.create_group_split_bill(spec)
+
+        self.assertEqual(
+            context.exception.field_errors, {"bills": ["User 3 does not exist."]}
+        )
+        self.split_bill_accessor.create.assert_not_called()
+        self.bill_accessor.bulk_create.assert_not_called()
+
+    def test_create_group_split_bill_batch(self):
+        users = [
+            User(id=index, firebase_uid=f"user-{index}", email=f"{index}@paytungan.com")
+            for index in range(1, 4)
+        ]
+        bills = [
+            OrderedDict([("user_id", user.id), ("amount", 10000), ("details", None)])
+            for user in users
+        ]
+        specs = [
+            CreateGroupSplitBillSpec(
+                name=name,
+                user_fund_id=users[0].id,
                 withdrawal_method="GOPAY",
-                withdrawal_number="asasa",
-                amount=123,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
+                withdrawal_number="0812",
+                amount=30000,
+                bills=bills,
             )
+            for name in ["first", "second"]
         ]
-        dummy_bills = [
-            Bill(
-                user_id=1,
-                split_bill_id=1,
-                status="PENDING",
+        specs.insert(
+            1,
+            CreateGroupSplitBillSpec(
+                name="invalid",
+                user_fund_id=users[0].id,
+                withdrawal_method="GOPAY",
+                withdrawal_number="0812",
+                amount=10000,
+                bills=[OrderedDict([("user_id", 999), ("amount", 10000)])],
+            ),
+        )
+
+        def bulk_create_split_bills(split_bill_specs):
+            split_bills = []
+            for index, split_bill_spec in enumerate(split_bill_specs, 1):
+                split_bill = SplitBillAccessor._convert_to_model(split_bill_spec)
+                split_bill.id = index
+                split_bills.append(split_bill)
+            return split_bills
+
+        self.user_accessor.get_list.return_value = users
+        self.split_bill_accessor.bulk_create.side_effect = bulk_create_split_bills
+        self.bill_accessor.bulk_create.side_effect = lambda bills_domain: [
+            BillAccessor._convert_to_model(bill, is_create=True)
+            for bill in bills_domain
+        ]
+
+        results = self.split_bill_service.create_group_split_bill_batch(specs)
+        data = CreateSplitBillBatchResponse({"data": results}).data["data"]
+
+        self.assertEqual([result["index"] for result in data], [0, 1, 2])
+        self.assertEqual(data[1]["errors"], {"bills": ["User 999 does not exist."]})
+        self.assertIsNone(data[1]["data"])
+        self.assertEqual(
+            [data[0]["data"]["name"], data[2]["data"]["name"]], ["first", "second"]
+        )
+        self.assertEqual(data[2]["data"]["user_fund_email"], users[0].email)
+        self.assertEqual(
+            [bill["status"] for bill in data[0]["data"]["bills"]],
+            ["PAID", "PENDING", "PENDING"],
+        )
+        self.assertEqual(data[0]["data"]["total_count"], 2)
+        self.assertEqual(
+            [bill["user"]["email"] for bill in data[2]["data"]["bills"]],
+            [user.email for user in users],
+        )
+        # The invalid spec is left out of the writes, which are one batch each
+        split_bill_specs = self.split_bill_accessor.bulk_create.call_args.args[0]
+        self.assertEqual(
+            [split_bill_spec.name for split_bill_spec in split_bill_specs],
+            ["first", "second"],
+        )
+        self.assertEqual(
+            [
+                bill.split_bill_id
+                for bill in self.bill_accessor.bulk_create.call_args.args[0]
+            ],
+            [1, 1, 1, 2, 2, 2],
+        )
+
+    def test_create_group_split_bill_batch_duplicate_user_id(self):
+        users = [User(id=1, firebase_uid="user-1"), User(id=2, firebase_uid="user-2")]
+        specs = [
+            CreateGroupSplitBillSpec(
+                name=name,
+                user_fund_id=1,
+                withdrawal_method="GOPAY",
+                withdrawal_number="0812",
+                amount=30000,
+                bills=[
+                    OrderedDict(
+                        [("user_id", user_id), ("amount", 10000), ("details", None)]
+                    )
+                    for user_id in user_ids
+                ],
             )
+            for name, user_ids in [("valid", [1, 2]), ("duplicate", [1, 2, 2])]
+        ]
+        self.user_accessor.get_list.return_value = users
+        self.split_bill_accessor.bulk_create.return_value = [
+            SplitBill(id=1, name="valid", user_fund_id=1, amount=30000)
+        ]
+        self.bill_accessor.bulk_create.side_effect = lambda bills_domain: [
+            BillAccessor._convert_to_model(bill, is_create=True)
+            for bill in bills_domain
         ]
+
+        results = self.split_bill_service.create_group_split_bill_batch(specs)
+
+        self.assertEqual(results[0].data.name, "valid")
+        self.assertIsNone(results[0].errors)
+        self.assertIsNone(results[1].data)
+        self.assertEqual(
+            results[1].errors, {"bills": ["User 2 has more than one bill."]}
+        )
+        self.assertEqual(len(self.split_bill_accessor.bulk_create.call_args.args[0]), 1)
+        self.assertEqual(len(self.bill_accessor.bulk_create.call_args.args[0]), 2)
+
+    def test_create_group_split_bill_duplicate_user_id(self):
+        spec = CreateGroupSplitBillSpec(
+            name="tets",
+            user_fund_id=1,
+            withdrawal_method="GOPAY",
+            withdrawal_number="asasa",
+            amount=2460,
+            bills=[
+                OrderedDict([("user_id", 2), ("amount", 1230), ("details", None)]),
+                OrderedDict([("user_id", 2), ("amount", 1230), ("details", None)]),
+            ],
+        )
+        self.user_accessor.get_existing_ids.return_value = {1, 2}
+
+        with self.assertRaises(ValidationErrorException) as context:
+            self.split_bill_service.create_group_split_bill(spec)
+
+        self.assertEqual(
+            context.exception.field_errors,
+            {"bills": ["User 2 has more than one bill."]},
+        )
+        self.split_bill_accessor.create.assert_not_called()
+
+    def test_get_split_bill_list_current_user_success(self):
+        dummy_split_bill = GroupSplitBillDomain(
+            id=1,
+            name="tets",
+            user_fund_id=1,
+            user_fund_email="user123@gmail.com",
+            withdrawal_method="GOPAY",
+            withdrawal_number="asasa",
+            amount=123,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        dummy_bill = Bill(
+            user_id=1,
+            split_bill_id=1,
+            status="PENDING",
+        )
         spec = GetSplitBillCurrentUserSpec(user_id=1)
 
-        self.split_bill_accessor.get_list.return_value = dummy_split_bills
-        self.bill_accessor.get_list.return_value = dummy_bills
+        self.split_bill_accessor.get_list_with_bill_by_user.return_value = CursorPage(
+            results=[
+                SplitBillWithBillDomain(split_bill=dummy_split_bill, bill=dummy_bill)
+            ]
+        )
 
         result = self.split_bill_service.get_list_current_user(spec)
 
-        self.assertEqual(result[0].split_bill.id, dummy_split_bills[0].id)
+        self.assertEqual(result.results[0].split_bill.id, dummy_split_bill.id)
+        self.split_bill_accessor.get_list_with_bill_by_user.assert_called_once_with(
+            spec
+        )
 
     def test_get_split_bill_list_current_user_empty_success(self):
         spec = GetSplitBillCurrentUserSpec(user_id=1)
 
-        self.bill_accessor.get_list.return_value = []
+        self.split_bill_accessor.get_list_with_bill_by_user.return_value = CursorPage()
         result = self.split_bill_service.get_list_current_user(spec)
-        self.assertEqual(len(result), 0)
-
-        dummy_bills = [
-            Bill(
-                user_id=1,
-                split_bill_id=1,
-                status="PENDING",
-            )
-        ]
 
-        self.bill_accessor.get_list.return_value = dummy_bills
-        self.split_bill_accessor.get_list.return_value = []
-        result = self.split_bill_service.get_list_current_user(spec)
-        self.assertEqual(len(result), 0)
+        self.assertEqual(len(result.results), 0)
+        self.assertIsNone(result.next_cursor)
 
     def test_delete_split_bill_success(self):
         self.split_bill_service.delete(DeleteSplitBillSpec(split_bill_ids=[1]))
+
+
+class TestSplitBillAccessor(DjangoTestCase):
+    def setUp(self) -> None:
+        self.bill_accessor = BillAccessor(logger=MagicMock())
+        self.split_bill_accessor = SplitBillAccessor(logger=MagicMock())
+        self.users = [
+            User.objects.create(firebase_uid=f"user-{index}", phone_number="+62")
+            for index in range(3)
+        ]
+        self.split_bills = []
+        for index in range(4):
+            split_bill = SplitBill.objects.create(
+                name=f"split bill {index}", user_fund=self.users[index % 3], amount=0
+            )
+            for user in self.users:
+                Bill.objects.create(user=user, split_bill=split_bill, amount=10000)
+            self.split_bills.append(split_bill)
+
+    def test_get_split_bill_list_serialize_with_constant_queries(self):
+        spec = GetSplitBillListSpec(
+            split_bill_ids=[split_bill.id for split_bill in self.split_bills],
+            eager_loading=GROUP_SPLIT_BILL_EAGER_LOADING,
+        )
+
+        # Split bills joined with user_fund, then the bills and their users
+        with self.assertNumQueries(3):
+            split_bills = self.split_bill_accessor.get_list(spec)
+            data = GetSplitBillListResponse({"data": split_bills}).data["data"]
+
+        self.assertEqual(len(data), 4)
+        self.assertEqual(len(data[0]["bills"]), 3)
+        self.assertEqual(data[0]["bills"][0]["user"]["phone_number"], "+62")
+
+    def test_rebuild_aggregates(self):
+        split_bill = self.split_bills[0]
+        Bill.objects.filter(split_bill=split_bill).update(status="PAID")
+
+        updated = self.split_bill_accessor.rebuild_aggregates([split_bill.id])
+
+        split_bill.refresh_from_db()
+        self.assertEqual(updated, 1)
+        # The fund holder's own bill is left out
+        self.assertEqual(
+            (split_bill.paid_amount, split_bill.paid_count, split_bill.total_count),
+            (20000, 2, 2),
+        )
+
+    def test_rebuild_split_bill_aggregates_command(self):
+        Bill.objects.filter(split_bill=self.split_bills[1]).update(status="PAID")
+        stdout = StringIO()
+
+        call_command("rebuild_split_bill_aggregates", stdout=stdout)
+
+        self.assertIn("Rebuilt aggregates of 4 split bills", stdout.getvalue())
+        self.assertEqual(
+            [split_bill.paid_count for split_bill in SplitBill.objects.order_by("id")],
+            [0, 2, 0, 0],
+        )
+
+    def test_increment_aggregates(self):
+        split_bill = self.split_bills[0]
+
+        updated = self.split_bill_accessor.increment_aggregates(
+            IncrementSplitBillAggregatesSpec(
+                split_bill_id=split_bill.id,
+                paid_amount=10000,
+                paid_count=1,
+                bill_user_id=self.users[1].id,
+            )
+        )
+        skipped = self.split_bill_accessor.increment_aggregates(
+            IncrementSplitBillAggregatesSpec(
+                split_bill_id=split_bill.id,
+                paid_amount=10000,
+                paid_count=1,
+                bill_user_id=split_bill.user_fund_id,
+            )
+        )
+
+        split_bill.refresh_from_db()
+        self.assertEqual((updated, skipped), (1, 0))
+        self.assertEqual((split_bill.paid_amount, split_bill.paid_count), (10000, 1))
+
+    def test_get_bill_list_serialize_with_constant_queries(self):
+        spec = GetBillListSpec(
+            user_ids=[self.users[0].id], eager_loading=BILL_EAGER_LOADING
+        )
+
+        with self.assertNumQueries(1):
+            bills = self.bill_accessor.get_list(spec)
+            data = GetBillListResponse({"data": bills}).data["data"]
+
+        self.assertEqual(len(data), 4)
+
+    def test_get_list_with_bill_by_user_paginated(self):
+        user = self.users[0]
+        pairs = []
+        spec = GetSplitBillCurrentUserSpec(user_id=user.id, limit=3)
+
+        # Every page is a single joined query, whatever the history size
+        with self.assertNumQueries(1):
+            page = self.split_bill_accessor.get_list_with_bill_by_user(spec)
+            pairs.extend(page.results)
+        spec.cursor = page.next_cursor
+        with self.assertNumQueries(1):
+            page = self.split_bill_accessor.get_list_with_bill_by_user(spec)
+            pairs.extend(page.results)
+
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual(
+            [pair.split_bill.id for pair in pairs],
+            [split_bill.id for split_bill in reversed(self.split_bills)],
+        )
+        self.assertTrue(all(pair.bill.user_id == user.id for pair in pairs))
+        self.assertTrue(
+            all(pair.bill.split_bill_id == pair.split_bill.id for pair in pairs)
+        )
+
+    def test_get_list_with_bill_by_user_fund(self):
+        user = self.users[1]
+        spec = GetSplitBillCurrentUserSpec(user_id=user.id, is_user_fund=True)
+
+        page = self.split_bill_accessor.get_list_with_bill_by_user(spec)
+
+        self.assertEqual(
+            [pair.split_bill.id for pair in page.results], [self.split_bills[1].id]
+        )
+
+    def test_get_split_bill_page(self):
+        spec = GetSplitBillListSpec(
+            split_bill_ids=[split_bill.id for split_bill in self.split_bills],
+            eager_loading=GROUP_SPLIT_BILL_EAGER_LOADING,
+            limit=3,
+        )
+
+        with self.assertNumQueries(3):
+            first_page = self.split_bill_accessor.get_page(spec)
+        spec.cursor = first_page.next_cursor
+        second_page = self.split_bill_accessor.get_page(spec)
+
+        self.assertEqual(
+            [split_bill.id for split_bill in first_page.results + second_page.results],
+            [split_bill.id for split_bill in reversed(self.split_bills)],
+        )
+        self.assertIsNone(second_page.next_cursor)
+
+    @patch("paytungan.app.split_bill.accessors.STREAM_CHUNK_SIZE", 3)
+    def test_stream_split_bill_list_matches_response(self):
+        spec = GetSplitBillListSpec(
+            split_bill_ids=[split_bill.id for split_bill in self.split_bills],
+            eager_loading=GROUP_SPLIT_BILL_EAGER_LOADING,
+        )
+
+        response = StreamingJSONListResponse(
+            self.split_bill_accessor.iter_list(spec), GroupSplitBillSerializer()
+        )
+        page = self.split_bill_accessor.get_page(spec)
+        expected = JSONRenderer().render(
+            GetSplitBillListResponse(
+                {"data": page.results, "next_cursor": page.next_cursor}
+            ).data
+        )
+
+        self.assertEqual(b"".join(response.streaming_content), expected)
+
+    def test_stream_bill_list_matches_response(self):
+        spec = GetBillListSpec(user_ids=[self.users[0].id])
+
+        response = StreamingJSONListResponse(
+            self.bill_accessor.iter_list(spec), BillSerializer(), rows_per_chunk=1
+        )
+        page = self.bill_accessor.get_page(spec)
+        expected = JSONRenderer().render(
+            GetBillListResponse({"data": page.results}).data
+        )
+
+        self.assertEqual(b"".join(response.streaming_content), expected)
+
+    def test_bulk_create(self):
+        split_bills = self.split_bill_accessor.bulk_create(
+            [
+                CreateSplitBillSpec(
+                    name=name,
+                    user_fund_id=self.users[0].id,
+                    withdrawal_method="GOPAY",
+                    withdrawal_number="0812",
+                    amount=20000,
+                    total_count=2,
+                )
+                for name in ["first", "second"]
+            ]
+        )
+        bills = self.bill_accessor.bulk_create(
+            [
+                BillDomain(
+                    user_id=user.id,
+                    split_bill_id=split_bills[1].id,
+                    amount=10000,
+                    **ObjectMapperUtil.default_domain_creation_params(),
+                )
+                for user in self.users
+            ]
+        )
+
+        self.assertEqual(
+            list(
+                SplitBill.objects.filter(
+                    id__in=[split_bill.id for split_bill in split_bills]
+                ).values_list("name", "total_count")
+            ),
+            [("first", 2), ("second", 2)],
+        )
+        self.assertEqual(len(bills), 3)
+        self.assertEqual(Bill.objects.filter(split_bill=split_bills[1]).count(), 3)
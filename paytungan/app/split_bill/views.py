@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from django.db import transaction
 
 from paytungan.app.common.decorators import api_exception
+from paytungan.app.common.responses import StreamingJSONListResponse
 from paytungan.app.base.headers import AUTH_HEADERS
 from paytungan.app.auth.utils import firebase_auth, user_auth
 from paytungan.app.auth.specs import FirebaseDecodedToken, UserDomain
@@ -19,8 +20,13 @@ from .specs import (
     GetBillListSpec,
 )
 from .serializers import (
+    BILL_EAGER_LOADING,
+    GROUP_SPLIT_BILL_EAGER_LOADING,
+    BillSerializer,
     CreateBillRequest,
     CreateBillResponse,
+    CreateSplitBillBatchRequest,
+    CreateSplitBillBatchResponse,
     CreateSplitBillRequest,
     CreateSplitBillResponse,
     DeleteSplitBillRequest,
@@ -32,6 +38,7 @@ from .serializers import (
     GetSplitBillRequest,
     GetSplitBillListRequest,
     GetSplitBillListResponse,
+    GroupSplitBillSerializer,
     GetBillListRequest,
     GetBillListResponse,
 )
@@ -86,8 +93,17 @@ class BillViewSet(viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.data
         spec = ObjectMapperUtil.map(serializer.data, GetBillListSpec)
-        bills = bill_service.get_bill_list(spec)
-        return Response(GetBillListResponse({"data": bills}).data)
+        spec.eager_loading = BILL_EAGER_LOADING
+        if data["stream"]:
+            bills = bill_service.iter_bill_list(spec)
+            return StreamingJSONListResponse(bills, BillSerializer())
+
+        page = bill_service.get_bill_list(spec)
+        return Response(
+            GetBillListResponse(
+                {"data": page.results, "next_cursor": page.next_cursor}
+            ).data
+        )
 
     @action(
         detail=False,
@@ -166,6 +182,40 @@ class SplitBillViewSet(viewsets.ViewSet):
         split_bill = split_bill_service.create_group_split_bill(spec)
         return Response(CreateSplitBillResponse({"data": split_bill}).data)
 
+    @action(
+        detail=False,
+        url_path="create/batch",
+        methods=["post"],
+    )
+    @swagger_auto_schema(
+        manual_parameters=AUTH_HEADERS,
+        request_body=CreateSplitBillBatchRequest(),
+        responses={200: CreateSplitBillBatchResponse()},
+    )
+    @transaction.atomic
+    @api_exception
+    @user_auth
+    def create_split_bill_batch(self, request: Request, user: UserDomain) -> Response:
+        """
+        Create many group split_bill objects, with a result for every item
+        """
+        serializer = CreateSplitBillBatchRequest(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        specs = [
+            CreateGroupSplitBillSpec(
+                name=data["name"],
+                user_fund_id=data["user_fund_id"],
+                withdrawal_method=data.get("withdrawal_method"),
+                withdrawal_number=data.get("withdrawal_number"),
+                amount=data["amount"],
+                details=data.get("details"),
+                bills=data["bills"],
+            )
+            for data in serializer.data["split_bills"]
+        ]
+        results = split_bill_service.create_group_split_bill_batch(specs)
+        return Response(CreateSplitBillBatchResponse({"data": results}).data)
+
     @action(
         detail=False,
         url_path="list/get",
@@ -186,9 +236,19 @@ class SplitBillViewSet(viewsets.ViewSet):
         """
         serializer = GetSplitBillListRequest(data=request.query_params)
         serializer.is_valid(raise_exception=True)
-        spec = ObjectMapperUtil.map(serializer.data, GetSplitBillListSpec)
-        split_bills = split_bill_service.get_split_bill_list(spec)
-        return Response(GetSplitBillListResponse({"data": split_bills}).data)
+        data = serializer.data
+        spec = ObjectMapperUtil.map(data, GetSplitBillListSpec)
+        spec.eager_loading = GROUP_SPLIT_BILL_EAGER_LOADING
+        if data["stream"]:
+            split_bills = split_bill_service.iter_split_bill_list(spec)
+            return StreamingJSONListResponse(split_bills, GroupSplitBillSerializer())
+
+        page = split_bill_service.get_split_bill_list(spec)
+        return Response(
+            GetSplitBillListResponse(
+                {"data": page.results, "next_cursor": page.next_cursor}
+            ).data
+        )
 
     @action(
         detail=False,
@@ -210,10 +270,17 @@ class SplitBillViewSet(viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.data
         spec = GetSplitBillCurrentUserSpec(
-            user_id=user.id, is_user_fund=data["is_user_fund"]
+            user_id=user.id,
+            is_user_fund=data["is_user_fund"],
+            cursor=data.get("cursor"),
+            limit=data["limit"],
+        )
+        page = split_bill_service.get_list_current_user(spec)
+        return Response(
+            GetSplitBillListCurrentUserResponse(
+                {"data": page.results, "next_cursor": page.next_cursor}
+            ).data
         )
-        split_bills = split_bill_service.get_list_current_user(spec)
-        return Response(GetSplitBillListCurrentUserResponse({"data": split_bills}).data)
 
     @action(
         detail=False,
@@ -1,20 +1,34 @@
 from rest_framework.routers import SimpleRouter
 from django.urls import include, path
 
+from .payment import views as payment_views
 from .payment.views import PaymentViewSet
 from .auth.views import UserViewSet, AuthViewSet
-from .base.views import HealthCheckViewSet
+from .base.views import HealthCheckViewSet, MetricsViewSet
 from .split_bill.views import SplitBillViewSet, BillViewSet
 
 
 router = SimpleRouter(trailing_slash=False)
 router.register("health-check", HealthCheckViewSet, basename="healthcheck")
+router.register("metrics", MetricsViewSet, basename="metrics")
 router.register("api/users", UserViewSet, basename="user")
 router.register("api/authentication", AuthViewSet, basename="authentication")
 router.register("api/split-bills", SplitBillViewSet, basename="split-bill")
 router.register("api/bills", BillViewSet, basename="bill")
 router.register("api/payments", PaymentViewSet, basename="payment")
 
+async_payment_urls = [
+    path("get", payment_views.async_get_payment),
+    path("create", payment_views.async_create_payment),
+    path("update/paid", payment_views.async_update_status),
+    path("get/bill_id", payment_views.async_get_payment_by_bill_id),
+    path("payout/get", payment_views.async_get_payout),
+    path("payout/create", payment_views.async_create_payout),
+    path("payout/get-or-create", payment_views.async_get_or_create_payout),
+    path("list/get", payment_views.async_get_payment_list),
+]
+
 urlpatterns = [
     path("", include(router.urls)),
+    path("api/async/payments/", include(async_payment_urls)),
 ]
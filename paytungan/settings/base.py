@@ -18,6 +18,7 @@ from django.urls import reverse_lazy
 
 from paytungan.app.base.constants import (
     DEFAULT_LOGGER,
+    LOG_QUEUE_MAX_SIZE,
     SENTRY_DSN,
     Environment,
 )
@@ -45,6 +46,7 @@ if CURRENT_ENV == Environment.PROD:
 if CURRENT_ENV != Environment.LOCAL:
     import sentry_sdk
     from sentry_sdk.integrations.django import DjangoIntegration
+    from sentry_sdk.integrations.logging import ignore_logger
 
     sentry_sdk.init(
         dsn=SENTRY_DSN,
@@ -52,6 +54,8 @@ if CURRENT_ENV != Environment.LOCAL:
         send_default_pii=True,
         attach_stacktrace=True,
     )
+    # Sent by the LOGGING handler instead, off the request thread
+    ignore_logger(DEFAULT_LOGGER)
 
 
 ALLOWED_HOSTS = [
@@ -90,6 +94,8 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    # First, to profile the whole chain. Removed at startup unless enabled.
+    "paytungan.app.common.middlewares.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -193,11 +199,14 @@ LOGGING = {
         "json": {"()": "paytungan.app.common.middlewares.JSONFormatter"},
     },
     "handlers": {
+        # Formats, writes to stdout and sends warnings to Sentry on a background
+        # thread
         "special": {
+            "()": "paytungan.app.logging.handlers.BackgroundLogHandler",
             "filters": ["request_id"],
-            "class": "logging.StreamHandler",
             "formatter": "json",
             "stream": sys.stdout,
+            "max_size": LOG_QUEUE_MAX_SIZE,
         }
     },
     "loggers": {